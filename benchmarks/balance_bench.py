@@ -0,0 +1,201 @@
+# 📍 benchmarks/balance_bench.py
+"""
+Benchmark throughput GET /balance dengan banyak request bersamaan,
+lawan stub RPC lokal (EVM JSON-RPC, Solana JSON-RPC & Tron HTTP API).
+
+Stub RPC jalan di thread sendiri dengan latency buatan, app FastAPI dipanggil
+in-process lewat ASGITransport. Mode "blocking" meniru balance checker lama
+(Web3 sync di dalam handler async) sebagai pembanding. Terakhir, POST /balances
+untuk N wallet (native + USDT) lewat Multicall3, dihitung jumlah round trip RPC-nya.
+
+    python -m benchmarks.balance_bench --requests 1000 --concurrency 200 --rpc-latency 0.05
+"""
+import time
+import socket
+import asyncio
+import argparse
+import threading
+import statistics
+import httpx
+import uvicorn
+from eth_abi import encode, decode
+from fastapi import FastAPI, Request, Query
+from routers.crypto.balance import balance_router
+from lib.rpc_clients import get_web3, close_rpc_clients
+from lib.multicall import AGGREGATE3, BALANCE_OF, DECIMALS, GET_ETH_BALANCE
+
+EVM_WALLET = "0x00000000219ab540356cBB839Cbe05303d7705Fa"
+SOL_WALLET = "11111111111111111111111111111111"
+TRX_WALLET = "TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7"
+USDT_CONTRACT = "0xdAC17F958D2ee523a2206206994597C13D831ec7"
+
+# jumlah HTTP request yang diterima stub RPC (= round trip)
+rpc_round_trips = 0
+
+
+# ================== STUB RPC ==================
+def build_stub_rpc(latency: float) -> FastAPI:
+    stub = FastAPI()
+
+    def multicall(data: str) -> str:
+        # stub Multicall3.aggregate3: native 1 ETH, token 5.0 dengan 6 decimals
+        (calls,) = decode(["(address,bool,bytes)[]"], bytes.fromhex(data[10:]))
+        answers = []
+        for _, _, calldata in calls:
+            selector = calldata[:4]
+            if selector == GET_ETH_BALANCE:
+                answers.append((True, encode(["uint256"], [10**18])))
+            elif selector == BALANCE_OF:
+                answers.append((True, encode(["uint256"], [5 * 10**6])))
+            elif selector == DECIMALS:
+                answers.append((True, encode(["uint8"], [6])))
+            else:
+                answers.append((False, b""))
+        return "0x" + encode(["(bool,bytes)[]"], [answers]).hex()
+
+    def answer(call: dict) -> dict:
+        method = call.get("method")
+        if method == "eth_getBalance":
+            result = hex(10**18)
+        elif method == "eth_call" and call["params"][0]["data"].startswith("0x" + AGGREGATE3.hex()):
+            result = multicall(call["params"][0]["data"])
+        elif method == "eth_chainId":
+            result = "0x1"
+        elif method == "eth_getTransactionCount":
+            result = "0x0"
+        elif method == "eth_gasPrice":
+            result = hex(10**9)
+        elif method == "eth_sendRawTransaction":
+            result = "0x" + "ab" * 32
+        elif method == "web3_clientVersion":
+            result = "stub/v1"
+        elif method == "getBalance":
+            result = {"context": {"slot": 1}, "value": 2_000_000_000}
+        else:
+            result = None
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+    @stub.post("/")
+    async def json_rpc(request: Request):
+        global rpc_round_trips
+        rpc_round_trips += 1
+        await asyncio.sleep(latency)
+        body = await request.json()
+        if isinstance(body, list):
+            return [answer(call) for call in body]
+        return answer(body)
+
+    @stub.post("/wallet/getaccount")
+    async def tron_account(request: Request):
+        await asyncio.sleep(latency)
+        body = await request.json()
+        return {"address": body.get("address"), "balance": 3_000_000}
+
+    return stub
+
+
+def start_stub_rpc(latency: float) -> str:
+    """Jalankan stub RPC di thread (event loop sendiri), return URL-nya"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config = uvicorn.Config(
+        build_stub_rpc(latency), host="127.0.0.1", port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+# ================== APP YANG DIUKUR ==================
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(balance_router, prefix="/api/v1/crypto")
+
+    @app.get("/blocking/balance")
+    async def blocking_balance(wallet: str = Query(...), rpc_url: str = Query(...)):
+        # perilaku lama: RPC sync di dalam async def → event loop ke-block
+        w3 = get_web3("eth", rpc_url)
+        return {"balance": float(w3.from_wei(w3.eth.get_balance(wallet), "ether"))}
+
+    return app
+
+
+async def run_load(client: httpx.AsyncClient, path: str, params: dict, total: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            resp = await client.get(path, params=params)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "req_per_s": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+        "errors": errors,
+    }
+
+
+async def main(args):
+    rpc_url = start_stub_rpc(args.rpc_latency)
+    app = build_app()
+    transport = httpx.ASGITransport(app=app)
+    cases = {
+        "eth (async)": ("/api/v1/crypto/balance", {"chain": "eth", "wallet": EVM_WALLET}),
+        "sol (async)": ("/api/v1/crypto/balance", {"chain": "sol", "wallet": SOL_WALLET}),
+        "trx (async)": ("/api/v1/crypto/balance", {"chain": "trx", "wallet": TRX_WALLET}),
+        "eth (blocking)": ("/blocking/balance", {"wallet": EVM_WALLET}),
+    }
+    print(
+        f"stub RPC {rpc_url} | latency {args.rpc_latency * 1000:.0f} ms | "
+        f"{args.requests} request | concurrency {args.concurrency}"
+    )
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for name, (path, params) in cases.items():
+            params = {**params, "rpc_url": rpc_url}
+            # warm-up: bikin client RPC & connection pool dulu
+            await client.get(path, params=params)
+            result = await run_load(client, path, params, args.requests, args.concurrency)
+            print(f"{name:<16} {result}")
+
+        # bulk: N wallet × (native + USDT) lewat /balances → Multicall3
+        items = [
+            {"chain": "eth", "wallet": "0x" + f"{i + 1:040x}", "token": token}
+            for i in range(args.wallets)
+            for token in (None, USDT_CONTRACT)
+        ]
+        for label in ("bulk (cold)", "bulk (warm)"):
+            before = rpc_round_trips
+            start = time.perf_counter()
+            resp = await client.post(
+                "/api/v1/crypto/balances", json={"rpc_urls": {"eth": rpc_url}, "items": items}
+            )
+            body = resp.json()
+            print(
+                f"{label:<16} {len(items)} saldo ({args.wallets} wallet) dalam "
+                f"{(time.perf_counter() - start) * 1000:.0f} ms, {rpc_round_trips - before} RPC round trip, "
+                f"{body['failed']} gagal"
+            )
+    await close_rpc_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rpc-latency", type=float, default=0.05)
+    parser.add_argument("--wallets", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
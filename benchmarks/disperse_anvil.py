@@ -0,0 +1,183 @@
+# 📍 benchmarks/disperse_anvil.py
+"""
+Uji payout disperse lawan dev node lokal (anvil / hardhat), tanpa dana asli.
+
+Deploy token ERC20 mirip USDT (approve non-zero → non-zero ditolak), kontrak Disperse
+(disperseToken sama dengan Disperse.app) dan Disperse rusak (selalu revert), lalu cek:
+- jalur disperse: satu tx disperseToken, saldo semua penerima bertambah, gas vs transfer satu per satu
+- jalur fallback: Disperse rusak ditolak saat simulasi sebelum approve (nonce & allowance tidak
+  berubah), baris dikirim ulang lewat transfer satu per satu dan saldo penerima tetap bertambah
+
+Kontrak ditulis dalam Vyper supaya bisa dikompilasi tanpa download solc (pip install vyper).
+
+    anvil &
+    python -m benchmarks.disperse_anvil --rpc-url http://127.0.0.1:8545 --recipients 20
+"""
+import os
+import time
+import asyncio
+import argparse
+from web3 import Web3
+from eth_account import Account
+
+# akun #0 bawaan anvil / hardhat (mnemonic "test test ... junk"), cuma untuk dev node lokal
+DEV_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+DECIMALS = 6
+
+TOKEN_SOURCE = """
+# pragma version ~=0.4.0
+
+decimals: public(uint8)
+balanceOf: public(HashMap[address, uint256])
+allowance: public(HashMap[address, HashMap[address, uint256]])
+
+
+@deploy
+def __init__(supply: uint256, token_decimals: uint8):
+    self.decimals = token_decimals
+    self.balanceOf[msg.sender] = supply
+
+
+@external
+def transfer(receiver: address, amount: uint256) -> bool:
+    self.balanceOf[msg.sender] -= amount
+    self.balanceOf[receiver] += amount
+    return True
+
+
+@external
+def transferFrom(sender: address, receiver: address, amount: uint256) -> bool:
+    self.allowance[sender][msg.sender] -= amount
+    self.balanceOf[sender] -= amount
+    self.balanceOf[receiver] += amount
+    return True
+
+
+@external
+def approve(spender: address, amount: uint256) -> bool:
+    assert amount == 0 or self.allowance[msg.sender][spender] == 0, "reset allowance dulu"
+    self.allowance[msg.sender][spender] = amount
+    return True
+"""
+
+DISPERSE_SOURCE = """
+# pragma version ~=0.4.0
+
+interface ERC20:
+    def transferFrom(sender: address, receiver: address, amount: uint256) -> bool: nonpayable
+    def transfer(receiver: address, amount: uint256) -> bool: nonpayable
+
+
+@external
+def disperseToken(token: address, recipients: DynArray[address, 256], values: DynArray[uint256, 256]):
+    total: uint256 = 0
+    for value: uint256 in values:
+        total += value
+    assert extcall ERC20(token).transferFrom(msg.sender, self, total)
+    for i: uint256 in range(len(recipients), bound=256):
+        assert extcall ERC20(token).transfer(recipients[i], values[i])
+"""
+
+BROKEN_DISPERSE_SOURCE = """
+# pragma version ~=0.4.0
+
+
+@external
+def disperseToken(token: address, recipients: DynArray[address, 256], values: DynArray[uint256, 256]):
+    raise "disperse rusak"
+"""
+
+
+def deploy(w3: Web3, account, source: str, *args):
+    from vyper import compile_code
+
+    compiled = compile_code(source, output_formats=["abi", "bytecode"])
+    factory = w3.eth.contract(abi=compiled["abi"], bytecode=compiled["bytecode"])
+    tx = factory.constructor(*args).build_transaction(
+        {"from": account.address, "nonce": w3.eth.get_transaction_count(account.address, "pending")}
+    )
+    tx_hash = w3.eth.send_raw_transaction(account.sign_transaction(tx).raw_transaction)
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    return w3.eth.contract(address=receipt.contractAddress, abi=compiled["abi"])
+
+
+def balances(token, wallets: list) -> list:
+    return [token.functions.balanceOf(wallet).call() for wallet in wallets]
+
+
+def wait_rows(w3: Web3, rows: list):
+    for row in rows:
+        assert row["tx_hash"], f"baris {row['index']} tanpa tx_hash: {row}"
+        receipt = w3.eth.wait_for_transaction_receipt(row["tx_hash"], timeout=60)
+        assert receipt.status == 1, f"tx {row['tx_hash']} revert"
+
+
+async def main(args):
+    w3 = Web3(Web3.HTTPProvider(args.rpc_url))
+    account = Account.from_key(DEV_PRIVATE_KEY)
+    chain_id = w3.eth.chain_id
+    token = deploy(w3, account, TOKEN_SOURCE, 10**9 * 10**DECIMALS, DECIMALS)
+    disperse_contract = deploy(w3, account, DISPERSE_SOURCE)
+    broken_contract = deploy(w3, account, BROKEN_DISPERSE_SOURCE)
+    print(f"dev node {args.rpc_url} (chain {chain_id}) | token {token.address} | disperse {disperse_contract.address}")
+
+    # config wallet service dibaca saat import → env di-set dulu, baru modul lib di-import
+    for chain in ("ETH", "BSC", "BASE"):
+        os.environ[f"{chain}_RPC_URL"] = args.rpc_url
+        os.environ[f"{chain}_PRIVATE_KEY"] = DEV_PRIVATE_KEY
+        os.environ[f"{chain}_CHAIN_ID"] = str(chain_id)
+    os.environ["ETH_USDT_ADDRESS"] = token.address
+    from lib import disperse
+    from lib.batch_sender import _send_disperse
+
+    recipients = [Account.create().address for _ in range(args.recipients)]
+    payouts = [(wallet, 1.5) for wallet in recipients]
+    value = int(1.5 * 10**DECIMALS)
+
+    # ===== jalur disperse =====
+    os.environ["DISPERSE_ADDRESS_ETH"] = disperse_contract.address
+    start = time.perf_counter()
+    result = disperse.disperse_sync("usdt", "eth", payouts)
+    assert balances(token, recipients) == [value] * len(recipients), "saldo penerima disperse tidak sesuai"
+    print(f"disperse     {len(recipients)} penerima dalam {time.perf_counter() - start:.2f}s {result}")
+
+    # ===== jalur fallback =====
+    os.environ["DISPERSE_ADDRESS_ETH"] = broken_contract.address
+    nonce_before = w3.eth.get_transaction_count(account.address, "pending")
+    try:
+        disperse.disperse_sync("usdt", "eth", payouts)
+        raise AssertionError("disperse rusak harusnya DisperseUnavailable")
+    except disperse.DisperseUnavailable as e:
+        print(f"simulasi     ditolak sebelum approve: {e}")
+    assert w3.eth.get_transaction_count(account.address, "pending") == nonce_before, "ada tx terkirim sebelum simulasi"
+    assert token.functions.allowance(account.address, broken_contract.address).call() == 0, "approve terkirim ke disperse rusak"
+
+    rows = [
+        {
+            "index": index,
+            "token": "usdt",
+            "chain": "eth",
+            "destination_wallet": wallet,
+            "amount": amount,
+            "private_key": None,
+            "mode": "transfer",
+            "status": "pending",
+            "tx_hash": None,
+            "error": None,
+        }
+        for index, (wallet, amount) in enumerate(payouts)
+    ]
+    start = time.perf_counter()
+    await _send_disperse("usdt", "eth", rows)
+    assert all(row["mode"] == "transfer" and row["status"] == "sent" for row in rows), rows
+    await asyncio.to_thread(wait_rows, w3, rows)
+    assert balances(token, recipients) == [2 * value] * len(recipients), "saldo penerima fallback tidak sesuai"
+    print(f"fallback     {len(rows)} transfer satu per satu dalam {time.perf_counter() - start:.2f}s")
+    print("✅ jalur disperse & fallback OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rpc-url", default=os.getenv("ANVIL_RPC_URL", "http://127.0.0.1:8545"))
+    parser.add_argument("--recipients", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
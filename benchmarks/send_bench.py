@@ -0,0 +1,99 @@
+# 📍 benchmarks/send_bench.py
+"""
+Benchmark jumlah round trip RPC per send_eth, lawan stub RPC lokal dari balance_bench.
+
+Mode "sequential" meniru send_eth lama (Web3 sync, is_connected + get_balance,
+get_transaction_count, gas_price, chain_id satu per satu), mode "batch" pakai
+send_eth sekarang yang menggabungkan call pra-kirim jadi satu JSON-RPC batch.
+
+    python -m benchmarks.send_bench --sends 200 --concurrency 20 --rpc-latency 0.05
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from web3 import Web3
+from eth_account import Account
+from benchmarks import balance_bench
+from lib.eth_helper import send_eth
+from lib.rpc_clients import get_web3, close_rpc_clients
+
+DESTINATION = "0x00000000219ab540356cBB839Cbe05303d7705Fa"
+
+
+def sequential_send(destination_wallet: str, amount_eth: float, rpc_url: str, private_key: str) -> str:
+    """send_eth versi lama: setiap call RPC satu round trip"""
+    account = Account.from_key(private_key)
+    w3 = get_web3("eth", rpc_url)
+    if not w3.is_connected():
+        raise Exception("Ethereum RPC tidak terkoneksi!")
+    if not w3.is_connected():  # get_balance lama juga cek koneksi
+        raise Exception("Ethereum RPC tidak terkoneksi!")
+    balance = w3.from_wei(w3.eth.get_balance(account.address), "ether")
+    if balance < amount_eth:
+        raise Exception(f"Saldo tidak cukup! Saldo sekarang {balance} ETH")
+    tx = {
+        "nonce": w3.eth.get_transaction_count(account.address),
+        "to": Web3.to_checksum_address(destination_wallet),
+        "value": w3.to_wei(amount_eth, "ether"),
+        "gas": 21000,
+        "gasPrice": w3.eth.gas_price,
+        "chainId": w3.eth.chain_id,
+    }
+    signed_tx = w3.eth.account.sign_transaction(tx, private_key)
+    return w3.eth.send_raw_transaction(signed_tx.raw_transaction).hex()
+
+
+async def run_sends(send, total: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                await send()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    before = balance_bench.rpc_round_trips
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    round_trips = balance_bench.rpc_round_trips - before
+    return {
+        "round_trips_per_send": round(round_trips / total, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "sends_per_s": round(total / elapsed, 1),
+        "errors": errors,
+    }
+
+
+async def main(args):
+    rpc_url = balance_bench.start_stub_rpc(args.rpc_latency)
+    private_key = Account.create().key.hex()
+    cases = {
+        "sequential": lambda: asyncio.to_thread(sequential_send, DESTINATION, 0.01, rpc_url, private_key),
+        "batch": lambda: send_eth(DESTINATION, 0.01, rpc_url=rpc_url, private_key=private_key),
+    }
+    print(
+        f"stub RPC {rpc_url} | latency {args.rpc_latency * 1000:.0f} ms | "
+        f"{args.sends} send | concurrency {args.concurrency}"
+    )
+    for name, send in cases.items():
+        # warm-up: client RPC & cache eth_chainId
+        await send()
+        result = await run_sends(send, args.sends, args.concurrency)
+        print(f"{name:<12} {result}")
+    await close_rpc_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sends", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rpc-latency", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,394 @@
+# 📍 lib/balance_cache.py
+import os
+import time
+import asyncio
+import logging
+import itertools
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from web3 import Web3
+from lib.singleflight import SingleFlight
+from lib.rpc_clients import get_async_web3, get_async_solana_client, get_async_tron
+from lib.rpc_router import rpc_router
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Cache saldo per (chain, wallet, rpc_url, token), valid selama block head belum menyentuh wallet
+BALANCE_CACHE_ENABLED = os.getenv("BALANCE_CACHE_ENABLED", "true").lower() == "true"
+BALANCE_CACHE_MAX = int(os.getenv("BALANCE_CACHE_MAX", "10000"))
+# 🔹 Batas umur entry (detik), jaring pengaman untuk perubahan saldo yang tidak terlihat
+#    dari tx/log (mis. transfer native internal dari kontrak)
+BALANCE_CACHE_MAX_AGE = float(os.getenv("BALANCE_CACHE_MAX_AGE", "60"))
+# 🔹 Tracker head berhenti kalau chain/RPC-nya tidak dibaca selama ini (detik)
+BALANCE_HEAD_IDLE = float(os.getenv("BALANCE_HEAD_IDLE", "120"))
+# 🔹 Maksimal head tracker jalan bersamaan, tracker paling lama tidak dipakai dihentikan duluan
+BALANCE_HEAD_TRACKERS_MAX = int(os.getenv("BALANCE_HEAD_TRACKERS_MAX", "16"))
+# 🔹 Lompatan block lebih dari ini → semua entry chain itu dianggap basi (tidak di-scan)
+BALANCE_HEAD_MAX_GAP = int(os.getenv("BALANCE_HEAD_MAX_GAP", "20"))
+# 🔹 Maksimal wallet per filter topic eth_getLogs (Transfer dari/ke wallet yang di-cache)
+BALANCE_HEAD_TOPICS_PER_CALL = int(os.getenv("BALANCE_HEAD_TOPICS_PER_CALL", "200"))
+
+# interval poll head (detik) per chain, override: BALANCE_HEAD_POLL_ETH, dll
+HEAD_POLL_INTERVAL = {"eth": 2.0, "bsc": 1.0, "bnb": 1.0, "base": 1.0, "sol": 0.4, "trx": 1.0}
+
+TRANSFER_TOPIC = Web3.to_hex(Web3.keccak(text="Transfer(address,address,uint256)"))
+
+# epoch unik lintas tracker, supaya entry dari tracker yang sudah dibuang tidak cocok dengan tracker baru
+_epochs = itertools.count(1)
+
+
+def _poll_interval(chain: str) -> float:
+    return float(os.getenv(f"BALANCE_HEAD_POLL_{chain.upper()}", HEAD_POLL_INTERVAL.get(chain, 1.0)))
+
+
+class HeadTracker(ABC):
+    """
+    Poll head (block / slot) satu (chain, rpc_url) di background.
+    head=None berarti head belum/tidak diketahui → cache di-bypass.
+    epoch berganti setiap kali tracker kehilangan jejak (error RPC, lompatan block),
+    entry dari epoch lama otomatis tidak valid.
+    """
+
+    # tracker yang tahu wallet mana yang disentuh tiap block
+    tracks_touches = False
+
+    def __init__(self, chain: str, rpc_url: str, on_idle=None):
+        self.chain = chain
+        self.rpc_url = rpc_url
+        self.interval = _poll_interval(chain)
+        self.head = None
+        self.epoch = next(_epochs)
+        self.touched = {}  # wallet -> (block terakhir yang menyentuh, waktu dicatat)
+        self.watched = {}  # wallet -> waktu terakhir di-cache
+        self.last_used = time.monotonic()
+        self.on_idle = on_idle  # dipanggil saat tracker berhenti karena idle
+        self._task = None
+        self._priming = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _lose_track(self):
+        self.head = None
+        self.epoch = next(_epochs)
+        self.touched.clear()
+
+    async def ensure_head(self):
+        """
+        Head sekarang, dibaca langsung sekali kalau poll pertama belum selesai
+        (supaya read pertama sudah bisa di-cache). None kalau gagal.
+        """
+        if self.head is not None:
+            return self.head
+        if self._priming is None:
+            self._priming = asyncio.ensure_future(self.latest())
+        priming = self._priming
+        try:
+            latest = await asyncio.shield(priming)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return None
+        finally:
+            if self._priming is priming and priming.done():
+                self._priming = None
+        # poll mungkin sudah jalan duluan, head yang sudah ada tidak ditimpa
+        if self.head is None:
+            self.head = latest
+        return self.head
+
+    async def _loop(self):
+        logger.info(f"⛓️ Head tracker {self.chain} → {self.rpc_url} jalan tiap {self.interval}s")
+        while time.monotonic() - self.last_used < BALANCE_HEAD_IDLE:
+            try:
+                await self.poll()
+            except Exception as e:
+                if self.head is not None:
+                    logger.warning(f"⚠️ Head tracker {self.chain} → {self.rpc_url} gagal: {e}")
+                self._lose_track()
+            self._prune()
+            await asyncio.sleep(self.interval)
+        logger.info(f"⛓️ Head tracker {self.chain} → {self.rpc_url} berhenti (idle)")
+        self._lose_track()
+        if self.on_idle is not None:
+            self.on_idle(self)
+
+    def _prune(self):
+        # entry yang lebih tua dari BALANCE_CACHE_MAX_AGE sudah pasti basi, touch-nya tidak perlu diingat
+        cutoff = time.monotonic() - BALANCE_CACHE_MAX_AGE
+        for wallet in [w for w, (_, at) in self.touched.items() if at < cutoff]:
+            del self.touched[wallet]
+        for wallet in [w for w, at in self.watched.items() if at < cutoff]:
+            del self.watched[wallet]
+
+    def watch(self, wallet: str):
+        self.watched[wallet] = time.monotonic()
+
+    def touched_since(self, wallet: str, block: int) -> bool:
+        touched = self.touched.get(wallet)
+        return touched is not None and touched[0] > block
+
+    async def poll(self):
+        self.head = await self.latest()
+
+    @abstractmethod
+    async def latest(self) -> int:
+        """Nomor block / slot terbaru di rpc_url"""
+
+
+class EvmHeadTracker(HeadTracker):
+    """
+    Head EVM + wallet yang disentuh tiap block baru:
+    from/to semua tx (saldo native & gas) dan log Transfer ERC20 dari/ke wallet yang di-cache.
+    Touch dicatat dulu sebelum head maju, jadi reader tidak pernah lihat head baru tanpa touch-nya.
+    """
+
+    tracks_touches = True
+
+    def _w3(self):
+        return get_async_web3(self.chain, self.rpc_url)
+
+    async def latest(self) -> int:
+        return await self._w3().eth.block_number
+
+    async def poll(self):
+        latest = await self.latest()
+        if self.head is None:
+            self.head = latest
+            return
+        if latest <= self.head:
+            return
+        if latest - self.head > BALANCE_HEAD_MAX_GAP:
+            logger.warning(f"⚠️ Head {self.chain} lompat {latest - self.head} block, cache direset")
+            self._lose_track()
+            self.head = latest
+            return
+
+        w3 = self._w3()
+        numbers = range(self.head + 1, latest + 1)
+        blocks = await asyncio.gather(
+            *(w3.eth.get_block(n, full_transactions=True) for n in numbers)
+        )
+        now = time.monotonic()
+        for block in blocks:
+            for tx in block["transactions"]:
+                for field in ("from", "to"):
+                    if tx.get(field):
+                        self.touched[tx[field].lower()] = (block["number"], now)
+
+        if self.watched:
+            topics = ["0x" + "0" * 24 + wallet[2:] for wallet in self.watched]
+            chunks = [
+                topics[i : i + BALANCE_HEAD_TOPICS_PER_CALL]
+                for i in range(0, len(topics), BALANCE_HEAD_TOPICS_PER_CALL)
+            ]
+            log_sets = await asyncio.gather(
+                *(
+                    w3.eth.get_logs(
+                        {"fromBlock": numbers[0], "toBlock": latest, "topics": topic_filter}
+                    )
+                    for chunk in chunks
+                    for topic_filter in ([TRANSFER_TOPIC, chunk], [TRANSFER_TOPIC, None, chunk])
+                )
+            )
+            for log in (log for logs in log_sets for log in logs):
+                for topic in log["topics"][1:3]:
+                    wallet = "0x" + bytes(topic)[-20:].hex()
+                    if wallet in self.watched:
+                        self.touched[wallet] = (log["blockNumber"], now)
+
+        self.head = latest
+
+
+class SolanaHeadTracker(HeadTracker):
+    """Slot Solana. Tanpa scan akun per slot: entry cuma valid di slot yang sama."""
+
+    async def latest(self) -> int:
+        return (await get_async_solana_client(self.rpc_url).get_slot()).value
+
+
+class TronHeadTracker(HeadTracker):
+    """Block Tron. Tanpa scan tx per block: entry cuma valid di block yang sama."""
+
+    async def latest(self) -> int:
+        return await get_async_tron(self.rpc_url).get_latest_block_number()
+
+
+HEAD_TRACKERS = {
+    "eth": EvmHeadTracker,
+    "bsc": EvmHeadTracker,
+    "bnb": EvmHeadTracker,
+    "base": EvmHeadTracker,
+    "sol": SolanaHeadTracker,
+    "trx": TronHeadTracker,
+}
+
+
+class BalanceCache:
+    """
+    Cache saldo di depan balance_checker. Key = (chain, wallet, rpc_url, token).
+    Entry ditandai block/slot head saat dibaca dan tetap dipakai sampai:
+    - head tracker melihat block baru yang menyentuh wallet (EVM), atau head berganti (SOL/TRX)
+    - tracker kehilangan jejak (epoch berubah) atau umur entry lewat BALANCE_CACHE_MAX_AGE
+    Selama head belum diketahui, cache di-bypass (baca langsung ke RPC).
+    """
+
+    def __init__(self, max_size: int = BALANCE_CACHE_MAX, max_age: float = BALANCE_CACHE_MAX_AGE):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._entries = OrderedDict()  # key -> (balance, block, epoch, stored_at)
+        self._trackers = OrderedDict()  # (chain, rpc_url) -> HeadTracker, urut terakhir dipakai
+        self._flight = SingleFlight("balance")
+        self.hits = 0
+        self.misses = 0
+
+    def tracker(self, chain: str, rpc_url: str):
+        """
+        Tracker head untuk endpoint dari env (rpc_router) saja. RPC URL kiriman user tidak
+        dapat tracker (cache di-bypass), jadi request user tidak bisa bikin poller ke host sembarang.
+        """
+        cls = HEAD_TRACKERS.get(chain)
+        if cls is None or not rpc_url or not rpc_router.configured(chain, rpc_url):
+            return None
+        key = (chain, rpc_url)
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            while len(self._trackers) >= BALANCE_HEAD_TRACKERS_MAX:
+                _, evicted = self._trackers.popitem(last=False)
+                evicted.on_idle = None
+                asyncio.ensure_future(evicted.stop())
+            tracker = self._trackers[key] = cls(chain, rpc_url, on_idle=self._drop_tracker)
+        self._trackers.move_to_end(key)
+        tracker.last_used = time.monotonic()
+        tracker.start()
+        return tracker
+
+    def _drop_tracker(self, tracker: HeadTracker):
+        """Tracker yang berhenti karena idle dibuang dari map (entry-nya ikut basi lewat epoch)"""
+        key = (tracker.chain, tracker.rpc_url)
+        if self._trackers.get(key) is tracker:
+            del self._trackers[key]
+
+    @staticmethod
+    def _wallet(tracker: HeadTracker, wallet: str) -> str:
+        return wallet.lower() if isinstance(tracker, EvmHeadTracker) else wallet
+
+    def get(self, key: tuple):
+        """Saldo dari cache, None kalau tidak ada / sudah tidak valid"""
+        chain, wallet, rpc_url, _ = key
+        tracker = self.tracker(chain, rpc_url)
+        entry = self._entries.get(key)
+        if entry is None or tracker is None or tracker.head is None:
+            return None
+        balance, block, epoch, stored_at = entry
+        valid = epoch == tracker.epoch and time.monotonic() - stored_at <= self.max_age
+        if valid and tracker.tracks_touches:
+            valid = not tracker.touched_since(self._wallet(tracker, wallet), block)
+        elif valid:
+            valid = block == tracker.head
+        if not valid:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return balance
+
+    async def _tag(self, key: tuple):
+        """(block, epoch) head saat read dimulai, None kalau head tidak diketahui"""
+        tracker = self.tracker(key[0], key[2])
+        if tracker is None or await tracker.ensure_head() is None:
+            return None
+        # watch sebelum read, supaya Transfer di block berikutnya tidak lolos saat read masih jalan
+        tracker.watch(self._wallet(tracker, key[1]))
+        return tracker.head, tracker.epoch
+
+    def put(self, key: tuple, balance: float, tag: tuple):
+        if tag is None:
+            return
+        chain, wallet, rpc_url, _ = key
+        tracker = self._trackers.get((chain, rpc_url))
+        if tracker is None or tracker.epoch != tag[1]:
+            return
+        tracker.watch(self._wallet(tracker, wallet))
+        self._entries[key] = (balance, tag[0], tag[1], time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def fetch(self, key: tuple, loader):
+        """Satu saldo: cache dulu, kalau miss loader(key) dipanggil (digabung single-flight per block)"""
+        if not BALANCE_CACHE_ENABLED:
+            return await loader(key)
+        balance = self.get(key)
+        if balance is not None:
+            self.hits += 1
+            return balance
+        self.misses += 1
+        tag = await self._tag(key)
+        balance = await self._flight.do((key, tag), loader, key)
+        self.put(key, balance, tag)
+        return balance
+
+    async def fetch_many(self, keys: list, loader_many) -> dict:
+        """
+        Banyak saldo: yang valid di cache langsung dibalikin, sisanya ke loader_many(keys)
+        yang return dict key -> (balance, error). Hanya hasil sukses yang disimpan.
+        """
+        if not BALANCE_CACHE_ENABLED:
+            return await loader_many(keys)
+        results = {}
+        missing = []
+        for key in keys:
+            balance = self.get(key)
+            if balance is not None:
+                results[key] = (balance, None)
+            else:
+                missing.append(key)
+        self.hits += len(results)
+        self.misses += len(missing)
+        if missing:
+            tags = dict(zip(missing, await asyncio.gather(*(self._tag(key) for key in missing))))
+            fetched = await loader_many(missing)
+            for key, (balance, error) in fetched.items():
+                if error is None:
+                    self.put(key, balance, tags[key])
+            results.update(fetched)
+        return results
+
+    async def aclose(self):
+        trackers = list(self._trackers.values())
+        self._trackers.clear()
+        self._entries.clear()
+        await asyncio.gather(*(tracker.stop() for tracker in trackers))
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "trackers": sum(1 for tracker in self._trackers.values() if tracker.running),
+        }
+
+
+# 🔹 Cache global, dipakai balance_checker
+balance_cache = BalanceCache()
+
+
+async def close_balance_cache():
+    """Stop semua head tracker, dipanggil dari lifespan main.py"""
+    await balance_cache.aclose()
+    logger.info("🛑 Balance cache & head tracker dihentikan")
@@ -1,74 +1,278 @@
 # 📍 lib/balance_checker.py
+import os
+import asyncio
 import logging
 from web3 import Web3
-from tronpy import Tron
-from tronpy.providers import HTTPProvider
-from solana.rpc.api import Client
 from solders.pubkey import Pubkey
-import asyncio
+from solana.rpc.types import TokenAccountOpts
+from lib.rpc_clients import get_async_web3, get_async_solana_client, get_async_tron
+from lib.multicall import read_balances
+from lib.solana_accounts import read_sol_balances
+from lib.balance_cache import balance_cache
+from lib.token_registry import token_registry
 
 logger = logging.getLogger(__name__)
 
+# Semua call di sini pakai client async (AsyncWeb3 / AsyncClient / AsyncTron),
+# jadi request saldo tidak pernah nge-block event loop uvicorn.
 
-# ===================== ETH / BSC / BNB =====================
-def get_eth_bsc_balance(rpc_url: str, wallet: str) -> float:
+# 🔹 Maksimal request saldo paralel per chain (bulk), override per chain: BALANCE_CONCURRENCY_ETH, dll
+BALANCE_CHAIN_CONCURRENCY = int(os.getenv("BALANCE_CHAIN_CONCURRENCY", "16"))
+# 🔹 Bulk EVM pakai Multicall3 (matikan untuk chain/devnet tanpa kontrak Multicall3)
+MULTICALL_ENABLED = os.getenv("MULTICALL_ENABLED", "true").lower() == "true"
+# 🔹 Bulk Solana pakai getMultipleAccounts + batch getTokenAccountsByOwner (100 per call)
+SOL_MULTIPLE_ACCOUNTS_ENABLED = os.getenv("SOL_MULTIPLE_ACCOUNTS_ENABLED", "true").lower() == "true"
+
+EVM_CHAINS = ["eth", "bsc", "bnb"]
+SUPPORTED_CHAINS = EVM_CHAINS + ["sol", "trx"]
+
+# ERC20 minimal ABI (read only)
+ERC20_ABI = [
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "decimals",
+        "outputs": [{"name": "", "type": "uint8"}],
+        "type": "function",
+    },
+    {
+        "constant": True,
+        "inputs": [{"name": "_owner", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "type": "function",
+    },
+]
+
+
+def normalize_chain(chain: str) -> str:
+    """Nama chain huruf kecil, ValueError kalau chain tidak didukung"""
+    normalized = (chain or "").strip().lower()
+    if normalized not in SUPPORTED_CHAINS:
+        raise ValueError(f"Chain {chain} tidak didukung")
+    return normalized
+
+
+def _require_rpc(rpc_url: str):
     if not rpc_url:
-        logger.error("❌ RPC tidak diberikan")
-        return 0.0
+        raise ValueError("RPC tidak diberikan")
+
+
+# ===================== ETH / BSC / BNB =====================
+async def get_eth_bsc_balance(rpc_url: str, wallet: str, chain: str = "eth") -> float:
+    _require_rpc(rpc_url)
+    w3 = get_async_web3(chain, rpc_url)
+    balance_wei = await w3.eth.get_balance(Web3.to_checksum_address(wallet))
+    balance = float(Web3.from_wei(balance_wei, "ether"))
+    logger.info(f"💰 Balance untuk {wallet}: {balance}")
+    return balance
+
+
+async def get_erc20_balance(rpc_url: str, wallet: str, token: str, chain: str = "eth") -> float:
+    _require_rpc(rpc_url)
+    w3 = get_async_web3(chain, rpc_url)
+    contract = w3.eth.contract(address=Web3.to_checksum_address(token), abi=ERC20_ABI)
+    known = token_registry.find(chain, token)
+    if known is not None:
+        # token dikenal: decimals dari registry, cuma balanceOf yang ke RPC
+        token_registry.ensure_verified(known, contract.functions.decimals().call)
+        raw = await contract.functions.balanceOf(Web3.to_checksum_address(wallet)).call()
+        decimals = known.decimals
+    else:
+        raw, decimals = await asyncio.gather(
+            contract.functions.balanceOf(Web3.to_checksum_address(wallet)).call(),
+            contract.functions.decimals().call(),
+        )
+    balance = raw / (10**decimals)
+    logger.info(f"💰 Token {token} untuk {wallet}: {balance}")
+    return balance
+
+
+# ===================== SOLANA =====================
+async def get_solana_balance(rpc_url: str, wallet: str) -> float:
+    _require_rpc(rpc_url)
+    client = get_async_solana_client(rpc_url)
+    resp = await client.get_balance(Pubkey.from_string(wallet))
+    sol = resp.value / 1_000_000_000
+    logger.info(f"💰 SOL balance untuk {wallet}: {sol}")
+    return sol
+
+
+async def get_spl_balance(rpc_url: str, wallet: str, mint: str) -> float:
+    _require_rpc(rpc_url)
+    client = get_async_solana_client(rpc_url)
+    resp = await client.get_token_accounts_by_owner_json_parsed(
+        Pubkey.from_string(wallet), TokenAccountOpts(mint=Pubkey.from_string(mint))
+    )
+    # wallet bisa punya lebih dari satu token account untuk mint yang sama
+    balance = sum(
+        float(acc.account.data.parsed["info"]["tokenAmount"]["uiAmountString"])
+        for acc in resp.value
+    )
+    logger.info(f"💰 SPL {mint} untuk {wallet}: {balance}")
+    return balance
+
+
+# ===================== TRON =====================
+async def get_trx_balance(node_url: str, wallet: str) -> float:
+    _require_rpc(node_url)
+    client = get_async_tron(node_url)
+    # AsyncTron sudah balikin saldo dalam TRX (Decimal)
+    balance_trx = float(await client.get_account_balance(wallet))
+    logger.info(f"💰 TRX balance untuk {wallet}: {balance_trx}")
+    return balance_trx
+
+
+async def get_trc20_balance(node_url: str, wallet: str, token: str) -> float:
+    _require_rpc(node_url)
+    client = get_async_tron(node_url)
+    contract = await client.get_contract(token)
+    known = token_registry.find("trx", token)
+    if known is not None:
+        async def fetch_decimals():
+            return await contract.functions.decimals()
+
+        token_registry.ensure_verified(known, fetch_decimals)
+        raw = await contract.functions.balanceOf(wallet)
+        decimals = known.decimals
+    else:
+        raw, decimals = await asyncio.gather(
+            contract.functions.balanceOf(wallet), contract.functions.decimals()
+        )
+    balance = raw / (10**decimals)
+    logger.info(f"💰 TRC20 {token} untuk {wallet}: {balance}")
+    return balance
+
+
+# ===================== WRAPPER =====================
+async def _read_balance(key: tuple) -> float:
+    """Baca saldo langsung ke RPC, tanpa cache"""
+    chain, wallet, rpc_url, token = key
+    if chain in EVM_CHAINS:
+        if token:
+            return await get_erc20_balance(rpc_url, wallet, token, chain)
+        return await get_eth_bsc_balance(rpc_url, wallet, chain)
+    elif chain == "sol":
+        if token:
+            return await get_spl_balance(rpc_url, wallet, token)
+        return await get_solana_balance(rpc_url, wallet)
+    elif chain == "trx":
+        if token:
+            return await get_trc20_balance(rpc_url, wallet, token)
+        return await get_trx_balance(rpc_url, wallet)
+    raise ValueError(f"Chain {chain} tidak didukung")
+
+
+async def fetch_balance(chain: str, wallet: str, rpc_url: str, token: str = None) -> float:
+    """
+    Ambil saldo native (token=None) atau token (alamat contract / mint), lewat balance cache.
+    Error dilempar ke caller, dipakai bulk checker supaya error bisa dilaporkan per item.
+    """
+    return await balance_cache.fetch((normalize_chain(chain), wallet, rpc_url, token), _read_balance)
+
+
+async def check_balance(chain: str, wallet: str, rpc_url: str, token: str = None) -> float:
+    """Sama seperti fetch_balance, tapi error di-log dan dibalikin 0.0"""
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        balance_wei = w3.eth.get_balance(wallet)
-        balance = Web3.from_wei(balance_wei, "ether")
-        logger.info(f"💰 Balance untuk {wallet}: {balance}")
-        return float(balance)
+        return await fetch_balance(chain, wallet, rpc_url, token)
     except Exception as e:
-        logger.error(f"❌ Gagal cek wallet {wallet}: {e}")
+        logger.error(f"❌ Gagal cek saldo {chain} {wallet}: {e}")
         return 0.0
 
 
-# ===================== SOLANA =====================
-def get_solana_balance(rpc_url: str, wallet: str) -> float:
-    if not rpc_url:
-        logger.error("❌ RPC tidak diberikan")
-        return 0.0
+# ===================== BULK =====================
+_chain_limits = {}
+
+
+def _chain_limit(chain: str) -> asyncio.Semaphore:
+    """Semaphore per chain, cuma untuk chain yang didukung (nama chain dari user tidak bikin entry baru)"""
+    chain = normalize_chain(chain)
+    sem = _chain_limits.get(chain)
+    if sem is None:
+        limit = int(os.getenv(f"BALANCE_CONCURRENCY_{chain.upper()}", BALANCE_CHAIN_CONCURRENCY))
+        sem = _chain_limits[chain] = asyncio.Semaphore(limit)
+    return sem
+
+
+async def _multicall_group(chain: str, rpc_url: str, keys: list) -> dict:
+    """Semua item EVM di (chain, rpc_url) yang sama → Multicall3, fallback per item kalau gagal"""
     try:
-        client = Client(rpc_url)
-        pubkey = Pubkey.from_string(wallet)
-        resp = client.get_balance(pubkey)
-        lamports = resp.value
-        sol = lamports / 1_000_000_000
-        logger.info(f"💰 SOL balance untuk {wallet}: {sol}")
-        return sol
+        async with _chain_limit(chain):
+            fetched = await read_balances(
+                get_async_web3(chain, rpc_url), rpc_url, [(key[1], key[3]) for key in keys], chain
+            )
+        return dict(zip(keys, fetched))
     except Exception as e:
-        logger.error(f"❌ Gagal cek SOL wallet {wallet}: {e}", exc_info=True)
-        return 0.0
+        logger.warning(f"⚠️ Multicall {chain} gagal ({e}), fallback cek per wallet")
+        results = await asyncio.gather(*(_single(key) for key in keys))
+        return dict(zip(keys, results))
 
 
-# ===================== TRON =====================
-def get_trx_balance(node_url: str, wallet: str) -> float:
-    if not node_url:
-        logger.error("❌ Node URL tidak diberikan")
-        return 0.0
+async def _solana_group(rpc_url: str, keys: list) -> dict:
+    """Semua item Solana di rpc_url yang sama → read_sol_balances (batch), fallback per item kalau gagal"""
     try:
-        client = Tron(provider=HTTPProvider(node_url))
-        balance_sun = client.get_account_balance(wallet)
-        balance_trx = balance_sun / 1_000_000
-        logger.info(f"💰 TRX balance untuk {wallet}: {balance_trx}")
-        return balance_trx
+        async with _chain_limit("sol"):
+            fetched = await read_sol_balances(
+                get_async_solana_client(rpc_url), rpc_url, [(key[1], key[3]) for key in keys]
+            )
+        return dict(zip(keys, fetched))
     except Exception as e:
-        logger.error(f"❌ Gagal cek TRX wallet {wallet}: {e}")
-        return 0.0
+        logger.warning(f"⚠️ Bulk saldo Solana gagal ({e}), fallback cek per wallet")
+        results = await asyncio.gather(*(_single(key) for key in keys))
+        return dict(zip(keys, results))
 
 
-# ===================== WRAPPER =====================
-async def check_balance(chain: str, wallet: str, rpc_url: str) -> float:
-    chain = chain.lower()
-    if chain in ["eth", "bsc", "bnb"]:
-        return get_eth_bsc_balance(rpc_url, wallet)
-    elif chain == "sol":
-        return await asyncio.to_thread(get_solana_balance, rpc_url, wallet)
-    elif chain == "trx":
-        return get_trx_balance(rpc_url, wallet)
-    else:
-        logger.error(f"❌ Chain {chain} tidak didukung")
-        return 0.0
+async def _single(key: tuple):
+    try:
+        async with _chain_limit(key[0]):
+            return await _read_balance(key), None
+    except Exception as e:
+        return None, str(e) or type(e).__name__
+
+
+async def _read_balances(keys: list) -> dict:
+    """Baca banyak saldo langsung ke RPC (tanpa cache), return dict key -> (balance, error)"""
+    groups = {}
+    sol_groups = {}
+    jobs = []
+    for key in keys:
+        chain, _, rpc_url, _ = key
+        if MULTICALL_ENABLED and chain in EVM_CHAINS and rpc_url:
+            groups.setdefault((chain, rpc_url), []).append(key)
+        elif SOL_MULTIPLE_ACCOUNTS_ENABLED and chain == "sol" and rpc_url:
+            sol_groups.setdefault(rpc_url, []).append(key)
+        else:
+            jobs.append(key)
+
+    async def run_singles():
+        return dict(zip(jobs, await asyncio.gather(*(_single(key) for key in jobs))))
+
+    results = {}
+    for found in await asyncio.gather(
+        run_singles(),
+        *(_multicall_group(chain, rpc_url, group) for (chain, rpc_url), group in groups.items()),
+        *(_solana_group(rpc_url, group) for rpc_url, group in sol_groups.items()),
+    ):
+        results.update(found)
+    return results
+
+
+async def check_balances(items: list) -> list:
+    """
+    Cek banyak saldo sekaligus. items: list dict {chain, wallet, rpc_url, token?}.
+    - saldo yang masih valid di balance cache (block head belum menyentuh wallet) tidak ke RPC
+    - item EVM per (chain, rpc_url) digabung jadi Multicall3 aggregate3 (1 eth_call per 1000 saldo)
+    - item Solana per rpc_url digabung: getMultipleAccounts + batch getTokenAccountsByOwner
+    - chain lain jalan paralel dengan batas concurrency per chain
+    - item yang sama persis cuma di-fetch sekali
+    Return list (balance, error) urut sesuai items.
+    """
+    keys = [
+        ((item["chain"] or "").strip().lower(), item["wallet"], item.get("rpc_url"), item.get("token"))
+        for item in items
+    ]
+    # chain tidak dikenal langsung jadi error per item, tidak masuk cache / semaphore
+    valid = [key for key in dict.fromkeys(keys) if key[0] in SUPPORTED_CHAINS]
+    results = await balance_cache.fetch_many(valid, _read_balances) if valid else {}
+    unsupported = lambda key: (None, f"Chain {key[0]} tidak didukung")
+    return [results[key] if key in results else unsupported(key) for key in keys]
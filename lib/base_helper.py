@@ -1,7 +1,10 @@
 # 📍 lib/base_helper.py
+import asyncio
 import logging
 from web3 import Web3
 from eth_account import Account
+from lib.rpc_clients import get_web3, get_batch_web3
+from lib.nonce_manager import nonce_manager
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +12,7 @@ logger = logging.getLogger(__name__)
 def get_balance(address: str, rpc_url: str) -> float:
     """Cek saldo BASE (native) dari wallet tertentu menggunakan RPC dari endpoint"""
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        w3 = get_web3("base", rpc_url)
         if not w3.is_connected():
             raise Exception("BASE RPC tidak terkoneksi!")
         balance_wei = w3.eth.get_balance(Web3.to_checksum_address(address))
@@ -40,9 +43,7 @@ async def send_base(
             private_key = "0x" + private_key
         admin_account = Account.from_key(private_key)
 
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("BASE RPC tidak terkoneksi!")
+        w3 = get_batch_web3("base", rpc_url)
 
         sender_address = admin_account.address
 
@@ -51,24 +52,38 @@ async def send_base(
                 f"Destination sama dengan source! Transaksi dibatalkan: {destination_wallet}"
             )
 
-        sender_balance = get_balance(sender_address, rpc_url)
-        if sender_balance is None or sender_balance < amount_base:
+        # 3 call independen → satu JSON-RPC batch (satu round trip), nonce dari nonce_manager
+        balance_wei, gas_price, chain_id = await asyncio.gather(
+            w3.eth.get_balance(sender_address),
+            w3.eth.gas_price,
+            w3.eth.chain_id,
+        )
+        sender_balance = w3.from_wei(balance_wei, "ether")
+        logger.info(f"💰 Saldo {sender_address}: {sender_balance} BASE")
+        if sender_balance < amount_base:
             raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} BASE")
 
-        nonce = w3.eth.get_transaction_count(sender_address)
         value = w3.to_wei(amount_base, "ether")
 
-        tx = {
-            "nonce": nonce,
-            "to": Web3.to_checksum_address(destination_wallet),
-            "value": value,
-            "gas": 21000,
-            "gasPrice": w3.eth.gas_price,
-            "chainId": w3.eth.chain_id,
-        }
+        def sign(nonce: int):
+            tx = {
+                "nonce": nonce,
+                "to": Web3.to_checksum_address(destination_wallet),
+                "value": value,
+                "gas": 21000,
+                "gasPrice": gas_price,
+                "chainId": chain_id,
+            }
+            return w3.eth.account.sign_transaction(tx, private_key)
 
-        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = await nonce_manager.send(
+            chain_id,
+            sender_address,
+            lambda: w3.eth.get_transaction_count(sender_address, "pending"),
+            sign,
+            w3.eth.send_raw_transaction,
+            w3.eth.get_transaction,
+        )
         logger.info(
             f"✅ Kirim {amount_base} BASE ke {destination_wallet}, tx_hash: {tx_hash.hex()}"
         )
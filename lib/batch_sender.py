@@ -0,0 +1,413 @@
+# 📍 lib/batch_sender.py
+import os
+import math
+import asyncio
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from web3 import Web3
+from eth_account import Account
+from config import SOL_ACCOUNT, SOLANA_RPC_URL
+from lib.rpc_clients import get_batch_web3
+from lib.rpc_router import rpc_router, is_transport_error
+from lib.nonce_manager import nonce_manager, is_nonce_error, is_already_known, BroadcastUnknown, hex_hash
+from lib.native_sender import send_native
+from lib.send_jobs import resolve_token, TOKEN_SENDERS
+from lib.solana_helper import create_admin_keypair
+from lib.wallet_validator import validate_wallet
+from lib import disperse as disperse_lib
+from lib.disperse import DisperseUnavailable, send_erc20_batch
+from lib.solana_batch import send_sol_batch, send_spl_batch
+from lib.token_registry import token_registry
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Maksimal baris per request /send/batch
+BATCH_SEND_MAX_ROWS = int(os.getenv("BATCH_SEND_MAX_ROWS", "1000"))
+# 🔹 Broadcast paralel per grup (chain + wallet pengirim)
+BATCH_SEND_CONCURRENCY = int(os.getenv("BATCH_SEND_CONCURRENCY", "32"))
+# 🔹 Thread khusus broadcast USDT/USDC wallet service (client sync), terpisah dari default executor
+BATCH_SEND_THREADS = int(os.getenv("BATCH_SEND_THREADS", "8"))
+
+# gas transfer native EVM (tanpa data)
+NATIVE_TRANSFER_GAS = 21000
+EVM_NATIVE_CHAINS = {"eth", "bsc", "base"}
+
+_executor = ThreadPoolExecutor(max_workers=max(BATCH_SEND_THREADS, 1), thread_name_prefix="batch-send")
+
+
+class BatchValidationError(ValueError):
+    """Ada baris yang tidak valid, tidak ada satu pun yang dikirim"""
+
+    def __init__(self, errors: list):
+        super().__init__(f"{len(errors)} baris tidak valid")
+        self.errors = errors
+
+
+def _sender(chain: str, private_key: str) -> str:
+    if chain in EVM_NATIVE_CHAINS:
+        if not private_key.startswith("0x"):
+            private_key = "0x" + private_key
+        return Account.from_key(private_key).address
+    return str(create_admin_keypair(private_key).pubkey())
+
+
+def validate_rows(rows: list, private_key: str = None, private_keys: dict = None, allow_service: bool = False) -> dict:
+    """
+    Validasi semua baris sekaligus lalu kelompokkan per (chain, pengirim).
+    Native token dikirim dari private key request (private_keys[chain] atau private_key),
+    USDT/USDC dari wallet service (env), cuma kalau allow_service=True (pemanggil internal).
+    Raise BatchValidationError berisi semua error.
+    """
+    if not rows:
+        raise ValueError("Batch kosong")
+    if len(rows) > BATCH_SEND_MAX_ROWS:
+        raise ValueError(f"Maksimal {BATCH_SEND_MAX_ROWS} baris per batch")
+
+    private_keys = {k.lower(): v for k, v in (private_keys or {}).items()}
+    senders = {}  # chain → (address, private_key) atau error
+    groups = defaultdict(list)
+    errors = []
+
+    for index, row in enumerate(rows):
+        try:
+            token, chain = resolve_token(row["token"], row.get("chain"))
+            if not math.isfinite(row["amount"]) or row["amount"] <= 0:
+                raise ValueError("Amount harus angka lebih dari 0")
+            valid, _ = validate_wallet(chain, row["destination_wallet"])
+            if not valid:
+                raise ValueError(f"Wallet tujuan tidak valid untuk chain {chain}")
+
+            if token in TOKEN_SENDERS:
+                if not allow_service:
+                    raise ValueError(f"{token.upper()} dikirim dari wallet service, tidak bisa lewat API publik")
+                sender, key = "service", None
+            else:
+                if chain not in senders:
+                    key = private_keys.get(chain) or private_key
+                    try:
+                        if not key:
+                            raise ValueError(f"Private key untuk chain {chain} harus diberikan")
+                        senders[chain] = (_sender(chain, key), key)
+                    except Exception as e:
+                        senders[chain] = e
+                if isinstance(senders[chain], Exception):
+                    raise ValueError(f"Private key chain {chain} tidak valid: {senders[chain]}")
+                sender, key = senders[chain]
+                if row["destination_wallet"].lower() == sender.lower():
+                    raise ValueError("Destination sama dengan source")
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+
+        groups[(chain, token if sender == "service" else sender)].append(
+            {
+                "index": index,
+                "token": token,
+                "chain": chain,
+                "destination_wallet": row["destination_wallet"],
+                "amount": row["amount"],
+                "private_key": key,
+                "mode": "transfer",
+                "status": "pending",
+                "tx_hash": None,
+                "error": None,
+            }
+        )
+
+    if errors:
+        raise BatchValidationError(errors)
+    return groups
+
+
+def _done(row: dict, tx_hash=None, error=None, unknown: bool = False):
+    """unknown=True: broadcast error tanpa jawaban jelas, tx_hash lokal dilaporkan, jangan kirim ulang"""
+    if unknown:
+        row["status"] = "unknown"
+        row["tx_hash"] = tx_hash
+        row["error"] = error
+    elif tx_hash:
+        row["status"] = "sent"
+        row["tx_hash"] = tx_hash
+        row["error"] = None
+    else:
+        row["status"] = "failed"
+        row["error"] = error or "Transaksi gagal dijalankan"
+
+
+async def _send_evm_native(chain: str, rpc_url: str, rows: list):
+    """
+    Satu wallet, satu chain EVM: saldo + gas price + chain id sekali (satu JSON-RPC batch),
+    nonce dialokasikan sekaligus, tx ditandatangani lokal lalu di-broadcast paralel.
+    send_raw_transaction di tick yang sama ikut digabung jadi batch oleh get_batch_web3.
+    """
+    private_key = rows[0]["private_key"]
+    if not private_key.startswith("0x"):
+        private_key = "0x" + private_key
+    account = Account.from_key(private_key)
+    address = account.address
+    w3 = get_batch_web3(chain, rpc_url)
+
+    balance_wei, gas_price, chain_id = await asyncio.gather(
+        w3.eth.get_balance(address),
+        w3.eth.gas_price,
+        w3.eth.chain_id,
+    )
+    values = [Web3.to_wei(row["amount"], "ether") for row in rows]
+    needed = sum(values) + gas_price * NATIVE_TRANSFER_GAS * len(rows)
+    if balance_wei < needed:
+        error = (
+            f"Saldo tidak cukup untuk batch: butuh {Web3.from_wei(needed, 'ether')}, "
+            f"saldo {Web3.from_wei(balance_wei, 'ether')}"
+        )
+        for row in rows:
+            _done(row, error=error)
+        return
+
+    fetch_pending = lambda: w3.eth.get_transaction_count(address, "pending")
+    nonces = await nonce_manager.reserve(chain_id, address, fetch_pending, len(rows), w3.eth.get_transaction)
+    to_address = {row["index"]: Web3.to_checksum_address(row["destination_wallet"]) for row in rows}
+    semaphore = asyncio.Semaphore(BATCH_SEND_CONCURRENCY)
+
+    def sign(row: dict, value: int, nonce: int):
+        tx = {
+            "nonce": nonce,
+            "to": to_address[row["index"]],
+            "value": value,
+            "gas": NATIVE_TRANSFER_GAS,
+            "gasPrice": gas_price,
+            "chainId": chain_id,
+        }
+        return account.sign_transaction(tx)
+
+    async def push(signed):
+        try:
+            await w3.eth.send_raw_transaction(signed.raw_transaction)
+        except Exception as e:
+            if not is_already_known(e):
+                raise
+
+    async def broadcast(row: dict, value: int, nonce: int):
+        async with semaphore:
+            try:
+                signed = sign(row, value, nonce)
+            except Exception as e:
+                nonce_manager.release(chain_id, address, nonce)
+                _done(row, error=str(e))
+                return
+            try:
+                await push(signed)
+            except Exception as e:
+                if is_nonce_error(e):
+                    # ditolak node sebelum masuk mempool → nonce bebas, baris dikirim ulang di bawah
+                    nonce_manager.release(chain_id, address, nonce, resync=True)
+                    row["nonce_rejected"] = True
+                    _done(row, error=str(e))
+                    return
+                if not is_transport_error(e):
+                    # node jelas menolak (saldo, gas, underpriced, ...) → gagal biasa, nonce bebas lagi
+                    nonce_manager.release(chain_id, address, nonce, resync=True)
+                    _done(row, error=str(e))
+                    return
+                # error transport, status tidak jelas: broadcast ulang byte yang sama (hash sama, tidak bisa
+                # bayar dobel). Error apa pun di percobaan kedua tetap unknown: tx pertama bisa sudah masuk
+                # (mis. "nonce too low" karena tx itu sendiri sudah di-mine)
+                try:
+                    await push(signed)
+                except Exception as again:
+                    nonce_manager.mark_sent(chain_id, address, nonce, signed.hash, unknown=True)
+                    logger.warning(f"⚠️ Broadcast {signed.hash.hex()} nonce {nonce} tidak jelas: {again}")
+                    _done(row, signed.hash.hex(), f"Status broadcast tidak jelas, cek tx_hash sebelum kirim ulang: {again}", unknown=True)
+                    return
+            nonce_manager.mark_sent(chain_id, address, nonce, signed.hash)
+            _done(row, signed.hash.hex())
+
+    await asyncio.gather(*(broadcast(r, v, n) for r, v, n in zip(rows, values, nonces)))
+
+    # cuma baris yang ditolak karena nonce (pasti tidak masuk mempool) yang dikirim ulang dengan nonce baru;
+    # baris unknown tidak pernah di-sign ulang
+    failed = [(row, value) for row, value in zip(rows, values) if row.pop("nonce_rejected", False)]
+    if failed:
+        logger.warning(f"⚠️ Batch {chain} {address}: {len(failed)} tx ditolak karena nonce, kirim ulang sekali")
+
+    async def retry(row: dict, value: int):
+        async with semaphore:
+            try:
+                tx_hash = await nonce_manager.send(
+                    chain_id,
+                    address,
+                    fetch_pending,
+                    lambda nonce: sign(row, value, nonce),
+                    w3.eth.send_raw_transaction,
+                    w3.eth.get_transaction,
+                )
+            except BroadcastUnknown as e:
+                _done(row, hex_hash(e.tx_hash), str(e), unknown=True)
+                return
+            except Exception as e:
+                _done(row, error=str(e))
+                return
+            _done(row, tx_hash.hex())
+
+    await asyncio.gather(*(retry(row, value) for row, value in failed))
+
+
+async def _send_each(rows: list, rpc_url: str):
+    """
+    Chain tanpa jalur batch khusus: helper per baris, paralel dibatasi semaphore.
+    USDT/USDC cuma di-broadcast (tanpa nunggu receipt) di executor BATCH_SEND_THREADS sendiri.
+    """
+    semaphore = asyncio.Semaphore(BATCH_SEND_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+
+    async def send(row: dict):
+        async with semaphore:
+            try:
+                if row["token"] in TOKEN_SENDERS:
+                    broadcaster = TOKEN_SENDERS[row["token"]]
+                    tx_hash = await loop.run_in_executor(
+                        _executor, broadcaster, row["destination_wallet"], row["amount"], row["chain"]
+                    )
+                else:
+                    tx_hash = await send_native(
+                        row["token"],
+                        row["destination_wallet"],
+                        row["amount"],
+                        rpc_url=rpc_url,
+                        private_key=row["private_key"],
+                    )
+            except BroadcastUnknown as e:
+                _done(row, hex_hash(e.tx_hash), str(e), unknown=True)
+                return
+            except Exception as e:
+                _done(row, error=str(e))
+                return
+            _done(row, str(tx_hash) if tx_hash else None)
+
+    await asyncio.gather(*(send(row) for row in rows))
+
+
+def _apply(rows: list, results: list):
+    """Hasil solana_batch: signature + error sekaligus = status tidak jelas (unknown)"""
+    for row, (signature, error) in zip(rows, results):
+        _done(row, signature, error, unknown=bool(signature and error))
+
+
+async def _send_solana(token: str, rpc_url: str, rows: list):
+    """
+    SOL native (private key request) & USDT/USDC SPL (wallet service): banyak transfer per tx,
+    satu blockhash, ATA tujuan dibuat di tx yang sama. Token SPL tanpa config → helper satu per satu.
+    """
+    payouts = [(row["destination_wallet"], row["amount"]) for row in rows]
+    if token == "sol":
+        for row in rows:
+            row["mode"] = "batch"
+        _apply(rows, await send_sol_batch(rpc_url, create_admin_keypair(rows[0]["private_key"]), payouts))
+        return
+    deployment = token_registry.get("sol", token)
+    if SOL_ACCOUNT is None or not SOLANA_RPC_URL or deployment is None:
+        await _send_each(rows, None)
+        return
+    for row in rows:
+        row["mode"] = "batch"
+    _apply(rows, await send_spl_batch(SOLANA_RPC_URL, SOL_ACCOUNT, deployment.address, payouts))
+
+
+async def _send_disperse(token: str, chain: str, rows: list):
+    """
+    USDT/USDC ETH/BSC/Base: satu tx disperseToken per DISPERSE_MAX_RECIPIENTS penerima.
+    Disperse tidak bisa dipakai (kontrak tidak ada, estimate gagal, revert) → transfer satu per satu.
+    Status tx disperse tidak diketahui (timeout receipt) → unknown dengan tx_hash, tanpa kirim ulang,
+    supaya tidak bayar dobel.
+    """
+    size = disperse_lib.DISPERSE_MAX_RECIPIENTS
+    for start in range(0, len(rows), size):
+        chunk = rows[start:start + size]
+        try:
+            result = await send_erc20_batch(
+                token, chain, [(row["destination_wallet"], row["amount"]) for row in chunk]
+            )
+        except DisperseUnavailable as e:
+            logger.warning(f"⚠️ Disperse {token.upper()} {chain} tidak bisa dipakai ({e}), fallback transfer satu per satu")
+            await _send_each(chunk, None)
+            continue
+        except BroadcastUnknown as e:
+            logger.error(f"❌ Disperse {token.upper()} {chain} status tidak diketahui: {e}")
+            for row in chunk:
+                row["mode"] = "disperse"
+                _done(row, hex_hash(e.tx_hash), f"Status tx disperse tidak diketahui, cek tx_hash sebelum kirim ulang: {e}", unknown=True)
+            continue
+        except Exception as e:
+            logger.error(f"❌ Disperse {token.upper()} {chain} status tidak diketahui: {e}", exc_info=True)
+            for row in chunk:
+                row["mode"] = "disperse"
+                _done(row, error=f"Status tx disperse tidak diketahui, cek manual sebelum kirim ulang: {e}")
+            continue
+        for row in chunk:
+            row["mode"] = "disperse"
+            _done(row, result["tx_hash"])
+
+
+async def send_batch(
+    rows: list,
+    private_key: str = None,
+    private_keys: dict = None,
+    rpc_urls: dict = None,
+    disperse: bool = None,
+    allow_service: bool = False,
+) -> list:
+    """
+    Kirim banyak payout sekaligus. rows: [{token, chain, destination_wallet, amount}].
+    Return hasil per baris sesuai urutan input (status sent / unknown / failed, tx_hash, error).
+    Tiap grup (chain + pengirim) jalan paralel; tx yang sudah di-broadcast tidak pernah
+    dikirim ulang ke endpoint lain, jadi endpoint dipilih sekali per chain.
+    disperse: USDT/USDC EVM lewat kontrak disperse (None = ikut DISPERSE_ENABLED)
+    allow_service: izinkan baris USDT/USDC dari wallet service (pemanggil internal saja)
+    """
+    groups = validate_rows(rows, private_key, private_keys, allow_service)
+    use_disperse = disperse_lib.DISPERSE_ENABLED if disperse is None else disperse
+    rpc_urls = {k.lower(): v for k, v in (rpc_urls or {}).items()}
+    logger.info(f"📦 Batch {len(rows)} payout, {len(groups)} grup (chain + pengirim)")
+
+    async def run(chain: str, group: list):
+        try:
+            token = group[0]["token"]
+            if token in TOKEN_SENDERS:
+                # USDT/USDC pakai RPC & wallet dari env
+                if chain == "sol":
+                    await _send_solana(token, None, group)
+                elif (
+                    use_disperse
+                    and disperse_lib.supports(token, chain)
+                    and len(group) >= disperse_lib.DISPERSE_MIN_RECIPIENTS
+                ):
+                    await _send_disperse(token, chain, group)
+                else:
+                    await _send_each(group, None)
+                return
+            rpc_url = rpc_urls.get(chain) or rpc_router.pick(chain)
+            if chain in EVM_NATIVE_CHAINS:
+                await _send_evm_native(chain, rpc_url, group)
+            elif chain == "sol":
+                await _send_solana(token, rpc_url, group)
+            else:
+                await _send_each(group, rpc_url)
+        except Exception as e:
+            logger.error(f"❌ Batch grup {chain} gagal: {e}", exc_info=True)
+            for row in group:
+                if row["status"] == "pending":
+                    _done(row, error=str(e))
+
+    await asyncio.gather(*(run(chain, group) for (chain, _), group in groups.items()))
+
+    results = sorted((row for group in groups.values() for row in group), key=lambda row: row["index"])
+    for row in results:
+        row.pop("private_key", None)
+    sent = sum(1 for row in results if row["status"] == "sent")
+    logger.info(f"✅ Batch selesai: {sent}/{len(results)} terkirim")
+    return results
+
+
+def stop_batch_sender():
+    _executor.shutdown(wait=False, cancel_futures=True)
+    logger.info("🛑 Executor batch sender dihentikan")
@@ -1,7 +1,10 @@
 # 📍 lib/bnb_helper.py
+import asyncio
 import logging
 from web3 import Web3
 from eth_account import Account
+from lib.rpc_clients import get_web3, get_batch_web3
+from lib.nonce_manager import nonce_manager
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +12,7 @@ logger = logging.getLogger(__name__)
 def get_balance(address: str, rpc_url: str) -> float:
     """Cek saldo BNB dari wallet tertentu, user input RPC URL"""
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        w3 = get_web3("bsc", rpc_url)
         if not w3.is_connected():
             raise Exception("BSC RPC tidak terkoneksi!")
         balance_wei = w3.eth.get_balance(Web3.to_checksum_address(address))
@@ -36,20 +39,23 @@ async def send_bnb(
             private_key = "0x" + private_key
         admin_account = Account.from_key(private_key)
 
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("BSC RPC tidak terkoneksi!")
+        w3 = get_batch_web3("bsc", rpc_url)
 
         sender_address = admin_account.address
 
         if destination_wallet.lower() == sender_address.lower():
             raise Exception("Destination sama dengan source! Transaksi dibatalkan")
 
-        sender_balance = get_balance(sender_address, rpc_url)
-        if sender_balance is None or sender_balance < amount_bnb:
+        # saldo & gas price independen → satu JSON-RPC batch (satu round trip), nonce dari nonce_manager
+        balance_wei, gas_price = await asyncio.gather(
+            w3.eth.get_balance(sender_address),
+            w3.eth.gas_price,
+        )
+        sender_balance = float(w3.from_wei(balance_wei, "ether"))
+        logger.info(f"💰 Saldo {sender_address}: {sender_balance} BNB")
+        if sender_balance < amount_bnb:
             raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} BNB")
 
-        nonce = w3.eth.get_transaction_count(sender_address)
         value = w3.to_wei(amount_bnb, "ether")
 
         # Chain ID default: 56 mainnet
@@ -57,22 +63,30 @@ async def send_bnb(
         if "testnet" in rpc_url.lower():
             chain_id = 97  # BSC testnet
 
-        tx = {
-            "nonce": nonce,
-            "to": Web3.to_checksum_address(destination_wallet),
-            "value": value,
-            "gas": 21000,
-            "gasPrice": w3.eth.gas_price,
-            "chainId": chain_id,
-        }
+        def sign(nonce: int):
+            tx = {
+                "nonce": nonce,
+                "to": Web3.to_checksum_address(destination_wallet),
+                "value": value,
+                "gas": 21000,
+                "gasPrice": gas_price,
+                "chainId": chain_id,
+            }
+            return w3.eth.account.sign_transaction(tx, private_key)
 
         logger.info(
             f"🚀 Kirim BNB ke {destination_wallet} | amount={amount_bnb} | "
             f"order_id={order_id} | user_id={user_id} | username={username}"
         )
 
-        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = await nonce_manager.send(
+            chain_id,
+            sender_address,
+            lambda: w3.eth.get_transaction_count(sender_address, "pending"),
+            sign,
+            w3.eth.send_raw_transaction,
+            w3.eth.get_transaction,
+        )
         tx_hash_hex = tx_hash.hex()
 
         # Explorer link
@@ -0,0 +1,275 @@
+# 📍 lib/circuit_breaker.py
+import os
+import time
+import hashlib
+import inspect
+import logging
+import threading
+from collections import deque, OrderedDict
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Circuit breaker per RPC endpoint, matikan dengan RPC_BREAKER_ENABLED=false
+RPC_BREAKER_ENABLED = os.getenv("RPC_BREAKER_ENABLED", "true").lower() == "true"
+# 🔹 Jumlah call terakhir yang dinilai & minimal call sebelum breaker boleh open
+RPC_BREAKER_WINDOW = int(os.getenv("RPC_BREAKER_WINDOW", "20"))
+RPC_BREAKER_MIN_CALLS = int(os.getenv("RPC_BREAKER_MIN_CALLS", "5"))
+# 🔹 Open kalau rasio gagal (error + call lambat) di window ≥ ini
+RPC_BREAKER_FAILURE_RATIO = float(os.getenv("RPC_BREAKER_FAILURE_RATIO", "0.5"))
+# 🔹 Budget latency (detik): call yang lebih lama dihitung gagal walau dapat jawaban
+RPC_BREAKER_SLOW_CALL = float(os.getenv("RPC_BREAKER_SLOW_CALL", "5"))
+# 🔹 Lama open (detik) sebelum half-open & jumlah probe yang harus sukses untuk close lagi
+RPC_BREAKER_OPEN_SECONDS = float(os.getenv("RPC_BREAKER_OPEN_SECONDS", "30"))
+RPC_BREAKER_HALF_OPEN_PROBES = int(os.getenv("RPC_BREAKER_HALF_OPEN_PROBES", "1"))
+# 🔹 Maksimal breaker untuk endpoint di luar env (RPC URL kiriman user), yang paling lama tidak dipakai dibuang
+RPC_BREAKER_MAX = int(os.getenv("RPC_BREAKER_MAX", "256"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def redact_url(url: str) -> str:
+    """
+    scheme://host[:port] + hash pendek URL lengkap, untuk log publik & /rpc_health.
+    Path / query (API key Infura, Alchemy, dll) tidak pernah ditampilkan.
+    """
+    url = str(url)
+    parts = urlsplit(url)
+    digest = hashlib.sha256(url.encode()).hexdigest()[:8]
+    if not parts.scheme or not parts.hostname:
+        return f"endpoint#{digest}"
+    host = parts.hostname + (f":{parts.port}" if parts.port else "")
+    return f"{parts.scheme}://{host}#{digest}"
+
+
+class CircuitOpenError(Exception):
+    """Call ditolak tanpa menyentuh jaringan karena breaker endpoint sedang open"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit breaker {redact_url(endpoint)} open, coba lagi {retry_after:.0f}s lagi")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Breaker satu endpoint RPC.
+    - closed: semua call lewat, hasil (error / lambat) dicatat di window
+    - open: call langsung ditolak CircuitOpenError selama RPC_BREAKER_OPEN_SECONDS
+    - half_open: cuma RPC_BREAKER_HALF_OPEN_PROBES call percobaan yang lewat;
+      semua sukses → closed, satu gagal → open lagi
+    Thread-safe, karena helper & monitor sync juga memakai breaker yang sama.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.name = redact_url(endpoint)
+        self._state = CLOSED
+        self._window = deque(maxlen=RPC_BREAKER_WINDOW)  # True = gagal
+        self._opened_at = 0.0
+        self._probes = 0  # probe half-open yang sedang jalan
+        self._probe_ok = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    def _refresh(self, now: float):
+        if self._state == OPEN and now - self._opened_at >= RPC_BREAKER_OPEN_SECONDS:
+            self._state = HALF_OPEN
+            self._probes = 0
+            self._probe_ok = 0
+            logger.info(f"🟡 Circuit breaker {self.name} half-open, kirim probe")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def retry_after(self) -> float:
+        """Detik sampai breaker half-open, 0 kalau call sudah boleh lewat"""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            if self._state != OPEN:
+                return 0.0
+            return max(RPC_BREAKER_OPEN_SECONDS - (now - self._opened_at), 0.0)
+
+    def allow(self):
+        """Raise CircuitOpenError kalau call tidak boleh lewat, return state saat call diizinkan"""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            if self._state == CLOSED:
+                return CLOSED
+            if self._state == HALF_OPEN and self._probes < RPC_BREAKER_HALF_OPEN_PROBES:
+                self._probes += 1
+                return HALF_OPEN
+            self.rejected += 1
+            retry_after = max(RPC_BREAKER_OPEN_SECONDS - (now - self._opened_at), 0.0)
+        raise CircuitOpenError(self.endpoint, retry_after)
+
+    def _open(self, now: float, reason: str):
+        self._state = OPEN
+        self._opened_at = now
+        self._window.clear()
+        self.opened += 1
+        logger.warning(
+            f"🔴 Circuit breaker {self.name} open ({reason}), ditolak {RPC_BREAKER_OPEN_SECONDS:.0f}s"
+        )
+
+    def record(self, admitted: str, latency: float, ok: bool):
+        """Catat hasil call yang sebelumnya diizinkan allow() dengan state admitted"""
+        failed = not ok or latency > RPC_BREAKER_SLOW_CALL
+        with self._lock:
+            now = time.monotonic()
+            if admitted == HALF_OPEN:
+                if self._state != HALF_OPEN:
+                    return
+                self._probes -= 1
+                if failed:
+                    self._open(now, "probe gagal")
+                    return
+                self._probe_ok += 1
+                if self._probe_ok >= RPC_BREAKER_HALF_OPEN_PROBES:
+                    self._state = CLOSED
+                    self._window.clear()
+                    logger.info(f"🟢 Circuit breaker {self.name} closed lagi")
+                return
+            if self._state != CLOSED:
+                # call lama yang selesai setelah breaker open, sudah tidak relevan
+                return
+            self._window.append(failed)
+            failures = sum(self._window)
+            if (
+                len(self._window) >= RPC_BREAKER_MIN_CALLS
+                and failures / len(self._window) >= RPC_BREAKER_FAILURE_RATIO
+            ):
+                self._open(now, f"{failures}/{len(self._window)} call gagal/lambat")
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return {
+                "state": self._state,
+                "failures": sum(self._window),
+                "calls": len(self._window),
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class CircuitBreakerRegistry:
+    """
+    Breaker per endpoint URL, dipakai bersama oleh client registry, helper, monitor & rpc_router.
+    Endpoint dari env di-pin (tidak pernah dibuang); endpoint lain (RPC URL kiriman user)
+    dibatasi max_size, yang paling lama tidak dipakai dibuang duluan.
+    """
+
+    def __init__(self, max_size: int = RPC_BREAKER_MAX):
+        self.max_size = max_size
+        self._breakers = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def pin(self, endpoint: str):
+        """Tandai endpoint dari env: breaker-nya tidak ikut dibuang saat registry penuh"""
+        with self._lock:
+            self._pinned.add(str(endpoint))
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        endpoint = str(endpoint)
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(endpoint)
+                self._evict()
+            self._breakers.move_to_end(endpoint)
+            return breaker
+
+    def _evict(self):
+        unpinned = len(self._breakers) - len(self._pinned & self._breakers.keys())
+        for endpoint in list(self._breakers):
+            if unpinned <= self.max_size:
+                return
+            if endpoint not in self._pinned:
+                del self._breakers[endpoint]
+                unpinned -= 1
+                self.evicted += 1
+
+    def is_open(self, endpoint: str) -> bool:
+        return RPC_BREAKER_ENABLED and self.get(endpoint).state == OPEN
+
+    def retry_delay(self, endpoint: str, default: float) -> float:
+        """Jeda retry loop monitor: tunggu breaker half-open kalau sedang open"""
+        if not RPC_BREAKER_ENABLED or not endpoint:
+            return default
+        return max(default, self.get(endpoint).retry_after())
+
+    def wrap(self, endpoint: str, func):
+        """
+        Bungkus func (sync / async) supaya lewat breaker endpoint.
+        Breaker dicari per call, jadi client yang hidup lebih lama dari breaker-nya (dibuang karena
+        registry penuh) tetap memakai breaker yang sama dengan rpc_router & /rpc_health.
+        """
+        if inspect.iscoroutinefunction(func):
+
+            async def guarded_async(*args, **kwargs):
+                breaker = self.get(endpoint)
+                admitted = breaker.allow()
+                start = time.monotonic()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    # termasuk CancelledError dari timeout (wait_for), supaya slot probe half-open kembali
+                    breaker.record(admitted, time.monotonic() - start, False)
+                    raise
+                breaker.record(admitted, time.monotonic() - start, True)
+                return result
+
+            return guarded_async
+
+        def guarded(*args, **kwargs):
+            breaker = self.get(endpoint)
+            admitted = breaker.allow()
+            start = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                breaker.record(admitted, time.monotonic() - start, False)
+                raise
+            breaker.record(admitted, time.monotonic() - start, True)
+            return result
+
+        return guarded
+
+    def stats(self) -> dict:
+        """Status per endpoint, URL disamarkan (redact_url) supaya API key tidak bocor"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+# 🔹 Registry global
+breakers = CircuitBreakerRegistry()
+
+
+def guard_provider(provider, endpoint: str = None, methods=("make_request", "make_batch_request")):
+    """
+    Pasang breaker di provider RPC (web3, tronpy, solana-py) lewat method transport-nya.
+    Cuma error transport (timeout, koneksi, HTTP 5xx) yang sampai ke sini; error JSON-RPC
+    (revert, nonce, dll) dibalas sebagai response biasa, jadi tidak membuka breaker.
+    """
+    if not RPC_BREAKER_ENABLED:
+        return provider
+    endpoint = endpoint or getattr(provider, "endpoint_uri", None)
+    if not endpoint:
+        return provider
+    for name in methods:
+        method = getattr(provider, name, None)
+        if method is not None:
+            setattr(provider, name, breakers.wrap(endpoint, method))
+    return provider
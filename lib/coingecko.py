@@ -1,90 +1,262 @@
 # 📍 lib/coingecko.py
-import aiohttp
+import os
+import time
+import random
 import logging
 import asyncio
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping
+from lib.singleflight import SingleFlight
+from lib.price_providers import build_price_aggregator
+from lib.token_registry import token_registry
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# 🔹 URL Coingecko langsung, tidak dari env
-BASE_URL = "https://api.coingecko.com/api/v3/simple/price"
+# 🔹 Simbol → id CoinGecko, satu sumber dari lib/token_registry
+TOKEN_MAP = token_registry.price_ids()
 
-TOKEN_MAP = {
-    "sol": "solana",
-    "eth": "ethereum",
-    "usdt": "tether",
-    "usdc": "usd-coin",
-    "bnb": "binancecoin",
-    "trx": "tron",
-    "ton": "the-open-network",
-    "base": "base-protocol",
-}
+VS_CURRENCIES = "idr,usd"
 
+# 🔹 Umur maksimal snapshot sebelum di-refresh (detik), bisa diatur dari env
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "30"))
+# 🔹 Interval polling background refresher (detik)
+PRICE_REFRESH_INTERVAL = float(os.getenv("PRICE_REFRESH_INTERVAL", "15"))
+# 🔹 Batas atas backoff refresher kalau CoinGecko error terus (detik)
+PRICE_REFRESH_MAX_BACKOFF = float(os.getenv("PRICE_REFRESH_MAX_BACKOFF", "60"))
+# 🔹 Lewat umur ini harga dianggap basi, endpoint balas 503 (detik)
+PRICE_STALE_AFTER = float(os.getenv("PRICE_STALE_AFTER", "300"))
 
-async def get_current_price(token: str, retries=3, delay=1) -> float:
-    coin_id = TOKEN_MAP.get(token.lower())
-    if not coin_id:
-        logger.warning(f"⚠️ Token {token} belum support")
-        return 0
 
-    params = {"ids": ",".join(TOKEN_MAP.values()), "vs_currencies": "idr,usd"}
+class StalePriceError(Exception):
+    """Snapshot harga belum ada atau sudah lewat PRICE_STALE_AFTER"""
+
+
+@dataclass(frozen=True)
+class PriceSnapshot:
+    """Snapshot harga immutable: {coin_id: {"idr": ..., "usd": ...}}"""
+
+    prices: Mapping[str, Mapping[str, float]]
+    fetched_at: float  # time.monotonic(), buat hitung umur
+    timestamp: float = field(default_factory=time.time)  # epoch, buat ditampilkan
+
+    @classmethod
+    def from_response(cls, data: dict) -> "PriceSnapshot":
+        prices = {
+            coin_id: MappingProxyType(dict(info))
+            for coin_id, info in data.items()
+            if isinstance(info, dict)
+        }
+        return cls(prices=MappingProxyType(prices), fetched_at=time.monotonic())
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def get(self, coin_id: str, vs: str = "idr") -> float:
+        return self.prices.get(coin_id, {}).get(vs, 0)
+
+
+# 🔹 Snapshot harga bersama: seluruh respons IDR/USD untuk semua id di TOKEN_MAP.
+# Dipakai /price, /swap, monitor & price_mapper supaya tidak tiap request nembak CoinGecko.
+_snapshot = None
+_refresh_task = None
+_refresher_task = None
+
+# 🔹 Callback yang dipanggil tiap snapshot baru terbit (cross-rate, dll)
+_snapshot_listeners = []
+
+# 🔹 Fetch snapshot yang bersamaan digabung jadi satu request upstream
+_price_flight = SingleFlight("coingecko")
+
+# 🔹 Sumber harga: CoinGecko + provider cadangan dengan hedged request (env PRICE_PROVIDERS)
+price_aggregator = build_price_aggregator()
+
+
+def add_snapshot_listener(callback):
+    """Daftarkan callback(snapshot) yang dipanggil tiap snapshot harga baru terbit"""
+    if callback not in _snapshot_listeners:
+        _snapshot_listeners.append(callback)
+
+
+def _publish_snapshot(snapshot: PriceSnapshot):
+    global _snapshot
+    _snapshot = snapshot
+    for callback in _snapshot_listeners:
+        try:
+            callback(snapshot)
+        except Exception as e:
+            logger.error(f"❌ Snapshot listener {callback.__name__} error: {e}", exc_info=True)
+
+
+def resolve_coin_id(token: str):
+    """Terima simbol (sol, eth, ...) atau id CoinGecko (solana, binancecoin, ...)"""
+    return token_registry.price_id(token)
+
+
+async def _fetch_all_prices() -> PriceSnapshot:
+    """Fetch harga semua token sekaligus lalu publish snapshot baru"""
+    # hedge/fallback antar provider ditangani lib/price_providers
+    data = await price_aggregator.fetch(list(TOKEN_MAP.values()), VS_CURRENCIES.split(","))
+    snapshot = PriceSnapshot.from_response(data)
+    _publish_snapshot(snapshot)
+    logger.info(f"💲 Snapshot harga diperbarui ({len(data)} token)")
+    return snapshot
+
+
+async def refresh_prices() -> PriceSnapshot:
+    """Refresh snapshot, caller bersamaan nunggu satu fetch yang sama"""
+    key = (",".join(TOKEN_MAP.values()), VS_CURRENCIES)
+    return await _price_flight.do(key, _fetch_all_prices)
+
+
+async def _refresh_in_background():
+    try:
+        await refresh_prices()
+    except Exception as e:
+        logger.error(f"❌ Refresh harga di background gagal: {e}")
+
+
+def _schedule_refresh():
+    """Jalankan satu refresh di background, kalau belum ada yang jalan"""
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_in_background())
+    return _refresh_task
+
+
+def get_price_age():
+    """Umur snapshot harga dalam detik, None kalau belum pernah fetch"""
+    if _snapshot is None:
+        return None
+    return _snapshot.age
+
+
+def is_refresher_running() -> bool:
+    return _refresher_task is not None and not _refresher_task.done()
+
 
-    for attempt in range(1, retries + 1):
+async def get_price_snapshot() -> PriceSnapshot:
+    """
+    Ambil snapshot harga terbaru.
+    - Refresher jalan: cuma baca snapshot, tidak pernah nunggu upstream.
+    - Refresher tidak jalan (misal monitor standalone): belum ada data → tunggu
+      fetch pertama, lewat TTL → balikin data lama & refresh di background.
+    Raise StalePriceError kalau snapshot belum ada / lewat PRICE_STALE_AFTER.
+    """
+    if not is_refresher_running():
+        if _snapshot is None:
+            try:
+                await refresh_prices()
+            except Exception as e:
+                logger.error(f"❌ Fetch harga pertama gagal: {e}")
+        elif _snapshot.age > PRICE_CACHE_TTL:
+            _schedule_refresh()
+
+    snapshot = _snapshot
+    if snapshot is None:
+        raise StalePriceError("Harga belum tersedia, coba lagi sebentar")
+    if snapshot.age > PRICE_STALE_AFTER:
+        raise StalePriceError(f"Harga basi ({snapshot.age:.0f}s), coba lagi sebentar")
+    return snapshot
+
+
+async def _price_refresher_loop():
+    """Polling semua harga tiap PRICE_REFRESH_INTERVAL, backoff + jitter kalau gagal"""
+    failures = 0
+    while True:
         try:
-            timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(BASE_URL, params=params) as resp:
-                    if resp.status != 200:
-                        logger.error(
-                            f"❌ Gagal fetch harga {token}, status: {resp.status}"
-                        )
-                        raise Exception("Status != 200")
-                    data = await resp.json()
-                    price_info = data.get(coin_id)
-                    if not price_info:
-                        logger.error(
-                            f"❌ Token {token.upper()} tidak ada di respons API"
-                        )
-                        raise Exception("Token tidak ada")
-                    price_idr = price_info.get("idr", 0)
-                    price_usd = price_info.get("usd", 0)
-                    if price_idr == 0 or price_usd == 0:
-                        raise Exception("Data harga kosong")
-                    kurs = price_idr / price_usd
-                    logger.info(
-                        f"💲 Harga real-time {token.upper()} : {price_idr:,.0f} IDR | {price_usd:.2f} USD | Kurs IDR/USD: {kurs:,.2f}"
-                    )
-                    return price_idr
+            await refresh_prices()
+            failures = 0
+            delay = PRICE_REFRESH_INTERVAL
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
+            failures += 1
+            backoff = min(PRICE_REFRESH_MAX_BACKOFF, 2**failures)
+            delay = random.uniform(backoff / 2, backoff)
             logger.warning(
-                f"⚠️ Attempt {attempt} gagal untuk {token}, retry in {delay}s"
+                f"⚠️ Refresher harga gagal ({failures}x): {e}, retry in {delay:.1f}s"
             )
-            await asyncio.sleep(delay)
-    # fallback kalau semua retry gagal
-    logger.error(f"❌ Semua attempt gagal, gunakan fallback price untuk {token}")
-    return 0  # atau bisa pakai harga terakhir cache
+        await asyncio.sleep(delay)
+
+
+async def start_price_refresher(wait_first: float = 5):
+    """Start background refresher (dipanggil dari lifespan main.py)"""
+    global _refresher_task
+    if is_refresher_running():
+        return
+    _refresher_task = asyncio.create_task(_price_refresher_loop())
+    logger.info(f"🔄 Price refresher jalan tiap {PRICE_REFRESH_INTERVAL:.0f}s")
+
+    # tunggu snapshot pertama sebentar biar request awal tidak langsung 503
+    deadline = time.monotonic() + wait_first
+    while _snapshot is None and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+
+async def stop_price_refresher():
+    global _refresher_task
+    if _refresher_task is None:
+        return
+    _refresher_task.cancel()
+    try:
+        await _refresher_task
+    except asyncio.CancelledError:
+        pass
+    _refresher_task = None
+    logger.info("🛑 Price refresher dihentikan")
+
+
+async def get_current_price(token: str) -> float:
+    coin_id = resolve_coin_id(token)
+    if not coin_id:
+        logger.warning(f"⚠️ Token {token} belum support")
+        return 0
+
+    try:
+        snapshot = await get_price_snapshot()
+    except StalePriceError as e:
+        logger.error(f"❌ Harga {token.upper()} tidak tersedia: {e}")
+        return 0  # fallback lama: caller anggap 0 = gagal
+
+    price_idr = snapshot.get(coin_id, "idr")
+    price_usd = snapshot.get(coin_id, "usd")
+    if price_idr == 0 or price_usd == 0:
+        logger.error(f"❌ Token {token.upper()} tidak ada di snapshot harga")
+        return 0
+    logger.debug(
+        f"💲 Harga {token.upper()} : {price_idr:,.0f} IDR | {price_usd:.2f} USD | umur {snapshot.age:.1f}s"
+    )
+    return price_idr
 
 
 async def log_all_prices():
     """Fetch & log semua harga token secara real-time"""
-    for token in TOKEN_MAP.keys():
-        await get_current_price(token)
+    try:
+        snapshot = await refresh_prices()
+    except Exception as e:
+        logger.error(f"❌ Gagal fetch semua harga: {e}")
+        return
+    for token, coin_id in TOKEN_MAP.items():
+        price_idr = snapshot.get(coin_id, "idr")
+        price_usd = snapshot.get(coin_id, "usd")
+        if price_idr and price_usd:
+            kurs = price_idr / price_usd
+            logger.info(
+                f"💲 Harga real-time {token.upper()} : {price_idr:,.0f} IDR | {price_usd:.2f} USD | Kurs IDR/USD: {kurs:,.2f}"
+            )
 
 
 async def get_current_sol_price() -> float:
     """Ambil harga SOL dalam IDR saja"""
-    params = {"ids": "solana", "vs_currencies": "idr"}
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(BASE_URL, params=params) as resp:
-                if resp.status != 200:
-                    logger.error(f"❌ Gagal fetch harga SOL, status: {resp.status}")
-                    return 0
-                data = await resp.json()
-                price = data.get("solana", {}).get("idr", 0)
-                if price == 0:
-                    logger.error(f"❌ Respons API tidak sesuai untuk SOL, data: {data}")
-                return price
+        snapshot = await get_price_snapshot()
+        price = snapshot.get("solana", "idr")
+        if price == 0:
+            logger.error(f"❌ Snapshot harga tidak ada data SOL")
+        return price
     except Exception as e:
         logger.exception("❌ Error ambil harga SOL")
         return 0
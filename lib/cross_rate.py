@@ -0,0 +1,72 @@
+# 📍 lib/cross_rate.py
+import logging
+import numpy as np
+from lib.coingecko import PriceSnapshot, add_snapshot_listener
+
+logger = logging.getLogger(__name__)
+
+
+class CrossRateMatrix:
+    """
+    Matriks kurs silang N token x N token dari satu snapshot harga.
+    rates[i, j] = harga_usd[i] / harga_usd[j] → 1 token i = rates[i, j] token j.
+    Token yang harganya kosong jadi NaN.
+    """
+
+    def __init__(self, token_ids: dict, snapshot: PriceSnapshot):
+        self.snapshot = snapshot
+        self.tokens = tuple(token_ids.keys())
+        self.index = {token: i for i, token in enumerate(self.tokens)}
+        usd = np.array(
+            [snapshot.get(coin_id, "usd") or np.nan for coin_id in token_ids.values()],
+            dtype=np.float64,
+        )
+        self.prices_usd = usd
+
+        # baris/kolom terakhir NaN buat token yang tidak dikenal di quote_many
+        n = len(self.tokens)
+        self._padded = np.full((n + 1, n + 1), np.nan)
+        self._padded[:n, :n] = usd[:, None] / usd[None, :]
+        self._padded.setflags(write=False)
+        self.rates = self._padded[:n, :n]
+
+    def rate(self, from_token: str, to_token: str) -> float:
+        i = self.index.get(from_token.lower())
+        j = self.index.get(to_token.lower())
+        if i is None or j is None:
+            return np.nan
+        return float(self.rates[i, j])
+
+    def price_usd(self, token: str) -> float:
+        i = self.index.get(token.lower())
+        return np.nan if i is None else float(self.prices_usd[i])
+
+    def quote_many(self, from_tokens, to_tokens, amounts, fee: float = 0.0):
+        """
+        Hitung banyak quote sekaligus (vectorized).
+        Return array hasil, NaN untuk token yang tidak didukung / harga kosong.
+        """
+        missing = len(self.tokens)
+        fi = np.fromiter((self.index.get(t.lower(), missing) for t in from_tokens), dtype=np.intp)
+        ti = np.fromiter((self.index.get(t.lower(), missing) for t in to_tokens), dtype=np.intp)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        return amounts * self._padded[fi, ti] * (1 - fee)
+
+
+class CrossRateBook:
+    """Simpan CrossRateMatrix terbaru, dibangun ulang tiap snapshot harga refresh"""
+
+    def __init__(self, token_ids: dict):
+        self.token_ids = dict(token_ids)
+        self._matrix = None
+        add_snapshot_listener(self.rebuild)
+
+    def rebuild(self, snapshot: PriceSnapshot):
+        self._matrix = CrossRateMatrix(self.token_ids, snapshot)
+        logger.debug(f"🔁 Cross-rate matrix {len(self.token_ids)}x{len(self.token_ids)} dibangun ulang")
+
+    def get(self, snapshot: PriceSnapshot) -> CrossRateMatrix:
+        # snapshot bisa terbit sebelum book ini dibuat, bangun sekali kalau belum cocok
+        if self._matrix is None or self._matrix.snapshot is not snapshot:
+            self.rebuild(snapshot)
+        return self._matrix
@@ -0,0 +1,239 @@
+# 📍 lib/disperse.py
+import os
+import asyncio
+import logging
+from web3 import Web3
+from config import (
+    ETH_ACCOUNT, ETH_RPC_URL, ETH_CHAIN_ID,
+    BSC_ACCOUNT, BSC_RPC_URL, BSC_CHAIN_ID,
+    BASE_ACCOUNT, BASE_RPC_URL,
+)
+from lib.rpc_clients import get_web3
+from lib.token_registry import token_registry
+from lib.nonce_manager import nonce_manager, BroadcastUnknown
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Payout ERC20 massal lewat satu call kontrak disperse, default mati (set true untuk aktifkan)
+DISPERSE_ENABLED = os.getenv("DISPERSE_ENABLED", "false").lower() == "true"
+# 🔹 Alamat kontrak disperse (Disperse.app), override per chain: DISPERSE_ADDRESS_ETH / _BSC / _BASE
+#    Isi dengan kontrak hasil deploy sendiri untuk dev node lokal (anvil / hardhat)
+DISPERSE_ADDRESS = os.getenv("DISPERSE_ADDRESS", "0xD152f549545093347A162Dce210e7293f1452150")
+# 🔹 Minimal penerima supaya disperse dipakai & maksimal penerima per tx (batas gas block)
+DISPERSE_MIN_RECIPIENTS = int(os.getenv("DISPERSE_MIN_RECIPIENTS", "3"))
+DISPERSE_MAX_RECIPIENTS = int(os.getenv("DISPERSE_MAX_RECIPIENTS", "200"))
+# 🔹 Batas tunggu receipt approve / disperse (detik)
+DISPERSE_RECEIPT_TIMEOUT = int(os.getenv("DISPERSE_RECEIPT_TIMEOUT", "180"))
+# 🔹 Slot storage mapping allowance token yang dicoba (0..N-1) untuk simulasi disperse sebelum approve
+DISPERSE_ALLOWANCE_SLOTS = int(os.getenv("DISPERSE_ALLOWANCE_SLOTS", "16"))
+
+# wallet service per chain: (RPC, account, chain id; None = baca ke node)
+CHAINS = {
+    "eth": (ETH_RPC_URL, ETH_ACCOUNT, ETH_CHAIN_ID),
+    "bsc": (BSC_RPC_URL, BSC_ACCOUNT, BSC_CHAIN_ID),
+    "base": (BASE_RPC_URL, BASE_ACCOUNT, None),
+}
+
+DISPERSE_ABI = [
+    {
+        "inputs": [
+            {"name": "token", "type": "address"},
+            {"name": "recipients", "type": "address[]"},
+            {"name": "values", "type": "uint256[]"},
+        ],
+        "name": "disperseToken",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    }
+]
+
+ERC20_ABI = [
+    {"constant": True, "inputs": [], "name": "decimals", "outputs": [{"name": "", "type": "uint8"}], "type": "function"},
+    {"constant": True, "inputs": [{"name": "_owner", "type": "address"}], "name": "balanceOf",
+     "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
+    {"constant": True, "inputs": [{"name": "_owner", "type": "address"}, {"name": "_spender", "type": "address"}],
+     "name": "allowance", "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
+    {"constant": False, "inputs": [{"name": "_spender", "type": "address"}, {"name": "_value", "type": "uint256"}],
+     "name": "approve", "outputs": [], "type": "function"},
+    {"constant": False, "inputs": [{"name": "_to", "type": "address"}, {"name": "_value", "type": "uint256"}],
+     "name": "transfer", "outputs": [], "type": "function"},
+]
+
+DISPERSE_SELECTOR = bytes(Web3.keccak(text="disperseToken(address,address[],uint256[])")[:4])
+
+# kontrak disperse yang sudah dicek bytecode-nya punya disperseToken, per (chain, alamat)
+_verified = set()
+# (layout, slot) mapping allowance per (chain, alamat token), None = tidak ketemu di DISPERSE_ALLOWANCE_SLOTS
+_allowance_slots = {}
+
+
+class DisperseUnavailable(Exception):
+    """Disperse tidak bisa dipakai & belum ada tx payout yang terkirim → aman fallback ke transfer satu per satu"""
+
+
+def disperse_address(chain: str) -> str:
+    return Web3.to_checksum_address(os.getenv(f"DISPERSE_ADDRESS_{chain.upper()}") or DISPERSE_ADDRESS)
+
+
+def supports(token: str, chain: str) -> bool:
+    return chain in CHAINS and token_registry.get(chain, token) is not None
+
+
+def _wait(w3: Web3, tx_hash, what: str):
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=DISPERSE_RECEIPT_TIMEOUT)
+    if receipt.status != 1:
+        raise RuntimeError(f"{what} revert: {tx_hash.hex()}")
+    return receipt
+
+
+def _allowance_key(layout: str, slot: int, owner: str, spender: str) -> bytes:
+    """Storage key allowance[owner][spender]: Solidity keccak(key . slot), Vyper keccak(slot . key)"""
+    owner_word = bytes.fromhex(owner[2:]).rjust(32, b"\0")
+    spender_word = bytes.fromhex(spender[2:]).rjust(32, b"\0")
+    slot_word = slot.to_bytes(32, "big")
+    if layout == "vyper":
+        return Web3.keccak(Web3.keccak(slot_word + owner_word) + spender_word)
+    return Web3.keccak(spender_word + Web3.keccak(owner_word + slot_word))
+
+
+def _allowance_override(chain: str, token_contract, owner: str, spender: str, value: int):
+    """
+    State override eth_call yang membuat allowance(owner, spender) = value tanpa kirim approve.
+    Slot mapping allowance (layout Solidity / Vyper) dicari sekali per token lalu di-cache.
+    Return None kalau slot tidak ketemu atau node tidak mendukung state override.
+    """
+    key = (chain, token_contract.address)
+    if key in _allowance_slots:
+        candidates = [_allowance_slots[key]] if _allowance_slots[key] is not None else []
+    else:
+        candidates = [(layout, slot) for slot in range(DISPERSE_ALLOWANCE_SLOTS) for layout in ("solidity", "vyper")]
+    for layout, slot in candidates:
+        storage = _allowance_key(layout, slot, owner, spender)
+        override = {token_contract.address: {"stateDiff": {Web3.to_hex(storage): Web3.to_hex(value.to_bytes(32, "big"))}}}
+        try:
+            found = token_contract.functions.allowance(owner, spender).call(state_override=override) == value
+        except Exception as e:
+            logger.warning(f"⚠️ State override tidak didukung node {chain}: {e}")
+            return None
+        if found:
+            _allowance_slots[key] = (layout, slot)
+            return override
+    _allowance_slots[key] = None
+    return None
+
+
+def disperse_sync(token: str, chain: str, payouts: list, gas_price_multiplier: float = 1.2) -> dict:
+    """
+    Kirim ERC20 (USDT/USDC wallet service) ke banyak penerima dalam satu tx disperseToken.
+    payouts: [(destination_wallet, amount)], maksimal DISPERSE_MAX_RECIPIENTS.
+    Disperse disimulasikan dulu (eth_call dengan state override allowance) sebelum approve dikirim,
+    jadi kontrak yang salah / revert tidak menyisakan approve. Node tanpa state override: cek
+    bytecode punya disperseToken & approve bisa dieksekusi, baru approve lalu estimate.
+    Gagal sebelum tx disperse di-broadcast atau tx disperse revert → DisperseUnavailable.
+    Tx disperse terkirim tapi receipt tidak didapat → BroadcastUnknown (tx_hash lokal).
+    Return tx_hash + estimasi gas disperse vs transfer satu per satu.
+    """
+    rpc_url, account, chain_id = CHAINS[chain]
+    deployment = token_registry.get(chain, token)
+    if not rpc_url or not account or deployment is None:
+        raise DisperseUnavailable(f"RPC, account atau alamat {token.upper()} {chain} belum di-set")
+    if len(payouts) > DISPERSE_MAX_RECIPIENTS:
+        raise ValueError(f"Maksimal {DISPERSE_MAX_RECIPIENTS} penerima per tx disperse")
+
+    w3 = get_web3(chain, rpc_url)
+    sender = account.address
+    spender = disperse_address(chain)
+    token_contract = w3.eth.contract(address=deployment.address, abi=ERC20_ABI)
+    disperse = w3.eth.contract(address=spender, abi=DISPERSE_ABI)
+
+    try:
+        if (chain, spender) not in _verified:
+            code = bytes(w3.eth.get_code(spender))
+            if not code:
+                raise DisperseUnavailable(f"Kontrak disperse {spender} tidak ada di {chain}")
+            if DISPERSE_SELECTOR not in code:
+                raise DisperseUnavailable(f"Kontrak {spender} di {chain} tidak punya fungsi disperseToken")
+            _verified.add((chain, spender))
+
+        decimals = token_registry.resolve_decimals(chain, token, token_contract.functions.decimals().call)
+        recipients = [Web3.to_checksum_address(dest) for dest, _ in payouts]
+        values = [int(amount * (10 ** decimals)) for _, amount in payouts]
+        total = sum(values)
+
+        balance = token_contract.functions.balanceOf(sender).call()
+        if balance < total:
+            raise DisperseUnavailable(f"Saldo {token.upper()} {chain} tidak cukup: butuh {total}, saldo {balance}")
+
+        chain_id = chain_id or w3.eth.chain_id
+        gas_price = int(w3.eth.gas_price * gas_price_multiplier)
+        fetch_pending = lambda: w3.eth.get_transaction_count(sender, "pending")
+
+        def send(call, gas: int):
+            def sign(nonce: int):
+                tx = call.build_transaction(
+                    {"from": sender, "chainId": chain_id, "gas": gas, "gasPrice": gas_price, "nonce": nonce}
+                )
+                return w3.eth.account.sign_transaction(tx, account.key)
+
+            return nonce_manager.send_sync(
+                chain_id, sender, fetch_pending, sign, w3.eth.send_raw_transaction, w3.eth.get_transaction
+            )
+
+        # estimasi transfer satu per satu: satu estimate dikali jumlah penerima
+        single_gas = token_contract.functions.transfer(recipients[0], values[0]).estimate_gas({"from": sender})
+        individual_gas = single_gas * len(payouts)
+
+        call = disperse.functions.disperseToken(deployment.address, recipients, values)
+        disperse_gas = None
+        allowance = token_contract.functions.allowance(sender, spender).call()
+        if allowance >= total:
+            disperse_gas = call.estimate_gas({"from": sender})
+        else:
+            # simulasi dulu seolah allowance sudah cukup: revert di sini = belum ada approve terkirim
+            override = _allowance_override(chain, token_contract, sender, spender, total)
+            if override is not None:
+                disperse_gas = call.estimate_gas({"from": sender}, None, override)
+            else:
+                token_contract.functions.approve(spender, 0 if allowance > 0 else total).estimate_gas({"from": sender})
+            # USDT ERC20 menolak ubah allowance non-zero langsung, nol-kan dulu
+            if allowance > 0:
+                _wait(w3, send(token_contract.functions.approve(spender, 0), 100000), "Reset approve")
+            approve_hash = send(token_contract.functions.approve(spender, total), 100000)
+            logger.info(f"🔓 Approve {token.upper()} {chain} ke disperse {spender}: {approve_hash.hex()}")
+            _wait(w3, approve_hash, "Approve")
+            if disperse_gas is None:
+                disperse_gas = call.estimate_gas({"from": sender})
+        saved = individual_gas - disperse_gas
+        logger.info(
+            f"⛽ Disperse {token.upper()} {chain} {len(payouts)} penerima: {disperse_gas} gas "
+            f"vs {individual_gas} gas transfer satu per satu (hemat {saved})"
+        )
+    except DisperseUnavailable:
+        raise
+    except Exception as e:
+        raise DisperseUnavailable(str(e)) from e
+
+    tx_hash = send(call, int(disperse_gas * 1.2))
+    logger.info(f"🕓 Menunggu konfirmasi disperse {tx_hash.hex()}...")
+    # timeout di sini tidak boleh fallback: tx bisa masih masuk belakangan
+    try:
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=DISPERSE_RECEIPT_TIMEOUT)
+    except Exception as e:
+        raise BroadcastUnknown(tx_hash, None, e) from e
+    if receipt.status != 1:
+        raise DisperseUnavailable(f"Tx disperse revert: {tx_hash.hex()}")
+
+    logger.info(f"✅ Disperse {token.upper()} {chain} ke {len(payouts)} penerima, tx_hash={tx_hash.hex()}")
+    return {
+        "tx_hash": tx_hash.hex(),
+        "gas_used": receipt.gasUsed,
+        "gas_estimate": disperse_gas,
+        "individual_gas_estimate": individual_gas,
+        "gas_saved_estimate": saved,
+    }
+
+
+async def send_erc20_batch(token: str, chain: str, payouts: list) -> dict:
+    """Versi async disperse_sync (Web3 sync jalan di thread)"""
+    return await asyncio.to_thread(disperse_sync, token, chain, payouts)
@@ -1,7 +1,10 @@
 # 📍 lib/eth_helper.py
+import asyncio
 import logging
 from web3 import Web3
 from eth_account import Account
+from lib.rpc_clients import get_web3, get_batch_web3
+from lib.nonce_manager import nonce_manager
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +12,7 @@ logger = logging.getLogger(__name__)
 def get_balance(address: str, rpc_url: str):
     """Cek saldo ETH dari wallet tertentu"""
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        w3 = get_web3("eth", rpc_url)
         if not w3.is_connected():
             raise Exception("Ethereum RPC tidak terkoneksi!")
         balance_wei = w3.eth.get_balance(Web3.to_checksum_address(address))
@@ -45,9 +48,7 @@ async def send_eth(
     admin_account = Account.from_key(private_key)
 
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("Ethereum RPC tidak terkoneksi!")
+        w3 = get_batch_web3("eth", rpc_url)
 
         sender_address = admin_account.address
 
@@ -56,24 +57,38 @@ async def send_eth(
                 f"Destination sama dengan source! Transaksi dibatalkan: {destination_wallet}"
             )
 
-        sender_balance = get_balance(sender_address, rpc_url)
-        if sender_balance is None or sender_balance < amount_eth:
+        # 3 call independen → satu JSON-RPC batch (satu round trip), nonce dari nonce_manager
+        balance_wei, gas_price, chain_id = await asyncio.gather(
+            w3.eth.get_balance(sender_address),
+            w3.eth.gas_price,
+            w3.eth.chain_id,
+        )
+        sender_balance = w3.from_wei(balance_wei, "ether")
+        logger.info(f"💰 Saldo {sender_address}: {sender_balance} ETH")
+        if sender_balance < amount_eth:
             raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} ETH")
 
-        nonce = w3.eth.get_transaction_count(sender_address)
         value = w3.to_wei(amount_eth, "ether")
 
-        tx = {
-            "nonce": nonce,
-            "to": Web3.to_checksum_address(destination_wallet),
-            "value": value,
-            "gas": 21000,
-            "gasPrice": w3.eth.gas_price,
-            "chainId": w3.eth.chain_id,
-        }
+        def sign(nonce: int):
+            tx = {
+                "nonce": nonce,
+                "to": Web3.to_checksum_address(destination_wallet),
+                "value": value,
+                "gas": 21000,
+                "gasPrice": gas_price,
+                "chainId": chain_id,
+            }
+            return w3.eth.account.sign_transaction(tx, private_key)
 
-        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = await nonce_manager.send(
+            chain_id,
+            sender_address,
+            lambda: w3.eth.get_transaction_count(sender_address, "pending"),
+            sign,
+            w3.eth.send_raw_transaction,
+            w3.eth.get_transaction,
+        )
         logger.info(
             f"✅ Kirim {amount_eth} ETH ke {destination_wallet}, tx_hash: {tx_hash.hex()}"
         )
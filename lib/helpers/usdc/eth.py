@@ -3,12 +3,15 @@ import logging
 import asyncio
 from web3 import Web3
 from config import ETH_ACCOUNT, ETH_RPC_URL, ETH_USDC_ADDRESS, ETH_CHAIN_ID
+from lib.token_registry import token_registry
+from lib.circuit_breaker import guard_provider
+from lib.nonce_manager import nonce_manager
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
 # ===== Client Ethereum =====
-w3_eth = Web3(Web3.HTTPProvider(ETH_RPC_URL)) if ETH_RPC_URL else None
+w3_eth = Web3(guard_provider(Web3.HTTPProvider(ETH_RPC_URL))) if ETH_RPC_URL else None
 
 # ===== ERC20 ABI =====
 ERC20_ABI = [
@@ -23,11 +26,8 @@ def get_usdc_balance(wallet_address: str) -> float:
         if not w3_eth:
             raise Exception("Ethereum RPC tidak tersedia")
         contract = w3_eth.eth.contract(address=ETH_USDC_ADDRESS, abi=ERC20_ABI)
-        try:
-            decimals = contract.functions.decimals().call()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDC)")
-            decimals = 6
+        # decimals dari token registry (tanpa RPC), dicek ke chain sekali di background
+        decimals = token_registry.resolve_decimals("eth", "usdc", contract.functions.decimals().call, default=6)
         balance = contract.functions.balanceOf(wallet_address).call() / (10 ** decimals)
         logger.info(f"💰 Saldo USDC {wallet_address}: {balance} USDC")
         return balance
@@ -52,33 +52,33 @@ async def wait_tx_receipt_async(tx_hash: str, poll_interval: int = 5, timeout: i
             raise TimeoutError(f"⏳ Timeout tunggu receipt tx {tx_hash}")
         await asyncio.sleep(poll_interval)
 
-# ===== Fungsi Kirim USDC ERC20 aman =====
-async def send_usdc_eth(destination_wallet: str, amount: float):
-    try:
-        if not w3_eth or not ETH_ACCOUNT:
-            raise Exception("Ethereum RPC atau account tidak tersedia")
+# ===== Broadcast USDC ERC20 (tanpa nunggu receipt) =====
+def broadcast_usdc_eth(destination_wallet: str, amount: float):
+    """
+    Sign & broadcast transfer USDC ERC20 dari wallet service, return tx_hash tanpa nunggu receipt.
+    Error sebelum broadcast dilempar; broadcast tidak jelas → BroadcastUnknown (tx_hash lokal).
+    """
+    if not w3_eth or not ETH_ACCOUNT:
+        raise Exception("Ethereum RPC atau account tidak tersedia")
 
-        contract = w3_eth.eth.contract(address=ETH_USDC_ADDRESS, abi=ERC20_ABI)
+    contract = w3_eth.eth.contract(address=ETH_USDC_ADDRESS, abi=ERC20_ABI)
 
-        try:
-            decimals = contract.functions.decimals().call()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDC)")
-            decimals = 6
+    # decimals dari token registry, dicek sinkron ke chain sekali per proses
+    decimals = token_registry.resolve_decimals("eth", "usdc", contract.functions.decimals().call, default=6)
 
-        # log saldo sebelum kirim
-        get_usdc_balance(ETH_ACCOUNT.address)
-        get_usdc_balance(destination_wallet)
+    # log saldo sebelum kirim
+    get_usdc_balance(ETH_ACCOUNT.address)
+    get_usdc_balance(destination_wallet)
 
-        # cek balance cukup
-        balance_usdc = contract.functions.balanceOf(ETH_ACCOUNT.address).call() / (10 ** decimals)
-        if amount > balance_usdc:
-            raise Exception(f"USDC balance tidak cukup: {balance_usdc} < {amount}")
+    # cek balance cukup
+    balance_usdc = contract.functions.balanceOf(ETH_ACCOUNT.address).call() / (10 ** decimals)
+    if amount > balance_usdc:
+        raise Exception(f"USDC balance tidak cukup: {balance_usdc} < {amount}")
 
-        value = int(amount * (10 ** decimals))
-        nonce = w3_eth.eth.get_transaction_count(ETH_ACCOUNT.address, "pending")
+    value = int(amount * (10 ** decimals))
 
-        # build tx final
+    # build tx final
+    def sign(nonce: int):
         tx = contract.functions.transfer(
             Web3.to_checksum_address(destination_wallet),
             value
@@ -90,8 +90,23 @@ async def send_usdc_eth(destination_wallet: str, amount: float):
             "from": ETH_ACCOUNT.address
         })
 
-        signed_tx = w3_eth.eth.account.sign_transaction(tx, ETH_ACCOUNT.key)
-        tx_hash = w3_eth.eth.send_raw_transaction(signed_tx.raw_transaction)
+        return w3_eth.eth.account.sign_transaction(tx, ETH_ACCOUNT.key)
+
+    # nonce dari nonce_manager: payout paralel tidak bentrok, tanpa baca nonce ke node tiap kirim
+    return nonce_manager.send_sync(
+        ETH_CHAIN_ID,
+        ETH_ACCOUNT.address,
+        lambda: w3_eth.eth.get_transaction_count(ETH_ACCOUNT.address, "pending"),
+        sign,
+        w3_eth.eth.send_raw_transaction,
+        w3_eth.eth.get_transaction,
+    )
+
+
+# ===== Fungsi Kirim USDC ERC20 aman =====
+async def send_usdc_eth(destination_wallet: str, amount: float):
+    try:
+        tx_hash = broadcast_usdc_eth(destination_wallet, amount)
         logger.info(f"🕓 Menunggu konfirmasi transaksi {tx_hash.hex()}...")
 
         receipt = await wait_tx_receipt_async(tx_hash.hex())
@@ -9,6 +9,11 @@ from solana.rpc.api import Client
 from solana.rpc.types import TxOpts
 from spl.token.constants import TOKEN_PROGRAM_ID
 from spl.token.instructions import transfer_checked, create_associated_token_account, get_associated_token_address, TransferCheckedParams
+from lib.solana_accounts import derive_ata, decode_token_amount, decode_mint_decimals
+from lib.token_registry import token_registry
+from lib.circuit_breaker import guard_provider
+from lib.nonce_manager import BroadcastUnknown
+from lib.rpc_router import is_transport_error
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
@@ -18,6 +23,7 @@ USDC_MINT_ADDRESS = os.getenv("SOL_USDC_ADDRESS")  # USDC SPL token address
 SECRET_KEY_BASE58 = os.getenv("SOLANA_PRIVATE_KEY")  # Admin private key
 
 client = Client(SOLANA_RPC_URL)
+guard_provider(client._provider, SOLANA_RPC_URL)
 
 # Load keypair
 if SECRET_KEY_BASE58:
@@ -54,15 +60,19 @@ def get_usdc_balance(wallet_address: str) -> float:
     try:
         owner_pub = Pubkey.from_string(wallet_address)
         mint_pub = Pubkey.from_string(USDC_MINT_ADDRESS)
-        token_account = get_associated_token_address(owner_pub, mint_pub)
-        resp = client.get_account_info(token_account)
-        if resp.value is None:
+        token_account = derive_ata(owner_pub, mint_pub)
+        # ATA + mint dalam satu getMultipleAccounts, saldo & decimals di-decode lokal
+        ata_info, mint_info = client.get_multiple_accounts(
+            [token_account, mint_pub], encoding="base64"
+        ).value
+        if ata_info is None:
             logger.info(f"ℹ️ ATA belum ada untuk {wallet_address}, saldo = 0")
             return 0.0
+        if mint_info is None:
+            raise ValueError(f"Mint USDC {mint_pub} tidak ditemukan")
 
-        bal_resp = client.get_token_account_balance(token_account)
-        balance_raw = int(bal_resp.value.amount)
-        decimals = int(bal_resp.value.decimals)
+        balance_raw = decode_token_amount(bytes(ata_info.data))
+        decimals = decode_mint_decimals(bytes(mint_info.data))
         balance = balance_raw / (10 ** decimals)
         logger.info(f"💰 Saldo USDC {wallet_address}: {balance} USDC")
         return balance
@@ -72,6 +82,11 @@ def get_usdc_balance(wallet_address: str) -> float:
         return 0.0
 
 
+def _mint_decimals(mint_pub: Pubkey) -> int:
+    """Decimals mint on-chain, dipakai token registry untuk verifikasi lazy"""
+    return decode_mint_decimals(bytes(client.get_account_info(mint_pub).value.data))
+
+
 def send_tx(tx: Transaction, signer: Keypair) -> str:
     """Helper untuk kirim transaction, return string signature"""
     raw_txn = bytes(tx)
@@ -85,52 +100,66 @@ def send_tx(tx: Transaction, signer: Keypair) -> str:
         return signature.to_string()
     return str(signature)
 
-def send_usdc_solana(destination_wallet: str, amount: float):
-    """Kirim USDC SPL ke wallet tujuan"""
-    try:
-        if not ADMIN_KEYPAIR:
-            raise Exception("Private key tidak ditemukan!")
+def broadcast_usdc_solana(destination_wallet: str, amount: float) -> str:
+    """
+    Sign & kirim transfer USDC SPL dari wallet service, return signature tanpa nunggu konfirmasi.
+    Error sebelum broadcast / ditolak preflight dilempar; error transport → BroadcastUnknown
+    (signature lokal, cek getSignatureStatuses sebelum kirim ulang).
+    """
+    if not ADMIN_KEYPAIR:
+        raise Exception("Private key tidak ditemukan!")
+
+    if destination_wallet == str(ADMIN_KEYPAIR.pubkey()):
+        raise ValueError(f"Destination sama dengan source! Transaksi dibatalkan: {destination_wallet}")
+
+    mint_pub = Pubkey.from_string(USDC_MINT_ADDRESS)
+    dest_pub = Pubkey.from_string(destination_wallet)
+    decimals = token_registry.resolve_decimals(
+        "sol", "usdc", lambda: _mint_decimals(mint_pub), default=6
+    )
+    amount_int = int(amount * (10 ** decimals))
+
+    # ATA
+    sender_ata = get_or_create_ata(ADMIN_KEYPAIR.pubkey(), mint_pub, ADMIN_KEYPAIR)
+    dest_ata = get_or_create_ata(dest_pub, mint_pub, ADMIN_KEYPAIR)
+
+    # Cek saldo dulu
+    sender_balance = get_usdc_balance(str(ADMIN_KEYPAIR.pubkey()))
+    if sender_balance < amount:
+        raise Exception(f"Saldo USDC tidak cukup! Diminta: {amount}, tersedia: {sender_balance}")
+
+    logger.info(f"🔹 Sender ATA: {sender_ata}, Receiver ATA: {dest_ata}, Amount: {amount} USDC ({amount_int} units)")
+
+    # Transaction
+    tx_transfer = Transaction.new_signed_with_payer(
+        [transfer_checked(
+            TransferCheckedParams(
+                program_id=TOKEN_PROGRAM_ID,
+                source=sender_ata,
+                mint=mint_pub,
+                dest=dest_ata,
+                owner=ADMIN_KEYPAIR.pubkey(),
+                amount=amount_int,
+                decimals=decimals
+            )
+        )],
+        payer=ADMIN_KEYPAIR.pubkey(),
+        signing_keypairs=[ADMIN_KEYPAIR],
+        recent_blockhash=client.get_latest_blockhash().value.blockhash
+    )
 
-        if destination_wallet == str(ADMIN_KEYPAIR.pubkey()):
-            logger.warning(f"❌ Destination sama dengan source! Transaksi dibatalkan: {destination_wallet}")
-            return None
+    try:
+        return send_tx(tx_transfer, ADMIN_KEYPAIR)
+    except Exception as e:
+        if is_transport_error(e):
+            raise BroadcastUnknown(str(tx_transfer.signatures[0]), None, e) from e
+        raise
 
-        mint_pub = Pubkey.from_string(USDC_MINT_ADDRESS)
-        dest_pub = Pubkey.from_string(destination_wallet)
-        decimals = 6
-        amount_int = int(amount * (10 ** decimals))
-
-        # ATA
-        sender_ata = get_or_create_ata(ADMIN_KEYPAIR.pubkey(), mint_pub, ADMIN_KEYPAIR)
-        dest_ata = get_or_create_ata(dest_pub, mint_pub, ADMIN_KEYPAIR)
-
-        # Cek saldo dulu
-        sender_balance = get_usdc_balance(str(ADMIN_KEYPAIR.pubkey()))
-        if sender_balance < amount:
-            logger.error(f"❌ Saldo USDC tidak cukup! Diminta: {amount}, tersedia: {sender_balance}")
-            return None
-
-        logger.info(f"🔹 Sender ATA: {sender_ata}, Receiver ATA: {dest_ata}, Amount: {amount} USDC ({amount_int} units)")
-
-        # Transaction
-        tx_transfer = Transaction.new_signed_with_payer(
-            [transfer_checked(
-                TransferCheckedParams(
-                    program_id=TOKEN_PROGRAM_ID,
-                    source=sender_ata,
-                    mint=mint_pub,
-                    dest=dest_ata,
-                    owner=ADMIN_KEYPAIR.pubkey(),
-                    amount=amount_int,
-                    decimals=decimals
-                )
-            )],
-            payer=ADMIN_KEYPAIR.pubkey(),
-            signing_keypairs=[ADMIN_KEYPAIR],
-            recent_blockhash=client.get_latest_blockhash().value.blockhash
-        )
 
-        sig = send_tx(tx_transfer, ADMIN_KEYPAIR)
+def send_usdc_solana(destination_wallet: str, amount: float):
+    """Kirim USDC SPL ke wallet tujuan"""
+    try:
+        sig = broadcast_usdc_solana(destination_wallet, amount)
         logger.info(f"✅ USDC SOL berhasil dikirim ke {destination_wallet}, sig={sig}")
         return sig
 
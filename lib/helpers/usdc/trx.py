@@ -7,6 +7,10 @@ from tronpy.keys import PrivateKey
 from tronpy.providers import HTTPProvider
 from tronpy.exceptions import TransactionNotFound
 from config import TRON_FULL_NODE, TRON_PRIVATE_KEY, TRC20_USDC_ADDRESS
+from lib.token_registry import token_registry
+from lib.circuit_breaker import guard_provider
+from lib.nonce_manager import BroadcastUnknown
+from lib.rpc_router import is_transport_error
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
@@ -24,7 +28,7 @@ TRC20_ABI = [
 ]
 
 # Setup client TRX
-client = Tron(HTTPProvider(TRON_FULL_NODE)) if TRON_FULL_NODE else None
+client = Tron(guard_provider(HTTPProvider(TRON_FULL_NODE))) if TRON_FULL_NODE else None
 account = PrivateKey(bytes.fromhex(TRON_PRIVATE_KEY)) if TRON_PRIVATE_KEY else None
 TRON_ADDRESS = account.public_key.to_base58check_address() if account else None
 
@@ -39,11 +43,8 @@ def get_usdc_balance(wallet_address: str) -> float:
 
         contract = client.get_contract(TRC20_USDC_ADDRESS)
 
-        try:
-            decimals = contract.functions.decimals()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDC)")
-            decimals = 6
+        # decimals dari token registry (tanpa RPC), dicek ke chain sekali di background
+        decimals = token_registry.resolve_decimals("trx", "usdc", contract.functions.decimals, default=6)
 
         balance_raw = contract.functions.balanceOf(wallet_address)
         balance = balance_raw / (10 ** decimals)
@@ -58,46 +59,55 @@ def get_usdc_balance(wallet_address: str) -> float:
 
 # 📍 lib/helpers/usdc/trx.py
 
-async def send_usdc_trx(destination_wallet: str, amount: float):
+def broadcast_usdc_trx(destination_wallet: str, amount: float) -> str:
     """
-    Kirim USDC TRC20 ke wallet tujuan dengan logging lengkap, retry, dan pengecekan energy/saldo.
+    Sign & broadcast transfer USDC TRC20 dari wallet service, return txid tanpa nunggu konfirmasi.
+    Error sebelum broadcast dilempar; broadcast tidak jelas (error transport) → BroadcastUnknown (txid lokal).
     """
+    if not client or not account:
+        raise Exception("Tron node atau private key tidak tersedia")
+
+    # Ambil kontrak USDC
+    contract = client.get_contract(TRC20_USDC_ADDRESS)
+
+    # decimals dari token registry, dicek sinkron ke chain sekali per proses
+    decimals = token_registry.resolve_decimals("trx", "usdc", contract.functions.decimals, default=6)
+
+    value = int(amount * (10 ** decimals))
+
+    # Cek saldo USDC admin
+    admin_balance = get_usdc_balance(TRON_ADDRESS)
+    if admin_balance < amount:
+        raise Exception(f"Saldo USDC admin tidak cukup: {admin_balance} < {amount}")
+
+    # Cek TRX untuk energy
+    admin_trx_balance = client.get_account(TRON_ADDRESS)["balance"] / 1_000_000
+    if admin_trx_balance < 0.1:  # threshold minimal
+        raise Exception(f"Saldo TRX admin terlalu rendah untuk bayar fee: {admin_trx_balance} TRX")
+
+    # Build & sign transaksi
+    txn = (
+        contract.functions.transfer(destination_wallet, value)
+        .with_owner(TRON_ADDRESS)
+        .build()
+        .sign(account)
+    )
+
     try:
-        if not client or not account:
-            raise Exception("Tron node atau private key tidak tersedia")
+        txn.broadcast()
+    except Exception as e:
+        if is_transport_error(e):
+            raise BroadcastUnknown(txn.txid, None, e) from e
+        raise
+    return txn.txid
 
-        # Ambil kontrak USDC
-        contract = client.get_contract(TRC20_USDC_ADDRESS)
 
-        # Ambil decimals
-        try:
-            decimals = contract.functions.decimals()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDC)")
-            decimals = 6
-
-        value = int(amount * (10 ** decimals))
-
-        # Cek saldo USDC admin
-        admin_balance = get_usdc_balance(TRON_ADDRESS)
-        if admin_balance < amount:
-            raise Exception(f"Saldo USDC admin tidak cukup: {admin_balance} < {amount}")
-
-        # Cek TRX untuk energy
-        admin_trx_balance = client.get_account(TRON_ADDRESS)["balance"] / 1_000_000
-        if admin_trx_balance < 0.1:  # threshold minimal
-            raise Exception(f"Saldo TRX admin terlalu rendah untuk bayar fee: {admin_trx_balance} TRX")
-
-        # Build & sign transaksi
-        txn = (
-            contract.functions.transfer(destination_wallet, value)
-            .with_owner(TRON_ADDRESS)
-            .build()
-            .sign(account)
-        )
-
-        tx_result = txn.broadcast()
-        tx_hash = tx_result["txid"]
+async def send_usdc_trx(destination_wallet: str, amount: float):
+    """
+    Kirim USDC TRC20 ke wallet tujuan dengan logging lengkap, retry, dan pengecekan energy/saldo.
+    """
+    try:
+        tx_hash = broadcast_usdc_trx(destination_wallet, amount)
         logger.info(f"🕓 Menunggu konfirmasi transaksi TRX {tx_hash}...")
 
         # Retry cek transaksi
@@ -5,12 +5,15 @@ import time
 from functools import partial
 from web3 import Web3
 from config import BASE_ACCOUNT, BASE_RPC_URL, BASE_USDT_ADDRESS
+from lib.token_registry import token_registry
+from lib.circuit_breaker import guard_provider
+from lib.nonce_manager import nonce_manager
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
 # Setup client Base
-w3_base = Web3(Web3.HTTPProvider(BASE_RPC_URL))
+w3_base = Web3(guard_provider(Web3.HTTPProvider(BASE_RPC_URL)))
 account_address = Web3.to_checksum_address(BASE_ACCOUNT.address)
 private_key = BASE_ACCOUNT.key
 
@@ -32,7 +35,7 @@ contract = w3_base.eth.contract(address=BASE_USDT_ADDRESS, abi=ERC20_ABI)
 def get_usdt_balance(wallet_address: str) -> float:
     """Cek saldo USDT Base"""
     try:
-        decimals = contract.functions.decimals().call()
+        decimals = token_registry.resolve_decimals("base", "usdt", contract.functions.decimals().call)
         balance_raw = contract.functions.balanceOf(wallet_address).call()
         balance = balance_raw / (10 ** decimals)
         logger.info(f"💰 Saldo USDT Base {wallet_address}: {balance}")
@@ -42,24 +45,42 @@ def get_usdt_balance(wallet_address: str) -> float:
         return 0.0
 
 
-def send_usdt_base_sync(destination_wallet: str, amount: float):
-    """Kirim USDT Base (synchronous, robust)"""
-    try:
-        decimals = contract.functions.decimals().call()
-        value = int(amount * (10 ** decimals))
-        nonce = w3_base.eth.get_transaction_count(account_address, 'pending')
-        safe_gas_price = int(w3_base.eth.gas_price * 1.2)
+def broadcast_usdt_base(destination_wallet: str, amount: float):
+    """
+    Sign & broadcast transfer USDT Base dari wallet service, return tx_hash tanpa nunggu receipt.
+    Error sebelum broadcast dilempar; broadcast tidak jelas → BroadcastUnknown (tx_hash lokal).
+    """
+    decimals = token_registry.resolve_decimals("base", "usdt", contract.functions.decimals().call)
+    value = int(amount * (10 ** decimals))
+    chain_id = w3_base.eth.chain_id
+    safe_gas_price = int(w3_base.eth.gas_price * 1.2)
 
+    def sign(nonce: int):
         txn = contract.functions.transfer(destination_wallet, value).build_transaction({
             "from": account_address,
             "nonce": nonce,
             "gas": 300000,  # lebih aman
             "gasPrice": safe_gas_price,
-            "chainId": w3_base.eth.chain_id,
+            "chainId": chain_id,
         })
 
-        signed_txn = w3_base.eth.account.sign_transaction(txn, private_key=private_key)
-        tx_hash = w3_base.eth.send_raw_transaction(signed_txn.raw_transaction)
+        return w3_base.eth.account.sign_transaction(txn, private_key=private_key)
+
+    # nonce dari nonce_manager: payout paralel tidak bentrok, tanpa baca nonce ke node tiap kirim
+    return nonce_manager.send_sync(
+        chain_id,
+        account_address,
+        lambda: w3_base.eth.get_transaction_count(account_address, "pending"),
+        sign,
+        w3_base.eth.send_raw_transaction,
+        w3_base.eth.get_transaction,
+    )
+
+
+def send_usdt_base_sync(destination_wallet: str, amount: float):
+    """Kirim USDT Base (synchronous, robust)"""
+    try:
+        tx_hash = broadcast_usdt_base(destination_wallet, amount)
         logger.info(f"🕓 Menunggu konfirmasi transaksi {tx_hash.hex()}...")
 
         # === retry loop: cek sampai mined atau timeout 180 detik ===
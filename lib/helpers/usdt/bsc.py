@@ -3,12 +3,15 @@ import logging
 import time
 from web3 import Web3
 from config import BSC_ACCOUNT, BSC_RPC_URL, BSC_USDT_ADDRESS, BSC_CHAIN_ID  
+from lib.token_registry import token_registry
+from lib.circuit_breaker import guard_provider
+from lib.nonce_manager import nonce_manager
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
 # Setup client BSC
-w3_bsc = Web3(Web3.HTTPProvider(BSC_RPC_URL)) if BSC_RPC_URL else None
+w3_bsc = Web3(guard_provider(Web3.HTTPProvider(BSC_RPC_URL))) if BSC_RPC_URL else None
 
 # ERC20 minimal ABI
 ERC20_ABI = [
@@ -45,12 +48,8 @@ def get_usdt_balance(wallet_address: str, retries: int = 3) -> float:
 
     contract = w3_bsc.eth.contract(address=BSC_USDT_ADDRESS, abi=ERC20_ABI)
 
-    # ambil decimals
-    try:
-        decimals = contract.functions.decimals().call()
-    except Exception:
-        logger.warning("⚠️ Gagal baca decimals, pakai default 18 (BSC USDT)")
-        decimals = 18
+    # decimals dari token registry (tanpa RPC), dicek ke chain sekali di background
+    decimals = token_registry.resolve_decimals("bsc", "usdt", contract.functions.decimals().call, default=18)
 
     attempt = 0
     while attempt < retries:
@@ -68,19 +67,18 @@ def get_usdt_balance(wallet_address: str, retries: int = 3) -> float:
     return 0.0
 
 
-async def send_usdt_bsc(destination_wallet: str, amount: float):
+def broadcast_usdt_bsc(destination_wallet: str, amount: float):
+    """
+    Sign & broadcast transfer USDT BEP20 dari wallet service, return tx_hash tanpa nunggu receipt.
+    Error sebelum broadcast dilempar; broadcast tidak jelas → BroadcastUnknown (tx_hash lokal).
+    """
     if not w3_bsc or not BSC_ACCOUNT:
-        logger.error("❌ BSC RPC atau account tidak tersedia")
-        return None
+        raise Exception("BSC RPC atau account tidak tersedia")
 
     contract = w3_bsc.eth.contract(address=BSC_USDT_ADDRESS, abi=ERC20_ABI)
 
-    # ambil decimals
-    try:
-        decimals = contract.functions.decimals().call()
-    except Exception:
-        logger.warning("⚠️ Gagal baca decimals, pakai default 18 (BSC USDT)")
-        decimals = 18
+    # decimals dari token registry, dicek sinkron ke chain sekali per proses
+    decimals = token_registry.resolve_decimals("bsc", "usdt", contract.functions.decimals().call, default=18)
 
     value = int(amount * (10 ** decimals))
 
@@ -88,14 +86,11 @@ async def send_usdt_bsc(destination_wallet: str, amount: float):
     get_usdt_balance(BSC_ACCOUNT.address)
     get_usdt_balance(destination_wallet)
 
-    try:
-        # ambil nonce pending
-        nonce = w3_bsc.eth.get_transaction_count(BSC_ACCOUNT.address, "pending")
-
-        # gas price aman
-        current_gas_price = w3_bsc.eth.gas_price
-        safe_gas_price = int(current_gas_price * 1.2)
+    # gas price aman
+    current_gas_price = w3_bsc.eth.gas_price
+    safe_gas_price = int(current_gas_price * 1.2)
 
+    def sign(nonce: int):
         tx = contract.functions.transfer(
             Web3.to_checksum_address(destination_wallet),
             value
@@ -106,8 +101,22 @@ async def send_usdt_bsc(destination_wallet: str, amount: float):
             "nonce": nonce,
         })
 
-        signed_tx = w3_bsc.eth.account.sign_transaction(tx, BSC_ACCOUNT.key)
-        tx_hash = w3_bsc.eth.send_raw_transaction(signed_tx.raw_transaction)
+        return w3_bsc.eth.account.sign_transaction(tx, BSC_ACCOUNT.key)
+
+    # nonce dari nonce_manager: payout paralel tidak bentrok, tanpa baca nonce ke node tiap kirim
+    return nonce_manager.send_sync(
+        BSC_CHAIN_ID,
+        BSC_ACCOUNT.address,
+        lambda: w3_bsc.eth.get_transaction_count(BSC_ACCOUNT.address, "pending"),
+        sign,
+        w3_bsc.eth.send_raw_transaction,
+        w3_bsc.eth.get_transaction,
+    )
+
+
+async def send_usdt_bsc(destination_wallet: str, amount: float):
+    try:
+        tx_hash = broadcast_usdt_bsc(destination_wallet, amount)
         logger.info(f"🕓 Menunggu konfirmasi transaksi {tx_hash.hex()}...")
 
         receipt = w3_bsc.eth.wait_for_transaction_receipt(tx_hash, timeout=180)
@@ -2,12 +2,15 @@
 import logging
 from web3 import Web3
 from config import ETH_ACCOUNT, ETH_RPC_URL, ETH_USDT_ADDRESS, ETH_CHAIN_ID
+from lib.token_registry import token_registry
+from lib.circuit_breaker import guard_provider
+from lib.nonce_manager import nonce_manager
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
 # Setup client ETH
-w3_eth = Web3(Web3.HTTPProvider(ETH_RPC_URL)) if ETH_RPC_URL else None
+w3_eth = Web3(guard_provider(Web3.HTTPProvider(ETH_RPC_URL))) if ETH_RPC_URL else None
 
 # ERC20 minimal ABI
 ERC20_ABI = [
@@ -44,11 +47,8 @@ def get_usdt_balance(wallet_address: str) -> float:
 
         contract = w3_eth.eth.contract(address=ETH_USDT_ADDRESS, abi=ERC20_ABI)
 
-        try:
-            decimals = contract.functions.decimals().call()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDT)")
-            decimals = 6
+        # decimals dari token registry (tanpa RPC), dicek ke chain sekali di background
+        decimals = token_registry.resolve_decimals("eth", "usdt", contract.functions.decimals().call, default=6)
 
         balance_raw = contract.functions.balanceOf(wallet_address).call()
         balance = balance_raw / (10 ** decimals)
@@ -60,32 +60,30 @@ def get_usdt_balance(wallet_address: str) -> float:
         return 0.0
 
 
-async def send_usdt_eth(destination_wallet: str, amount: float):
-    try:
-        if not w3_eth or not ETH_ACCOUNT:
-            raise Exception("Ethereum RPC atau account tidak tersedia")
-
-        contract = w3_eth.eth.contract(address=ETH_USDT_ADDRESS, abi=ERC20_ABI)
+def broadcast_usdt_eth(destination_wallet: str, amount: float):
+    """
+    Sign & broadcast transfer USDT ERC20 dari wallet service, return tx_hash tanpa nunggu receipt.
+    Error sebelum broadcast dilempar; broadcast tidak jelas → BroadcastUnknown (tx_hash lokal).
+    """
+    if not w3_eth or not ETH_ACCOUNT:
+        raise Exception("Ethereum RPC atau account tidak tersedia")
 
-        try:
-            decimals = contract.functions.decimals().call()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDT)")
-            decimals = 6
+    contract = w3_eth.eth.contract(address=ETH_USDT_ADDRESS, abi=ERC20_ABI)
 
-        value = int(amount * (10 ** decimals))
+    # decimals dari token registry, dicek sinkron ke chain sekali per proses
+    decimals = token_registry.resolve_decimals("eth", "usdt", contract.functions.decimals().call, default=6)
 
-        # log saldo sebelum kirim
-        get_usdt_balance(ETH_ACCOUNT.address)
-        get_usdt_balance(destination_wallet)
+    value = int(amount * (10 ** decimals))
 
-        # ambil nonce pending (untuk menghindari replacement underpriced)
-        nonce = w3_eth.eth.get_transaction_count(ETH_ACCOUNT.address, "pending")
+    # log saldo sebelum kirim
+    get_usdt_balance(ETH_ACCOUNT.address)
+    get_usdt_balance(destination_wallet)
 
-        # gas price aman (20% lebih tinggi dari network)
-        current_gas_price = w3_eth.eth.gas_price
-        safe_gas_price = int(current_gas_price * 1.2)
+    # gas price aman (20% lebih tinggi dari network)
+    current_gas_price = w3_eth.eth.gas_price
+    safe_gas_price = int(current_gas_price * 1.2)
 
+    def sign(nonce: int):
         tx = contract.functions.transfer(
             Web3.to_checksum_address(destination_wallet),
             value
@@ -96,8 +94,22 @@ async def send_usdt_eth(destination_wallet: str, amount: float):
             "nonce": nonce,
         })
 
-        signed_tx = w3_eth.eth.account.sign_transaction(tx, ETH_ACCOUNT.key)
-        tx_hash = w3_eth.eth.send_raw_transaction(signed_tx.raw_transaction)
+        return w3_eth.eth.account.sign_transaction(tx, ETH_ACCOUNT.key)
+
+    # nonce dari nonce_manager: payout paralel tidak bentrok, tanpa baca nonce ke node tiap kirim
+    return nonce_manager.send_sync(
+        ETH_CHAIN_ID,
+        ETH_ACCOUNT.address,
+        lambda: w3_eth.eth.get_transaction_count(ETH_ACCOUNT.address, "pending"),
+        sign,
+        w3_eth.eth.send_raw_transaction,
+        w3_eth.eth.get_transaction,
+    )
+
+
+async def send_usdt_eth(destination_wallet: str, amount: float):
+    try:
+        tx_hash = broadcast_usdt_eth(destination_wallet, amount)
         logger.info(f"🕓 Menunggu konfirmasi transaksi {tx_hash.hex()}...")
 
         # tunggu mined & status sukses
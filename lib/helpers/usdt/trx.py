@@ -7,6 +7,10 @@ from tronpy.keys import PrivateKey
 from tronpy.providers import HTTPProvider
 from tronpy.exceptions import TransactionNotFound
 from config import TRON_FULL_NODE, TRON_PRIVATE_KEY, TRC20_USDT_ADDRESS
+from lib.token_registry import token_registry
+from lib.circuit_breaker import guard_provider
+from lib.nonce_manager import BroadcastUnknown
+from lib.rpc_router import is_transport_error
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
@@ -30,7 +34,7 @@ TRC20_ABI = [
 ]
 
 # Setup client TRX
-client = Tron(HTTPProvider(TRON_FULL_NODE)) if TRON_FULL_NODE else None
+client = Tron(guard_provider(HTTPProvider(TRON_FULL_NODE))) if TRON_FULL_NODE else None
 account = PrivateKey(bytes.fromhex(TRON_PRIVATE_KEY)) if TRON_PRIVATE_KEY else None
 TRON_ADDRESS = account.public_key.to_base58check_address() if account else None
 
@@ -45,11 +49,8 @@ def get_usdt_balance(wallet_address: str) -> float:
 
         contract = client.get_contract(TRC20_USDT_ADDRESS)
 
-        try:
-            decimals = contract.functions.decimals()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDT)")
-            decimals = 6
+        # decimals dari token registry (tanpa RPC), dicek ke chain sekali di background
+        decimals = token_registry.resolve_decimals("trx", "usdt", contract.functions.decimals, default=6)
 
         balance_raw = contract.functions.balanceOf(wallet_address)
         balance = balance_raw / (10 ** decimals)
@@ -62,30 +63,40 @@ def get_usdt_balance(wallet_address: str) -> float:
         return 0.0
 
 
-async def send_usdt_trx(destination_wallet: str, amount: float):
-    try:
-        if not client or not account:
-            raise Exception("Tron node atau private key tidak tersedia")
+def broadcast_usdt_trx(destination_wallet: str, amount: float) -> str:
+    """
+    Sign & broadcast transfer USDT TRC20 dari wallet service, return txid tanpa nunggu konfirmasi.
+    Error sebelum broadcast dilempar; broadcast tidak jelas (error transport) → BroadcastUnknown (txid lokal).
+    """
+    if not client or not account:
+        raise Exception("Tron node atau private key tidak tersedia")
 
-        contract = client.get_contract(TRC20_USDT_ADDRESS)
+    contract = client.get_contract(TRC20_USDT_ADDRESS)
 
-        try:
-            decimals = contract.functions.decimals()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDT)")
-            decimals = 6
+    # decimals dari token registry, dicek sinkron ke chain sekali per proses
+    decimals = token_registry.resolve_decimals("trx", "usdt", contract.functions.decimals, default=6)
 
-        value = int(amount * (10 ** decimals))
+    value = int(amount * (10 ** decimals))
 
-        txn = (
-            contract.functions.transfer(destination_wallet, value)
-            .with_owner(TRON_ADDRESS)
-            .build()
-            .sign(account)
-        )
+    txn = (
+        contract.functions.transfer(destination_wallet, value)
+        .with_owner(TRON_ADDRESS)
+        .build()
+        .sign(account)
+    )
 
-        tx_result = txn.broadcast()
-        tx_hash = tx_result["txid"]
+    try:
+        txn.broadcast()
+    except Exception as e:
+        if is_transport_error(e):
+            raise BroadcastUnknown(txn.txid, None, e) from e
+        raise
+    return txn.txid
+
+
+async def send_usdt_trx(destination_wallet: str, amount: float):
+    try:
+        tx_hash = broadcast_usdt_trx(destination_wallet, amount)
         logger.info(f"🕓 Menunggu konfirmasi transaksi TRX {tx_hash}...")
 
         # === retry loop: cek sampai trx ketemu atau timeout 30 detik ===
@@ -0,0 +1,104 @@
+# 📍 lib/http_client.py
+import os
+import random
+import asyncio
+import logging
+from urllib.parse import urlsplit
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Satu policy timeout/retry/limit untuk semua call upstream (CoinGecko, dll)
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "10"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_PER_HOST = int(os.getenv("UPSTREAM_MAX_PER_HOST", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "60"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_client = None
+_host_limits = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def _create_client() -> httpx.AsyncClient:
+    http2 = _http2_available()
+    logger.info(f"🌐 Upstream HTTP client dibuat (http2={http2})")
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(UPSTREAM_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_CONNECTIONS,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+        headers={"Accept": "application/json"},
+    )
+
+
+async def start_http_client():
+    """Dipanggil dari lifespan main.py"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("🛑 Upstream HTTP client ditutup")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Client bersama (keep-alive pool). Dibuat lazy kalau lifespan tidak jalan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    sem = _host_limits.get(host)
+    if sem is None:
+        sem = _host_limits[host] = asyncio.Semaphore(UPSTREAM_MAX_PER_HOST)
+    return sem
+
+
+async def upstream_request(
+    method: str, url: str, retries: int = UPSTREAM_RETRIES, **kwargs
+) -> httpx.Response:
+    """
+    Request ke upstream lewat client bersama.
+    Retry (backoff + jitter) untuk error koneksi & status 429/5xx,
+    status lain langsung dibalikin ke caller.
+    """
+    client = get_http_client()
+    for attempt in range(retries + 1):
+        try:
+            async with _host_limit(url):
+                resp = await client.request(method, url, **kwargs)
+            if resp.status_code not in RETRY_STATUS or attempt == retries:
+                return resp
+            logger.warning(f"⚠️ {method} {url} status {resp.status_code}, retry {attempt + 1}/{retries}")
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"⚠️ {method} {url} gagal: {e!r}, retry {attempt + 1}/{retries}")
+        await asyncio.sleep(random.uniform(0, 0.5 * 2**attempt))
+
+
+async def upstream_get(url: str, **kwargs) -> httpx.Response:
+    return await upstream_request("GET", url, **kwargs)
@@ -7,6 +7,8 @@ from web3 import Web3
 from web3.middleware.proof_of_authority import ExtraDataToPOAMiddleware
 from lib.supabase_client import supabase
 from lib.coingecko import get_current_price
+from lib.rpc_batch import fetch_receipt_and_block
+from lib.circuit_breaker import breakers, guard_provider
 
 # ================== LOGGING ==================
 logger = logging.getLogger("monitor.bsc")
@@ -26,7 +28,7 @@ class BSCMonitor:
         self.supabase = supabase
         self.wallet_admin = ADMIN_WALLET
         self.tolerance = 0.0001  # toleransi BNB
-        self.w3 = Web3(Web3.LegacyWebSocketProvider(BSC_WSS))
+        self.w3 = Web3(guard_provider(Web3.LegacyWebSocketProvider(BSC_WSS), BSC_WSS))
         self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
         if not self.w3.is_connected():
             logger.error("❌ Gagal connect ke BSC WSS")
@@ -47,7 +49,7 @@ class BSCMonitor:
             logger.error(f"❌ parse_transfer error: {e}")
             return None, None, None
 
-    async def handle_tx(self, tx_hash: str):
+    async def handle_tx(self, tx_hash: str, block_number: int = None):
         amount, sender, receiver = self.parse_transfer(tx_hash)
         logger.info(f"🔹 Handle tx {tx_hash} | amount={amount}, sender={sender}, receiver={receiver}")
         if not amount:
@@ -57,8 +59,7 @@ class BSCMonitor:
         logger.info(f"💲 Harga BNB real-time: {bnb_price_idr} IDR")
 
         try:
-            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-            block = self.w3.eth.get_block(receipt['blockNumber'])
+            receipt, block = fetch_receipt_and_block(self.w3, tx_hash, block_number)
             block_time = datetime.fromtimestamp(block['timestamp'], tz=timezone.utc)
         except Exception as e:
             logger.error(f"❌ get_receipt/block gagal: {e}")
@@ -106,10 +107,12 @@ class BSCMonitor:
                         tx_hash = getattr(tx, 'hash', None) or tx.get('hash')
                         if isinstance(tx_hash, bytes):
                             tx_hash = tx_hash.hex()
-                        asyncio.create_task(self.handle_tx(tx_hash))
+                        asyncio.create_task(self.handle_tx(tx_hash, latest_block.number))
                 last_block = latest_block.number
             except Exception as e:
                 logger.error(f"❌ Error di loop block: {e}, retry dalam 5s...")
+                # breaker open → tunggu sampai half-open sebelum loop lanjut
+                await asyncio.sleep(breakers.retry_delay(BSC_WSS, 0))
             await asyncio.sleep(2)  # loop tiap 2 detik
 
 
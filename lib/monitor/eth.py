@@ -6,6 +6,8 @@ from datetime import datetime, timezone
 from web3 import Web3
 from lib.supabase_client import supabase
 from lib.coingecko import get_current_price
+from lib.rpc_batch import fetch_receipt_and_block
+from lib.circuit_breaker import breakers, guard_provider
 
 # ================== LOGGING ==================
 logger = logging.getLogger("monitor.ethereum")
@@ -25,7 +27,7 @@ class EthereumMonitor:
         self.supabase = supabase
         self.wallet_admin = ADMIN_WALLET
         self.tolerance = 0.0001  # toleransi ETH
-        self.w3 = Web3(Web3.LegacyWebSocketProvider(ETH_WSS))
+        self.w3 = Web3(guard_provider(Web3.LegacyWebSocketProvider(ETH_WSS), ETH_WSS))
         self.processed_txs = set()
         if not self.w3.is_connected():
             logger.error("❌ Gagal connect ke Ethereum WSS")
@@ -59,11 +61,9 @@ class EthereumMonitor:
         sender = tx["from"]
         eth_price_idr = await get_current_price("eth")
         try:
-            receipt = await asyncio.to_thread(
-                self.w3.eth.get_transaction_receipt, tx_hash
-            )
-            block = await asyncio.to_thread(
-                self.w3.eth.get_block, receipt["blockNumber"]
+            # blockNumber sudah ada di tx → receipt & block satu batch
+            receipt, block = await asyncio.to_thread(
+                fetch_receipt_and_block, self.w3, tx_hash, tx.get("blockNumber")
             )
             block_time = datetime.fromtimestamp(block["timestamp"], tz=timezone.utc)
         except Exception as e:
@@ -106,7 +106,8 @@ class EthereumMonitor:
                             asyncio.create_task(self.handle_tx(tx_hash))
             except Exception as e:
                 logger.error(f"❌ Error di loop block: {e}, retry 5s")
-                await asyncio.sleep(5)
+                # breaker open → tunggu sampai half-open, bukan hajar node yang sakit tiap 5 detik
+                await asyncio.sleep(breakers.retry_delay(ETH_WSS, 5))
             await asyncio.sleep(2)
 
 
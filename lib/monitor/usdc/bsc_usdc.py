@@ -10,6 +10,8 @@ from lib.supabase_client import supabase
 from lib.midtrans_disburse import disburse
 from notifications.jual import JualNotifier
 from lib.coingecko import get_current_price
+from lib.rpc_batch import fetch_receipt_and_block
+from lib.circuit_breaker import breakers, guard_provider
 
 # ================== LOGGING ==================
 logger = logging.getLogger("monitor.bsc_usdc")
@@ -31,7 +33,7 @@ class BSCUSDCMonitor:
     def __init__(self):
         self.supabase = supabase
         self.wallet_admin = ADMIN_WALLET
-        self.w3 = Web3(Web3.LegacyWebSocketProvider(BSC_WSS))
+        self.w3 = Web3(guard_provider(Web3.LegacyWebSocketProvider(BSC_WSS), BSC_WSS))
         # ✅ Inject POA middleware BSC
         self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
 
@@ -78,7 +80,7 @@ class BSCUSDCMonitor:
         self.transfer_event_abi = self.usdc_contract.events.Transfer().abi
 
     # ================== Handle TX ==================
-    async def handle_tx(self, tx_hash: str, amount: float, sender: str, receiver: str):
+    async def handle_tx(self, tx_hash: str, amount: float, sender: str, receiver: str, block_number: int = None):
         logger.info(f"🔹 Handle USDC tx {tx_hash} | amount={amount}, sender={sender}, receiver={receiver}")
         if not amount:
             return
@@ -87,8 +89,7 @@ class BSCUSDCMonitor:
         logger.info(f"💲 Harga USDC real-time: {usdc_price_idr} IDR")
 
         try:
-            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-            block = self.w3.eth.get_block(receipt['blockNumber'])
+            receipt, block = fetch_receipt_and_block(self.w3, tx_hash, block_number)
             block_time = datetime.fromtimestamp(block['timestamp'], tz=timezone.utc)
         except Exception as e:
             logger.error(f"❌ get_receipt/block gagal: {e}")
@@ -161,14 +162,15 @@ class BSCUSDCMonitor:
                         logger.info(f"📥 Event Transfer: {value} token dari {sender} ke {receiver}")
 
                         if receiver.lower() == self.wallet_admin.lower():
-                            asyncio.create_task(self.handle_tx(tx_hash, value, sender, receiver))
+                            asyncio.create_task(self.handle_tx(tx_hash, value, sender, receiver, evt['blockNumber']))
                     except Exception as e:
                         logger.error(f"⚠️ Gagal parse log: {e}")
 
                 last_block = latest_block + 1
             except Exception as e:
                 logger.error(f"❌ Error di loop block: {e}, retry dalam 5s...")
-                await asyncio.sleep(5)
+                # breaker open → tunggu sampai half-open, bukan hajar node yang sakit tiap 5 detik
+                await asyncio.sleep(breakers.retry_delay(BSC_WSS, 5))
             await asyncio.sleep(2)
 
 
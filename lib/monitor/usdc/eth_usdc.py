@@ -10,6 +10,8 @@ from lib.supabase_client import supabase
 from lib.midtrans_disburse import disburse
 from notifications.jual import JualNotifier
 from lib.coingecko import get_current_price
+from lib.rpc_batch import fetch_receipt_and_block
+from lib.circuit_breaker import breakers, guard_provider
 
 # ================== LOGGING ==================
 logger = logging.getLogger("monitor.ethereum_usdc")
@@ -31,7 +33,7 @@ class EthereumUSDCMonitor:
     def __init__(self):
         self.supabase = supabase
         self.wallet_admin = ADMIN_WALLET
-        self.w3 = Web3(Web3.LegacyWebSocketProvider(ETH_WSS))
+        self.w3 = Web3(guard_provider(Web3.LegacyWebSocketProvider(ETH_WSS), ETH_WSS))
 
         if not self.w3.is_connected():
             logger.error("❌ Gagal connect ke Ethereum WSS")
@@ -76,7 +78,7 @@ class EthereumUSDCMonitor:
         self.transfer_event_abi = self.usdc_contract.events.Transfer().abi
 
     # ================== Handle TX ==================
-    async def handle_tx(self, tx_hash: str, amount: float, sender: str, receiver: str):
+    async def handle_tx(self, tx_hash: str, amount: float, sender: str, receiver: str, block_number: int = None):
         logger.info(f"🔹 Handle USDC tx {tx_hash} | amount={amount}, sender={sender}, receiver={receiver}")
         if not amount:
             return
@@ -85,8 +87,7 @@ class EthereumUSDCMonitor:
         logger.info(f"💲 Harga USDC real-time: {usdc_price_idr} IDR")
 
         try:
-            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-            block = self.w3.eth.get_block(receipt['blockNumber'])
+            receipt, block = fetch_receipt_and_block(self.w3, tx_hash, block_number)
             block_time = datetime.fromtimestamp(block['timestamp'], tz=timezone.utc)
         except Exception as e:
             logger.error(f"❌ get_receipt/block gagal: {e}")
@@ -155,11 +156,13 @@ class EthereumUSDCMonitor:
                     value = evt['args']['value'] / (10 ** self.decimals)
                     tx_hash = evt['transactionHash'].hex()
                     if receiver.lower() == self.wallet_admin.lower():
-                        asyncio.create_task(self.handle_tx(tx_hash, value, sender, receiver))
+                        asyncio.create_task(self.handle_tx(tx_hash, value, sender, receiver, evt['blockNumber']))
 
                 last_block = latest_block
             except Exception as e:
                 logger.error(f"❌ Error di loop block: {e}, retry dalam 5s...")
+                # breaker open → tunggu sampai half-open sebelum loop lanjut
+                await asyncio.sleep(breakers.retry_delay(ETH_WSS, 0))
             await asyncio.sleep(2)
 
 
@@ -11,6 +11,7 @@ from lib.supabase_client import supabase
 from lib.midtrans_disburse import disburse
 from notifications.jual import JualNotifier
 from lib.coingecko import get_current_price
+from lib.circuit_breaker import breakers, guard_provider, CircuitOpenError
 
 # ================== LOGGING ==================
 logger = logging.getLogger("monitor.trx_usdc")
@@ -32,7 +33,7 @@ class TRXUSDCMonitor:
     def __init__(self):
         self.supabase = supabase
         self.wallet_admin = USDC_WALLET
-        self.client = Tron(provider=HTTPProvider(TRON_NODE))
+        self.client = Tron(provider=guard_provider(HTTPProvider(TRON_NODE), TRON_NODE))
         self.token_contract = self.client.get_contract(USDC_CONTRACT)
         self.decimals = 10 ** 6  # USDC TRX juga 6 decimals
 
@@ -115,6 +116,9 @@ class TRXUSDCMonitor:
                     try:
                         block = self.client.get_block(block_num)
                         txs = block.get("transactions") or []
+                    except CircuitOpenError:
+                        # breaker open: jangan skip block, ulang dari block ini setelah half-open
+                        raise
                     except Exception as e_block:
                         logger.warning(f"⚠️ Skip block {block_num} karena error ambil block: {e_block}")
                         continue
@@ -143,6 +147,8 @@ class TRXUSDCMonitor:
                                 try:
                                     tx_info = self.client.get_transaction_info(tx_id)
                                     event_logs = tx_info.get("log", [])
+                                except CircuitOpenError:
+                                    raise
                                 except Exception as e_txinfo:
                                     logger.warning(f"⚠️ Skip tx {tx_id} karena error get_transaction_info: {e_txinfo}")
                                     continue
@@ -180,6 +186,8 @@ class TRXUSDCMonitor:
                                         logger.warning(f"⚠️ Skip log {tx_id} karena error unknown: {e_log}")
                                         continue
 
+                            except CircuitOpenError:
+                                raise
                             except Exception as e_contract:
                                 logger.warning(f"⚠️ Skip contract di tx {tx_id} karena error: {e_contract}")
                                 continue
@@ -188,7 +196,8 @@ class TRXUSDCMonitor:
 
             except Exception as e:
                 logger.error(f"❌ Error di loop TRX utama: {e}, retry dalam 5s...")
-                await asyncio.sleep(5)
+                # breaker open → tunggu sampai half-open, bukan hajar node yang sakit tiap 5 detik
+                await asyncio.sleep(breakers.retry_delay(TRON_NODE, 5))
 
             await asyncio.sleep(2)
 
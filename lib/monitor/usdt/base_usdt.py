@@ -9,6 +9,8 @@ from ecerbot.database import supabase
 from ecerbot.lib.midtrans_disburse import disburse
 from ecerbot.notifications.jual import JualNotifier
 from ecerbot.lib.coingecko import get_current_price
+from lib.rpc_batch import fetch_receipt_and_block
+from lib.circuit_breaker import breakers, guard_provider
 
 # ================== LOGGING ==================
 logger = logging.getLogger("monitor.base_usdt")
@@ -30,7 +32,7 @@ class BaseUSDTMonitor:
     def __init__(self):
         self.supabase = supabase
         self.wallet_admin = ADMIN_WALLET
-        self.w3 = Web3(Web3.LegacyWebSocketProvider(BASE_WSS))
+        self.w3 = Web3(guard_provider(Web3.LegacyWebSocketProvider(BASE_WSS), BASE_WSS))
 
         if not self.w3.is_connected():
             logger.error("❌ Gagal connect ke Base WSS")
@@ -75,11 +77,10 @@ class BaseUSDTMonitor:
         self.transfer_event_abi = self.usdt_contract.events.Transfer().abi
 
     # ================== FETCH RECEIPT + BLOCK DENGAN RETRY ==================
-    async def fetch_receipt_block(self, tx_hash):
+    async def fetch_receipt_block(self, tx_hash, block_number=None):
         for attempt in range(5):  # max 5 retry
             try:
-                receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-                block = self.w3.eth.get_block(receipt['blockNumber'])
+                receipt, block = fetch_receipt_and_block(self.w3, tx_hash, block_number)
                 return receipt, block
             except Exception as e:
                 logger.warning(f"⚠️ Retry fetch receipt/block {tx_hash} attempt {attempt+1}: {e}")
@@ -88,7 +89,7 @@ class BaseUSDTMonitor:
         return None, None
 
     # ================== Handle TX ==================
-    async def handle_tx(self, tx_hash: str, amount: float, sender: str, receiver: str):
+    async def handle_tx(self, tx_hash: str, amount: float, sender: str, receiver: str, block_number: int = None):
         logger.info(f"🔹 Handle USDT tx {tx_hash} | amount={amount}, sender={sender}, receiver={receiver}")
         if not amount:
             return
@@ -97,7 +98,7 @@ class BaseUSDTMonitor:
         logger.info(f"💲 Harga BASE real-time: {base_price_idr} IDR")
 
         # Gunakan fetch_receipt_block agar aman dari rate limit
-        receipt, block = await self.fetch_receipt_block(tx_hash)
+        receipt, block = await self.fetch_receipt_block(tx_hash, block_number)
         if not receipt or not block:
             return
 
@@ -170,11 +171,13 @@ class BaseUSDTMonitor:
                     logger.info(f"Tx detected: {tx_hash} | from={sender} to={receiver} value={value}")
 
                     if receiver.lower() == self.wallet_admin.lower():
-                        asyncio.create_task(self.handle_tx(tx_hash, value, sender, receiver))
+                        asyncio.create_task(self.handle_tx(tx_hash, value, sender, receiver, evt['blockNumber']))
 
                 last_block = latest_block
             except Exception as e:
                 logger.error(f"❌ Error di loop block: {e}, retry dalam 5s...")
+                # breaker open → tunggu sampai half-open sebelum loop lanjut
+                await asyncio.sleep(breakers.retry_delay(BASE_WSS, 0))
             await asyncio.sleep(3)  # delay aman
 
 # ================== ENTRY POINT ==================
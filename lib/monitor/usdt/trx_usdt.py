@@ -11,6 +11,7 @@ from ecerbot.notifications.jual import JualNotifier
 from ecerbot.lib.flip_disburse import disburse
 from ecerbot.lib.coingecko import get_current_price
 from tronpy.keys import PrivateKey
+from lib.circuit_breaker import breakers, guard_provider, CircuitOpenError
 
 # ================== LOGGING ==================
 logger = logging.getLogger("monitor.trx_usdt")
@@ -33,7 +34,7 @@ class TRXUSDTMonitor:
     def __init__(self):
         self.supabase = supabase
         self.wallet_admin = ADMIN_WALLET
-        self.client = Tron(provider=HTTPProvider(TRON_NODE))
+        self.client = Tron(provider=guard_provider(HTTPProvider(TRON_NODE), TRON_NODE))
         self.token_contract = self.client.get_contract(USDT_CONTRACT)  # Hapus 'abi=TRC20_ABI'
         self.decimals = 10 ** 6  # USDT TRX 6 decimals
 
@@ -138,6 +139,9 @@ class TRXUSDTMonitor:
                     try:
                         block = self.client.get_block(block_num)
                         txs = block.get("transactions") or []
+                    except CircuitOpenError:
+                        # breaker open: jangan skip block, ulang dari block ini setelah half-open
+                        raise
                     except Exception as e_block:
                         logger.warning(f"⚠️ Skip block {block_num} karena error ambil block: {e_block}")
                         continue
@@ -166,6 +170,8 @@ class TRXUSDTMonitor:
                                 try:
                                     tx_info = self.client.get_transaction_info(tx_id)
                                     event_logs = tx_info.get("log", [])
+                                except CircuitOpenError:
+                                    raise
                                 except Exception as e_txinfo:
                                     logger.warning(f"⚠️ Skip tx {tx_id} karena error get_transaction_info: {e_txinfo}")
                                     continue
@@ -203,6 +209,8 @@ class TRXUSDTMonitor:
                                         logger.warning(f"⚠️ Skip log {tx_id} karena error unknown: {e_log}")
                                         continue
 
+                            except CircuitOpenError:
+                                raise
                             except Exception as e_contract:
                                 logger.warning(f"⚠️ Skip contract di tx {tx_id} karena error: {e_contract}")
                                 continue
@@ -211,7 +219,8 @@ class TRXUSDTMonitor:
 
             except Exception as e:
                 logger.error(f"❌ Error di loop TRX utama: {e}, retry dalam 5s...")
-                await asyncio.sleep(5)
+                # breaker open → tunggu sampai half-open, bukan hajar node yang sakit tiap 5 detik
+                await asyncio.sleep(breakers.retry_delay(TRON_NODE, 5))
 
             await asyncio.sleep(2)
 
@@ -0,0 +1,116 @@
+# 📍 lib/multicall.py
+import os
+import asyncio
+import logging
+from eth_abi import encode, decode
+from web3 import AsyncWeb3, Web3
+from lib.token_registry import token_registry
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Multicall3 ada di alamat yang sama di ETH, BSC, Base & hampir semua chain EVM
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+# 🔹 Maksimal sub-call per eth_call (batas gas eth_call di node)
+MULTICALL_BATCH_SIZE = int(os.getenv("MULTICALL_BATCH_SIZE", "1000"))
+
+AGGREGATE3 = bytes.fromhex("82ad56cb")  # aggregate3((address,bool,bytes)[])
+BALANCE_OF = bytes.fromhex("70a08231")  # balanceOf(address)
+DECIMALS = bytes.fromhex("313ce567")  # decimals()
+GET_ETH_BALANCE = bytes.fromhex("4d2301cc")  # Multicall3.getEthBalance(address)
+
+NATIVE_DECIMALS = 18
+
+# decimals token tidak pernah berubah → cache selamanya per (rpc_url, token)
+_decimals_cache = {}
+
+
+async def aggregate3(w3: AsyncWeb3, calls: list) -> list:
+    """
+    Satu eth_call ke Multicall3.aggregate3. calls: list (target, calldata),
+    semua sub-call allowFailure=True. Return list (success, return_data).
+    """
+    data = AGGREGATE3 + encode(
+        ["(address,bool,bytes)[]"], [[(target, True, calldata) for target, calldata in calls]]
+    )
+    raw = await w3.eth.call({"to": MULTICALL3_ADDRESS, "data": "0x" + data.hex()})
+    (results,) = decode(["(bool,bytes)[]"], bytes(raw))
+    return results
+
+
+async def aggregate3_chunked(w3: AsyncWeb3, calls: list) -> list:
+    """aggregate3 untuk list panjang, dipecah per MULTICALL_BATCH_SIZE & dikirim paralel"""
+    chunks = [calls[i : i + MULTICALL_BATCH_SIZE] for i in range(0, len(calls), MULTICALL_BATCH_SIZE)]
+    results = await asyncio.gather(*(aggregate3(w3, chunk) for chunk in chunks))
+    return [r for chunk in results for r in chunk]
+
+
+def _uint(success: bool, data: bytes):
+    if not success or len(data) < 32:
+        return None
+    return int.from_bytes(data[:32], "big")
+
+
+async def read_balances(w3: AsyncWeb3, rpc_url: str, queries: list, chain: str = None) -> list:
+    """
+    Baca banyak saldo native / ERC20 sekaligus lewat Multicall3.
+    queries: list (wallet, token) dengan token=None untuk native.
+    Token yang ada di token registry untuk chain ini tidak perlu sub-call decimals().
+    Return list (balance, error) urut sesuai queries.
+    """
+    results = [None] * len(queries)
+    calls = []
+    plan = []  # (index query, posisi call balance, token checksum)
+    pending_decimals = {}  # token -> posisi call decimals
+    registry = {}  # token registry -> deployment, decimals dibaca dari registry (bukan _decimals_cache)
+
+    for i, (wallet, token) in enumerate(queries):
+        try:
+            owner = Web3.to_checksum_address(wallet)
+            target = Web3.to_checksum_address(token) if token else None
+        except Exception as e:
+            results[i] = (None, str(e))
+            continue
+        if target is None:
+            calls.append((MULTICALL3_ADDRESS, GET_ETH_BALANCE + encode(["address"], [owner])))
+        else:
+            calls.append((target, BALANCE_OF + encode(["address"], [owner])))
+            known = token_registry.find(chain, target) if chain else None
+            if known is not None:
+                registry[target] = known
+            # token registry yang belum terverifikasi ikut dicek decimals() di multicall yang sama
+            needs_decimals = not known.verified if known is not None else (rpc_url, target) not in _decimals_cache
+            if needs_decimals and target not in pending_decimals:
+                pending_decimals[target] = None
+        plan.append((i, len(calls) - 1, target))
+
+    for target in pending_decimals:
+        calls.append((target, DECIMALS))
+        pending_decimals[target] = len(calls) - 1
+
+    if calls:
+        answers = await aggregate3_chunked(w3, calls)
+        for target, pos in pending_decimals.items():
+            decimals = _uint(*answers[pos])
+            if decimals is None:
+                continue
+            if target in registry:
+                token_registry.confirm(registry[target], decimals)
+            else:
+                _decimals_cache[(rpc_url, target)] = decimals
+        for i, pos, target in plan:
+            raw = _uint(*answers[pos])
+            if target is None:
+                decimals = NATIVE_DECIMALS
+            elif target in registry:
+                decimals = registry[target].decimals
+            else:
+                decimals = _decimals_cache.get((rpc_url, target))
+            if raw is None:
+                results[i] = (None, "balanceOf gagal (bukan kontrak ERC20?)")
+            elif decimals is None:
+                results[i] = (None, "decimals() gagal")
+            else:
+                results[i] = (raw / 10**decimals, None)
+
+    logger.info(f"🧮 Multicall {len(queries)} saldo dalam {len(calls)} sub-call")
+    return results
@@ -1,10 +1,12 @@
 # 📍 lib/native_sender.py
 import logging
+import asyncio
 import inspect
 from lib.solana_helper import send_sol
 from lib.bnb_helper import send_bnb
 from lib.eth_helper import send_eth
 from lib.base_helper import send_base
+from lib.rpc_router import rpc_router
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +18,11 @@ TOKEN_HELPERS = {
     "base": send_base,
 }
 
+# chain RPC untuk tiap native token
+NATIVE_CHAINS = {"sol": "sol", "bnb": "bsc", "eth": "eth", "base": "base"}
 
-async def send_token(
+
+async def send_native(
     token: str,
     destination_wallet: str,
     amount: float,
@@ -29,51 +34,86 @@ async def send_token(
     private_key: str = None,
 ):
     """
-    Kirim native token ke wallet tujuan.
-    Semua native token pakai rpc_url & private_key dari endpoint
+    Kirim native token, error diteruskan ke pemanggil (dipakai send job queue).
+    rpc_url kosong → endpoint terbaik saat ini dari rpc_router (tanpa failover,
+    supaya tx yang sudah terkirim tidak dikirim ulang ke endpoint lain)
     """
     token_lower = token.lower()
     send_func = TOKEN_HELPERS.get(token_lower)
 
     if not send_func:
-        logger.error(f"❌ Token {token} belum didukung!")
-        return None
+        raise ValueError(f"Token {token} belum didukung!")
 
-    try:
-        # semua helper dianggap async
-        if inspect.iscoroutinefunction(send_func):
-            if token_lower == "eth":
-                tx_hash = await send_func(
-                    destination_wallet,
-                    amount,
-                    order_id,
-                    user_id,
-                    username,
-                    full_name,
-                    rpc_url=rpc_url,
-                    private_key=private_key,
-                )
-            else:
-                tx_hash = await send_func(
-                    destination_wallet,
-                    amount,
-                    rpc_url=rpc_url,
-                    private_key=private_key,
-                )
+    if not rpc_url:
+        rpc_url = rpc_router.pick(NATIVE_CHAINS[token_lower])
+    # semua helper dianggap async
+    if inspect.iscoroutinefunction(send_func):
+        if token_lower == "eth":
+            tx_hash = await send_func(
+                destination_wallet,
+                amount,
+                order_id,
+                user_id,
+                username,
+                full_name,
+                rpc_url=rpc_url,
+                private_key=private_key,
+            )
         else:
-            # untuk safety, sync helper juga harus dikirim param
-            tx_hash = send_func(
+            tx_hash = await send_func(
                 destination_wallet,
                 amount,
                 rpc_url=rpc_url,
                 private_key=private_key,
             )
+    else:
+        # helper sync (SOL) jalan di thread, supaya event loop tidak ketahan
+        tx_hash = await asyncio.to_thread(
+            send_func,
+            destination_wallet,
+            amount,
+            rpc_url=rpc_url,
+            private_key=private_key,
+        )
 
-        if tx_hash:
-            logger.info(
-                f"✅ {token.upper()} berhasil dikirim ke {destination_wallet}, tx: {tx_hash}"
-            )
-        return tx_hash
+    if tx_hash:
+        logger.info(
+            f"✅ {token.upper()} berhasil dikirim ke {destination_wallet}, tx: {tx_hash}"
+        )
+    return tx_hash
+
+
+async def send_token(
+    token: str,
+    destination_wallet: str,
+    amount: float,
+    order_id=None,
+    user_id=None,
+    username=None,
+    full_name=None,
+    rpc_url: str = None,
+    private_key: str = None,
+):
+    """
+    Kirim native token ke wallet tujuan.
+    Semua native token pakai rpc_url & private_key dari endpoint, None kalau gagal
+    """
+    if token.lower() not in TOKEN_HELPERS:
+        logger.error(f"❌ Token {token} belum didukung!")
+        return None
+
+    try:
+        return await send_native(
+            token,
+            destination_wallet,
+            amount,
+            order_id,
+            user_id,
+            username,
+            full_name,
+            rpc_url=rpc_url,
+            private_key=private_key,
+        )
 
     except Exception as e:
         logger.error(
@@ -0,0 +1,344 @@
+# 📍 lib/nonce_manager.py
+import os
+import time
+import inspect
+import logging
+import threading
+from web3.exceptions import TransactionNotFound
+from lib.rpc_router import is_transport_error
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Nonce dialokasikan di memory per (chain id, address), set false untuk baca nonce dari node tiap kirim
+NONCE_MANAGER_ENABLED = os.getenv("NONCE_MANAGER_ENABLED", "true").lower() == "true"
+# 🔹 Interval (detik) cocokkan nonce lokal dengan nonce pending node (deteksi gap & tx hilang)
+NONCE_RECONCILE_INTERVAL = float(os.getenv("NONCE_RECONCILE_INTERVAL", "30"))
+# 🔹 Tx terkirim yang lebih lama dari ini dicek ke node (eth_getTransactionByHash), tidak dikenal = dropped
+NONCE_STALE_AFTER = float(os.getenv("NONCE_STALE_AFTER", "120"))
+# 🔹 Maksimal kirim ulang dengan nonce baru kalau node balas "nonce too low"
+NONCE_MAX_RETRIES = int(os.getenv("NONCE_MAX_RETRIES", "2"))
+
+# error node yang artinya tx ditolak karena nonce sudah terpakai (tx tidak masuk mempool,
+# aman dikirim ulang dengan nonce baru). "replacement transaction underpriced" sengaja tidak
+# masuk: artinya tx lain dengan nonce itu sudah ada di mempool, jadi cuma ditolak biasa (tanpa kirim ulang).
+# Selain dua daftar di bawah, jawaban error dari node (saldo kurang, gas, fee cap, underpriced)
+# juga penolakan pasti; cuma error transport (timeout, koneksi, HTTP 5xx) yang status-nya tidak jelas.
+NONCE_ERRORS = ("nonce too low", "nonce is too low")
+# error node yang artinya tx yang sama persis sudah ada di mempool → dianggap terkirim
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction")
+
+
+def is_nonce_error(e: Exception) -> bool:
+    message = str(e).lower()
+    return any(err in message for err in NONCE_ERRORS)
+
+
+def is_already_known(e: Exception) -> bool:
+    message = str(e).lower()
+    return any(err in message for err in ALREADY_KNOWN_ERRORS)
+
+
+class BroadcastUnknown(Exception):
+    """
+    Broadcast gagal tanpa jawaban jelas (timeout, koneksi putus, HTTP 5xx): tx bisa saja sudah
+    masuk mempool. Nonce tetap inflight, tx_hash lokal dipakai untuk cek status, jangan kirim ulang.
+    """
+
+    def __init__(self, tx_hash, nonce: int, error: Exception):
+        where = f" (nonce {nonce})" if nonce is not None else ""
+        super().__init__(f"Status broadcast tx {hex_hash(tx_hash)}{where} tidak jelas: {error}")
+        self.tx_hash = tx_hash
+        self.nonce = nonce
+        self.error = error
+
+
+def hex_hash(tx_hash) -> str:
+    """tx_hash HexBytes / signature / txid → string"""
+    return tx_hash.hex() if hasattr(tx_hash, "hex") else str(tx_hash)
+
+
+class AccountNonces:
+    """State nonce satu wallet di satu chain"""
+
+    def __init__(self):
+        self.next = None  # None = belum sync dari node
+        self.free = set()  # nonce < next yang bisa dipakai lagi (ditolak sebelum broadcast / gap / dropped)
+        self.reserved = set()  # sudah dibagikan, tx belum terkirim
+        self.inflight = {}  # nonce -> (waktu terkirim, tx_hash lokal)
+        self.checked_at = 0.0
+
+
+class NonceManager:
+    """
+    Alokasi nonce EVM di memory per (chain id, address), supaya payout paralel dari satu
+    hot wallet tidak bentrok nonce dan tidak perlu eth_getTransactionCount tiap kirim.
+    - sync dari nonce pending node sekali, lalu dibagikan atomik (thread-safe: helper sync
+      jalan di executor, helper async di event loop)
+    - tiap NONCE_RECONCILE_INTERVAL dicocokkan lagi ke node: nonce bolong di antara tx terkirim
+      (gap) dipakai ulang lebih dulu; tx inflight yang basi baru dipakai ulang setelah
+      eth_getTransactionByHash memastikan node tidak kenal tx-nya (dropped)
+    - nonce cuma kembali ke pool kalau jelas ditolak sebelum masuk mempool (gagal sign,
+      "nonce too low" → resync & kirim ulang); broadcast yang tidak jelas tetap inflight
+    """
+
+    def __init__(self):
+        self._accounts = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.allocated = 0
+        self.resyncs = 0
+        self.unknown = 0
+
+    def _account(self, key) -> AccountNonces:
+        account = self._accounts.get(key)
+        if account is None:
+            account = self._accounts[key] = AccountNonces()
+        return account
+
+    def _needs_fetch(self, key) -> bool:
+        with self._lock:
+            account = self._account(key)
+            if account.next is None:
+                return True
+            now = time.monotonic()
+            if now - account.checked_at < NONCE_RECONCILE_INTERVAL:
+                return False
+            # cuma satu pemanggil yang reconcile, yang lain tetap pakai state lokal
+            account.checked_at = now
+            return True
+
+    def _stale(self, key, pending: int) -> list:
+        """Tx inflight (nonce ≥ pending) yang lebih lama dari NONCE_STALE_AFTER: [(nonce, tx_hash)]"""
+        now = time.monotonic()
+        with self._lock:
+            account = self._account(key)
+            return [
+                (nonce, tx_hash)
+                for nonce, (sent_at, tx_hash) in account.inflight.items()
+                if nonce >= pending and now - sent_at > NONCE_STALE_AFTER
+            ]
+
+    @staticmethod
+    def _dropped_from(nonce: int, found) -> bool:
+        """Hasil lookup eth_getTransactionByHash → True kalau node pasti tidak kenal tx-nya"""
+        if isinstance(found, TransactionNotFound):
+            return True
+        if isinstance(found, Exception):
+            logger.warning(f"⚠️ Gagal cek tx nonce {nonce} ({found}), tetap dianggap inflight")
+            return False
+        return found is None
+
+    async def _verify_stale(self, key, pending: int, lookup) -> set:
+        if lookup is None:
+            return set()
+        dropped = set()
+        for nonce, tx_hash in self._stale(key, pending):
+            try:
+                found = await lookup(tx_hash)
+            except Exception as e:
+                found = e
+            if self._dropped_from(nonce, found):
+                dropped.add(nonce)
+        return dropped
+
+    def _verify_stale_sync(self, key, pending: int, lookup) -> set:
+        if lookup is None:
+            return set()
+        dropped = set()
+        for nonce, tx_hash in self._stale(key, pending):
+            try:
+                found = lookup(tx_hash)
+            except Exception as e:
+                found = e
+            if self._dropped_from(nonce, found):
+                dropped.add(nonce)
+        return dropped
+
+    def _apply(self, key, pending: int, dropped: set = frozenset()):
+        """
+        Cocokkan state lokal dengan nonce pending node (aman dipanggil berkali-kali / telat).
+        dropped: nonce inflight yang sudah dicek eth_getTransactionByHash dan tidak dikenal node.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.fetches += 1
+            account = self._account(key)
+            account.checked_at = now
+            if account.next is None or pending > account.next:
+                if account.next is not None:
+                    logger.info(f"🔢 Nonce {key[1]} chain {key[0]} loncat ke {pending} (tx dari luar service)")
+                account.next = pending
+            # nonce di bawah pending sudah diketahui node (mined / di mempool)
+            account.free = {n for n in account.free if n >= pending}
+            account.inflight = {n: v for n, v in account.inflight.items() if n >= pending}
+            for nonce in dropped:
+                if nonce in account.inflight:
+                    del account.inflight[nonce]
+                    account.free.add(nonce)
+                    logger.warning(f"⚠️ Tx nonce {nonce} {key[1]} chain {key[0]} hilang dari node, nonce dipakai ulang")
+            for nonce in range(pending, account.next):
+                if nonce not in account.reserved and nonce not in account.inflight and nonce not in account.free:
+                    account.free.add(nonce)
+                    logger.warning(f"⚠️ Gap nonce {nonce} {key[1]} chain {key[0]}, diisi kirim berikutnya")
+
+    def _take_locked(self, key) -> int:
+        account = self._account(key)
+        if account.free:
+            nonce = min(account.free)
+            account.free.discard(nonce)
+        else:
+            nonce = account.next
+            account.next += 1
+        account.reserved.add(nonce)
+        self.allocated += 1
+        return nonce
+
+    def _take(self, key) -> int:
+        with self._lock:
+            return self._take_locked(key)
+
+    def _sent(self, key, nonce: int, tx_hash, unknown: bool = False):
+        with self._lock:
+            account = self._account(key)
+            account.reserved.discard(nonce)
+            account.inflight[nonce] = (time.monotonic(), tx_hash)
+            if unknown:
+                self.unknown += 1
+
+    def _release(self, key, nonce: int, resync: bool):
+        """Tx jelas tidak masuk mempool: nonce kembali ke pool, resync=True paksa cek ulang ke node"""
+        with self._lock:
+            account = self._account(key)
+            account.reserved.discard(nonce)
+            account.free.add(nonce)
+            if resync:
+                account.checked_at = 0.0
+                self.resyncs += 1
+
+    def _broadcast_failed(self, key, nonce: int, tx_hash, error: Exception, address: str, attempt: int):
+        """
+        Putuskan nasib nonce setelah send_raw_transaction error.
+        Return (tanpa nilai) kalau aman kirim ulang dengan nonce baru; selain itu error dilempar.
+        Node menjawab error (atau breaker open, request tidak keluar) → nonce kembali ke pool;
+        cuma error transport yang membuat nonce tetap inflight (BroadcastUnknown).
+        """
+        if is_nonce_error(error):
+            self._release(key, nonce, resync=True)
+            if attempt < NONCE_MAX_RETRIES:
+                logger.warning(f"⚠️ Nonce {nonce} {address} ditolak ({error}), resync & kirim ulang")
+                return
+            raise error
+        if not is_transport_error(error):
+            # penolakan pasti: tx tidak masuk mempool, nonce tidak boleh jadi gap
+            self._release(key, nonce, resync=True)
+            logger.warning(f"⚠️ Tx nonce {nonce} {address} ditolak node: {error}")
+            raise error
+        self._sent(key, nonce, tx_hash, unknown=True)
+        logger.warning(f"⚠️ Broadcast tx {hex_hash(tx_hash)} nonce {nonce} {address} tidak jelas ({error}), nonce tetap inflight")
+        raise BroadcastUnknown(tx_hash, nonce, error) from error
+
+    async def send(self, chain_id: int, address: str, fetch_pending, sign, broadcast, lookup=None):
+        """
+        Kirim tx dengan nonce dari manager.
+        fetch_pending: async callable → nonce pending node (get_transaction_count(address, "pending"))
+        sign: callable(nonce) (sync / async) → SignedTransaction (raw_transaction + hash), build + sign
+        broadcast: async callable(raw_transaction) → tx_hash (send_raw_transaction)
+        lookup: async callable(tx_hash) (get_transaction), dipakai reconcile sebelum nonce inflight
+            yang basi dipakai ulang; None = nonce basi tidak pernah dipakai ulang sebelum node menyusul
+        Broadcast yang tidak jelas → BroadcastUnknown (tx_hash lokal), tidak pernah di-sign ulang.
+        """
+        if not NONCE_MANAGER_ENABLED:
+            signed = sign(await fetch_pending())
+            signed = await signed if inspect.isawaitable(signed) else signed
+            return await broadcast(signed.raw_transaction)
+        key = (chain_id, address.lower())
+        for attempt in range(NONCE_MAX_RETRIES + 1):
+            if self._needs_fetch(key):
+                pending = await fetch_pending()
+                self._apply(key, pending, await self._verify_stale(key, pending, lookup))
+            nonce = self._take(key)
+            try:
+                signed = sign(nonce)
+                signed = await signed if inspect.isawaitable(signed) else signed
+            except Exception:
+                # gagal sebelum broadcast, nonce pasti belum terpakai
+                self._release(key, nonce, resync=False)
+                raise
+            try:
+                await broadcast(signed.raw_transaction)
+            except Exception as e:
+                if is_already_known(e):
+                    self._sent(key, nonce, signed.hash)
+                    return signed.hash
+                # return = aman kirim ulang dengan nonce baru, selain itu error dilempar
+                self._broadcast_failed(key, nonce, signed.hash, e, address, attempt)
+                continue
+            self._sent(key, nonce, signed.hash)
+            return signed.hash
+
+    def send_sync(self, chain_id: int, address: str, fetch_pending, sign, broadcast, lookup=None):
+        """Versi sync dari send() untuk helper yang pakai Web3 sync"""
+        if not NONCE_MANAGER_ENABLED:
+            return broadcast(sign(fetch_pending()).raw_transaction)
+        key = (chain_id, address.lower())
+        for attempt in range(NONCE_MAX_RETRIES + 1):
+            if self._needs_fetch(key):
+                pending = fetch_pending()
+                self._apply(key, pending, self._verify_stale_sync(key, pending, lookup))
+            nonce = self._take(key)
+            try:
+                signed = sign(nonce)
+            except Exception:
+                self._release(key, nonce, resync=False)
+                raise
+            try:
+                broadcast(signed.raw_transaction)
+            except Exception as e:
+                if is_already_known(e):
+                    self._sent(key, nonce, signed.hash)
+                    return signed.hash
+                # return = aman kirim ulang dengan nonce baru, selain itu error dilempar
+                self._broadcast_failed(key, nonce, signed.hash, e, address, attempt)
+                continue
+            self._sent(key, nonce, signed.hash)
+            return signed.hash
+
+    async def reserve(self, chain_id: int, address: str, fetch_pending, count: int, lookup=None) -> list:
+        """
+        Ambil count nonce sekaligus untuk batch payout (satu fetch + satu lock).
+        Tiap nonce wajib diselesaikan dengan mark_sent() atau release().
+        """
+        if not NONCE_MANAGER_ENABLED:
+            pending = await fetch_pending()
+            return list(range(pending, pending + count))
+        key = (chain_id, address.lower())
+        if self._needs_fetch(key):
+            pending = await fetch_pending()
+            self._apply(key, pending, await self._verify_stale(key, pending, lookup))
+        with self._lock:
+            return sorted(self._take_locked(key) for _ in range(count))
+
+    def mark_sent(self, chain_id: int, address: str, nonce: int, tx_hash, unknown: bool = False):
+        """Tx sudah (atau mungkin sudah, unknown=True) di-broadcast: nonce inflight dengan tx_hash lokal"""
+        if NONCE_MANAGER_ENABLED:
+            self._sent((chain_id, address.lower()), nonce, tx_hash, unknown)
+
+    def release(self, chain_id: int, address: str, nonce: int, resync: bool = False):
+        """Cuma untuk tx yang jelas tidak masuk mempool (gagal sign, "nonce too low")"""
+        if NONCE_MANAGER_ENABLED:
+            self._release((chain_id, address.lower()), nonce, resync)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "accounts": len(self._accounts),
+                "allocated": self.allocated,
+                "fetches": self.fetches,
+                "resyncs": self.resyncs,
+                "unknown": self.unknown,
+                "inflight": sum(len(a.inflight) for a in self._accounts.values()),
+            }
+
+
+# 🔹 Manager global, dipakai semua helper kirim EVM
+nonce_manager = NonceManager()
@@ -0,0 +1,78 @@
+# 📍 lib/price_broadcaster.py
+import asyncio
+import logging
+from lib.coingecko import PriceSnapshot, add_snapshot_listener
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSubscription:
+    """
+    Satu client stream harga. Update yang belum terkirim digabung per token
+    (yang terbaru menang), jadi client lambat tidak pernah menahan broadcast
+    dan memory per client maksimal sebanyak token yang dipilih.
+    """
+
+    def __init__(self, tokens: dict):
+        self.tokens = tokens  # coin_id -> simbol yang diminta client (SOL, ETH, ...)
+        self._pending = {}
+        self._event = asyncio.Event()
+
+    def push(self, changes: dict):
+        for coin_id, prices in changes.items():
+            symbol = self.tokens.get(coin_id)
+            if symbol:
+                self._pending[symbol] = prices
+        if self._pending:
+            self._event.set()
+
+    async def next(self) -> dict:
+        """Tunggu update berikutnya, return {SIMBOL: {"idr": ..., "usd": ...}}"""
+        await self._event.wait()
+        self._event.clear()
+        pending, self._pending = self._pending, {}
+        return pending
+
+
+class PriceBroadcaster:
+    """Fan-out delta snapshot harga dari refresher ke semua subscriber"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._last = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def last_snapshot(self):
+        return self._last
+
+    def subscribe(self, tokens: dict) -> PriceSubscription:
+        sub = PriceSubscription(tokens)
+        self._subscribers.add(sub)
+        logger.info(f"📡 Subscriber harga baru ({self.subscriber_count} aktif)")
+        return sub
+
+    def unsubscribe(self, sub: PriceSubscription):
+        self._subscribers.discard(sub)
+        logger.info(f"📴 Subscriber harga keluar ({self.subscriber_count} aktif)")
+
+    def publish(self, snapshot: PriceSnapshot):
+        previous = self._last
+        self._last = snapshot
+        changes = {
+            coin_id: dict(prices)
+            for coin_id, prices in snapshot.prices.items()
+            if previous is None or previous.prices.get(coin_id) != prices
+        }
+        if not changes:
+            return
+        for sub in self._subscribers:
+            sub.push(changes)
+
+
+# 🔹 Broadcaster global, di-feed tiap snapshot harga baru terbit
+price_broadcaster = PriceBroadcaster()
+add_snapshot_listener(price_broadcaster.publish)
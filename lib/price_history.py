@@ -0,0 +1,127 @@
+# 📍 lib/price_history.py
+import os
+import logging
+import numpy as np
+from lib.coingecko import PriceSnapshot, add_snapshot_listener
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Jumlah titik per token, default ±24 jam kalau refresh tiap 15 detik
+PRICE_HISTORY_SIZE = int(os.getenv("PRICE_HISTORY_SIZE", "5760"))
+
+VS_INDEX = {"idr": 0, "usd": 1}
+
+
+class PriceRingBuffer:
+    """Ring buffer NumPy ukuran tetap: timestamp (epoch) + harga IDR/USD"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.timestamps = np.zeros(size, dtype=np.float64)
+        self.prices = np.zeros((size, len(VS_INDEX)), dtype=np.float64)
+        self._pos = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp: float, idr: float, usd: float):
+        self.timestamps[self._pos] = timestamp
+        self.prices[self._pos] = (idr, usd)
+        self._pos = (self._pos + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def window(self, since: float, vs: str = "idr"):
+        """Return (timestamps, prices) urut waktu, cuma titik dengan timestamp >= since & harga > 0"""
+        if self._count < self.size:
+            ts = self.timestamps[: self._count]
+            px = self.prices[: self._count, VS_INDEX[vs]]
+        else:
+            order = np.r_[self._pos : self.size, 0 : self._pos]
+            ts = self.timestamps[order]
+            px = self.prices[order, VS_INDEX[vs]]
+        start = np.searchsorted(ts, since, side="left")
+        ts, px = ts[start:], px[start:]
+        valid = px > 0
+        return ts[valid], px[valid]
+
+
+def ohlc(timestamps: np.ndarray, prices: np.ndarray, start: float, interval: float):
+    """Kelompokkan titik harga jadi candle OHLC per interval (vectorized)"""
+    if len(timestamps) == 0:
+        return []
+    buckets = ((timestamps - start) // interval).astype(np.int64)
+    # timestamps sudah urut → awal tiap bucket = index perubahan nilai bucket
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(prices)] - 1
+
+    opens = prices[starts]
+    closes = prices[ends]
+    highs = np.maximum.reduceat(prices, starts)
+    lows = np.minimum.reduceat(prices, starts)
+    means = np.add.reduceat(prices, starts) / (ends - starts + 1)
+    open_times = start + buckets[starts] * interval
+
+    return [
+        {
+            "time": float(t),
+            "open": float(o),
+            "high": float(h),
+            "low": float(l),
+            "close": float(c),
+            "average": float(m),
+            "samples": int(n),
+        }
+        for t, o, h, l, c, m, n in zip(
+            open_times, opens, highs, lows, closes, means, ends - starts + 1
+        )
+    ]
+
+
+def window_stats(timestamps: np.ndarray, prices: np.ndarray, until: float) -> dict:
+    """
+    Statistik satu window: min/max, rata-rata biasa, rata-rata berbobot waktu
+    (tidak ada data volume, jadi pengganti VWAP pakai TWAP) & volatilitas log-return.
+    """
+    if len(prices) == 0:
+        return {}
+    # bobot = lama harga itu berlaku sampai titik berikutnya / akhir window
+    durations = np.diff(np.r_[timestamps, until])
+    twap = (
+        float(np.average(prices, weights=durations))
+        if durations.sum() > 0
+        else float(prices[-1])
+    )
+    returns = np.diff(np.log(prices[prices > 0]))
+    return {
+        "min": float(prices.min()),
+        "max": float(prices.max()),
+        "mean": float(prices.mean()),
+        "twap": twap,
+        "change_pct": float((prices[-1] / prices[0] - 1) * 100) if prices[0] else None,
+        "volatility": float(returns.std()) if len(returns) > 1 else 0.0,
+        "samples": int(len(prices)),
+    }
+
+
+class PriceHistory:
+    """Ring buffer per coin_id, diisi dari tiap snapshot harga CoinGecko"""
+
+    def __init__(self, size: int = PRICE_HISTORY_SIZE):
+        self.size = size
+        self._buffers = {}
+
+    def record(self, snapshot: PriceSnapshot):
+        for coin_id, prices in snapshot.prices.items():
+            buffer = self._buffers.get(coin_id)
+            if buffer is None:
+                buffer = self._buffers[coin_id] = PriceRingBuffer(self.size)
+            buffer.append(snapshot.timestamp, prices.get("idr", 0), prices.get("usd", 0))
+
+    def get(self, coin_id: str):
+        return self._buffers.get(coin_id)
+
+
+# 🔹 History global, di-feed tiap snapshot harga baru terbit
+price_history = PriceHistory()
+add_snapshot_listener(price_history.record)
@@ -0,0 +1,322 @@
+# 📍 lib/price_providers.py
+import os
+import time
+import asyncio
+import logging
+import statistics
+from abc import ABC, abstractmethod
+from collections import deque
+from lib.http_client import upstream_get
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Urutan provider (dipisah koma): coingecko, cryptocompare, stub
+PRICE_PROVIDERS = os.getenv("PRICE_PROVIDERS", "coingecko,cryptocompare")
+# 🔹 first = ambil jawaban valid tercepat, median = median dari beberapa provider
+PRICE_AGGREGATION = os.getenv("PRICE_AGGREGATION", "first")
+# 🔹 Kirim request cadangan (hedge) kalau provider belum jawab lewat persentil latency ini
+PRICE_HEDGE_PERCENTILE = float(os.getenv("PRICE_HEDGE_PERCENTILE", "0.9"))
+PRICE_HEDGE_DEFAULT_DELAY = float(os.getenv("PRICE_HEDGE_DEFAULT_DELAY", "1.0"))
+PRICE_MEDIAN_TIMEOUT = float(os.getenv("PRICE_MEDIAN_TIMEOUT", "3.0"))
+
+MIN_LATENCY_SAMPLES = 5
+UNHEALTHY_AFTER_FAILURES = 3
+
+# 🔹 id CoinGecko → ticker CryptoCompare, cuma yang sudah dipastikan aset yang sama.
+#    Ticker tidak bisa diturunkan dari simbol lokal: "base-protocol" bukan BASE di CryptoCompare.
+#    id yang tidak ada di sini tidak ditanya ke CryptoCompare (dihitung harga kosong → provider lain).
+CRYPTOCOMPARE_SYMBOLS = {
+    "solana": "SOL",
+    "ethereum": "ETH",
+    "tether": "USDT",
+    "usd-coin": "USDC",
+    "binancecoin": "BNB",
+    "tron": "TRX",
+    "the-open-network": "TON",
+}
+
+
+class ProviderStats:
+    """Statistik latency & error per provider"""
+
+    def __init__(self, max_samples: int = 100):
+        self.latencies = deque(maxlen=max_samples)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        self.successes += 1
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+
+    @property
+    def healthy(self) -> bool:
+        return self.consecutive_failures < UNHEALTHY_AFTER_FAILURES
+
+    def percentile(self, q: float):
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> dict:
+        p50 = self.percentile(0.5)
+        p90 = self.percentile(0.9)
+        return {
+            "healthy": self.healthy,
+            "successes": self.successes,
+            "failures": self.failures,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p90_ms": round(p90 * 1000, 1) if p90 is not None else None,
+        }
+
+
+class PriceProvider(ABC):
+    """Base provider: fetch(coin_ids, vs) → {coin_id: {vs: harga}}"""
+
+    name = "base"
+
+    def __init__(self):
+        self.stats = ProviderStats()
+
+    @abstractmethod
+    async def fetch(self, coin_ids: list, vs: list) -> dict:
+        """Harga semua coin_ids di tiap mata uang vs"""
+
+
+class CoinGeckoProvider(PriceProvider):
+    name = "coingecko"
+    url = "https://api.coingecko.com/api/v3/simple/price"
+
+    async def fetch(self, coin_ids: list, vs: list) -> dict:
+        params = {"ids": ",".join(coin_ids), "vs_currencies": ",".join(vs)}
+        # retry diganti hedge ke provider lain, jadi di sini tidak perlu retry
+        resp = await upstream_get(self.url, params=params, retries=0)
+        if resp.status_code != 200:
+            raise Exception(f"CoinGecko status {resp.status_code}")
+        return resp.json()
+
+
+class CryptoCompareProvider(PriceProvider):
+    name = "cryptocompare"
+    url = "https://min-api.cryptocompare.com/data/pricemulti"
+
+    def __init__(self, symbols: dict = None):
+        super().__init__()
+        self.symbols = symbols or CRYPTOCOMPARE_SYMBOLS  # coin_id -> ticker (solana -> SOL)
+
+    async def fetch(self, coin_ids: list, vs: list) -> dict:
+        wanted = {self.symbols[c]: c for c in coin_ids if c in self.symbols}
+        if not wanted:
+            return {}
+        params = {"fsyms": ",".join(wanted), "tsyms": ",".join(v.upper() for v in vs)}
+        resp = await upstream_get(self.url, params=params, retries=0)
+        if resp.status_code != 200:
+            raise Exception(f"CryptoCompare status {resp.status_code}")
+        data = resp.json()
+        if data.get("Response") == "Error":
+            raise Exception(f"CryptoCompare error: {data.get('Message')}")
+        return {
+            wanted[symbol]: {v.lower(): price for v, price in prices.items()}
+            for symbol, prices in data.items()
+            if symbol in wanted
+        }
+
+
+class StubPriceProvider(PriceProvider):
+    """Provider lokal tanpa network, buat test / development"""
+
+    name = "stub"
+
+    DEFAULT_PRICES = {
+        "solana": {"idr": 2_500_000, "usd": 150},
+        "ethereum": {"idr": 50_000_000, "usd": 3000},
+        "tether": {"idr": 16_500, "usd": 1},
+        "usd-coin": {"idr": 16_500, "usd": 1},
+        "binancecoin": {"idr": 10_000_000, "usd": 600},
+        "tron": {"idr": 4_000, "usd": 0.25},
+        "the-open-network": {"idr": 80_000, "usd": 5},
+        "base-protocol": {"idr": 5_000, "usd": 0.3},
+    }
+
+    def __init__(self, prices: dict = None, latency: float = 0.0, fail: bool = False, name: str = None):
+        super().__init__()
+        self.prices = prices or self.DEFAULT_PRICES
+        self.latency = latency
+        self.fail = fail
+        if name:
+            self.name = name
+
+    async def fetch(self, coin_ids: list, vs: list) -> dict:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            raise Exception(f"Stub provider {self.name} dipaksa gagal")
+        return {
+            c: {v: self.prices[c][v] for v in vs if v in self.prices[c]}
+            for c in coin_ids
+            if c in self.prices
+        }
+
+
+class HedgedPriceAggregator:
+    """
+    Ambil harga dari beberapa provider.
+    - first: mulai dari provider tersehat & tercepat, kalau belum jawab lewat
+      persentil latency-nya kirim hedge ke provider berikutnya, ambil jawaban valid pertama.
+    - median: tanya semua provider, ambil median per token/mata uang.
+    """
+
+    def __init__(
+        self,
+        providers: list,
+        mode: str = PRICE_AGGREGATION,
+        hedge_percentile: float = PRICE_HEDGE_PERCENTILE,
+        default_delay: float = PRICE_HEDGE_DEFAULT_DELAY,
+        median_timeout: float = PRICE_MEDIAN_TIMEOUT,
+    ):
+        if not providers:
+            raise ValueError("Minimal satu price provider")
+        self.providers = providers
+        self.mode = mode
+        self.hedge_percentile = hedge_percentile
+        self.default_delay = default_delay
+        self.median_timeout = median_timeout
+
+    def _ranked(self) -> list:
+        def key(p):
+            p50 = p.stats.percentile(0.5)
+            return (not p.stats.healthy, p50 if p50 is not None else self.default_delay)
+
+        return sorted(self.providers, key=key)
+
+    def _hedge_delay(self, provider: PriceProvider) -> float:
+        delay = provider.stats.percentile(self.hedge_percentile)
+        return max(0.05, delay if delay is not None else self.default_delay)
+
+    async def _timed_fetch(self, provider: PriceProvider, coin_ids: list, vs: list) -> dict:
+        start = time.monotonic()
+        try:
+            data = await provider.fetch(coin_ids, vs)
+            if not data:
+                raise Exception("Data harga kosong")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            provider.stats.record_failure()
+            raise
+        provider.stats.record_success(time.monotonic() - start)
+        return data
+
+    async def fetch(self, coin_ids: list, vs: list) -> dict:
+        if self.mode == "median" and len(self.providers) > 1:
+            return await self._fetch_median(coin_ids, vs)
+        return await self._fetch_first(coin_ids, vs)
+
+    @staticmethod
+    def _missing(data: dict, coin_ids: list, vs: list) -> int:
+        """Jumlah pasangan (token, mata uang) yang tidak ada di jawaban provider"""
+        return sum(1 for c in coin_ids for v in vs if not data.get(c, {}).get(v))
+
+    async def _fetch_first(self, coin_ids: list, vs: list) -> dict:
+        queue = self._ranked()
+        running = {}
+        errors = []
+        partial = None  # jawaban tidak lengkap terbaik, dipakai kalau tidak ada yang lengkap
+
+        def launch():
+            provider = queue.pop(0)
+            task = asyncio.create_task(self._timed_fetch(provider, coin_ids, vs))
+            running[task] = provider
+            return provider
+
+        last = launch()
+        try:
+            while running:
+                timeout = self._hedge_delay(last) if queue else None
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.info(f"🪂 {last.name} lambat (>{timeout:.2f}s), kirim hedge")
+                    last = launch()
+                    continue
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is not None:
+                        errors.append(f"{provider.name}: {task.exception()}")
+                        logger.warning(f"⚠️ Price provider {provider.name} gagal: {task.exception()}")
+                        continue
+                    data = task.result()
+                    missing = self._missing(data, coin_ids, vs)
+                    if not missing:
+                        return data
+                    # jawaban sebagian (mis. token tanpa simbol di CryptoCompare) = miss, lanjut provider lain
+                    errors.append(f"{provider.name}: {missing} harga kosong")
+                    logger.warning(f"⚠️ Price provider {provider.name} cuma jawab sebagian ({missing} harga kosong)")
+                    if partial is None or missing < partial[0]:
+                        partial = (missing, data)
+                if queue:
+                    last = launch()
+        finally:
+            for task in running:
+                task.cancel()
+        if partial is not None:
+            logger.warning(f"⚠️ Tidak ada provider yang lengkap, pakai jawaban sebagian ({partial[0]} harga kosong)")
+            return partial[1]
+        raise Exception(f"Semua price provider gagal ({'; '.join(errors)})")
+
+    async def _fetch_median(self, coin_ids: list, vs: list) -> dict:
+        tasks = {
+            asyncio.create_task(self._timed_fetch(p, coin_ids, vs)): p for p in self.providers
+        }
+        done, pending = await asyncio.wait(tasks, timeout=self.median_timeout)
+        results = [t.result() for t in done if t.exception() is None]
+        if not results and pending:
+            # belum ada yang berhasil, tunggu jawaban valid pertama
+            while pending and not results:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                results = [t.result() for t in done if t.exception() is None]
+        for task in pending:
+            task.cancel()
+        if not results:
+            raise Exception("Semua price provider gagal")
+
+        merged = {}
+        for coin_id in coin_ids:
+            for v in vs:
+                values = [r[coin_id][v] for r in results if r.get(coin_id, {}).get(v)]
+                if values:
+                    merged.setdefault(coin_id, {})[v] = statistics.median(values)
+        return merged
+
+    def stats(self) -> dict:
+        return {p.name: p.stats.to_dict() for p in self.providers}
+
+
+def build_price_aggregator(names: str = PRICE_PROVIDERS) -> HedgedPriceAggregator:
+    """Bangun aggregator dari daftar nama provider (env PRICE_PROVIDERS)"""
+    factories = {
+        "coingecko": CoinGeckoProvider,
+        "cryptocompare": CryptoCompareProvider,
+        "stub": StubPriceProvider,
+    }
+    providers = []
+    for name in names.split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in factories:
+            logger.warning(f"⚠️ Price provider {name} tidak dikenal, di-skip")
+            continue
+        providers.append(factories[name]())
+    if not providers:
+        logger.warning("⚠️ PRICE_PROVIDERS kosong, pakai coingecko")
+        providers.append(CoinGeckoProvider())
+    logger.info(f"💱 Price provider: {[p.name for p in providers]} (mode={PRICE_AGGREGATION})")
+    return HedgedPriceAggregator(providers)
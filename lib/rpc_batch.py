@@ -0,0 +1,108 @@
+# 📍 lib/rpc_batch.py
+import os
+import asyncio
+import logging
+from web3 import Web3, AsyncHTTPProvider
+from web3._utils.caching import async_handle_request_caching
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Maksimal call per HTTP batch, lewat dari ini langsung di-flush
+RPC_BATCH_MAX = int(os.getenv("RPC_BATCH_MAX", "100"))
+# 🔹 Set false untuk node yang tidak terima JSON-RPC batch (array)
+RPC_BATCH_ENABLED = os.getenv("RPC_BATCH_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+class BatchingAsyncHTTPProvider(AsyncHTTPProvider):
+    """
+    AsyncHTTPProvider yang mengumpulkan semua call JSON-RPC di tick event loop yang sama
+    lalu mengirimnya sebagai satu HTTP batch request (array JSON-RPC).
+    Call yang di-asyncio.gather bareng (saldo, nonce, gas price, chain id) jadi satu round trip.
+    Kalau node menolak batch, call dikirim ulang satu per satu.
+    """
+
+    def __init__(self, *args, max_batch: int = RPC_BATCH_MAX, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_batch = max_batch
+        self._pending = []  # (method, params, future)
+        self._flush_handle = None
+        self._tasks = set()
+        self.round_trips = 0
+        self.calls = 0
+
+    @async_handle_request_caching
+    async def make_request(self, method, params):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((method, params, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            # call_soon jalan setelah semua task yang sudah antre di tick ini
+            self._flush_handle = loop.call_soon(self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _single(self, method, params):
+        self.round_trips += 1
+        return await super().make_request(method, params)
+
+    async def _send(self, batch: list):
+        self.calls += len(batch)
+        try:
+            if len(batch) == 1:
+                method, params, _ = batch[0]
+                responses = [await self._single(method, params)]
+            else:
+                self.round_trips += 1
+                try:
+                    responses = await self.make_batch_request([(m, p) for m, p, _ in batch])
+                except Exception as e:
+                    logger.warning(f"⚠️ Batch RPC gagal {self.endpoint_uri}: {e}")
+                    responses = None
+                if not isinstance(responses, list) or len(responses) != len(batch):
+                    logger.warning(f"⚠️ Batch RPC ditolak {self.endpoint_uri}, kirim satu per satu")
+                    responses = await asyncio.gather(
+                        *(self._single(m, p) for m, p, _ in batch), return_exceptions=True
+                    )
+        except Exception as e:
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        # response sudah diurutkan per id, id naik sesuai urutan call
+        for (_, _, fut), response in zip(batch, responses):
+            if fut.done():
+                continue
+            if isinstance(response, BaseException):
+                fut.set_exception(response)
+            else:
+                fut.set_result(response)
+
+    def stats(self) -> dict:
+        return {"round_trips": self.round_trips, "calls": self.calls}
+
+
+def fetch_receipt_and_block(w3: Web3, tx_hash, block_number=None):
+    """
+    Receipt + block sebuah tx. Kalau block_number sudah diketahui (dari tx/log),
+    dua call dikirim dalam satu batch; kalau tidak, block diambil setelah receipt.
+    """
+    if block_number is None or not RPC_BATCH_ENABLED:
+        receipt = w3.eth.get_transaction_receipt(tx_hash)
+        return receipt, w3.eth.get_block(receipt["blockNumber"])
+    with w3.batch_requests() as batch:
+        batch.add(w3.eth.get_transaction_receipt(tx_hash))
+        batch.add(w3.eth.get_block(block_number))
+        receipt, block = batch.execute()
+    return receipt, block
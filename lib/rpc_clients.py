@@ -0,0 +1,218 @@
+# 📍 lib/rpc_clients.py
+import os
+import time
+import asyncio
+import inspect
+import logging
+import threading
+from collections import OrderedDict
+from web3 import Web3, AsyncWeb3, AsyncHTTPProvider
+from tronpy import Tron, AsyncTron
+from tronpy.providers import HTTPProvider as TronHTTPProvider
+from tronpy.providers import AsyncHTTPProvider as AsyncTronHTTPProvider
+from solana.rpc.api import Client as SolanaClient
+from solana.rpc.async_api import AsyncClient as AsyncSolanaClient
+from lib.rpc_batch import BatchingAsyncHTTPProvider, RPC_BATCH_ENABLED
+from lib.circuit_breaker import guard_provider
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Maksimal client yang disimpan & berapa lama (detik) client nganggur sebelum dibuang
+RPC_CLIENT_MAX = int(os.getenv("RPC_CLIENT_MAX", "64"))
+RPC_CLIENT_IDLE_TTL = float(os.getenv("RPC_CLIENT_IDLE_TTL", "600"))
+
+
+class RpcClientRegistry:
+    """
+    Registry client RPC per (chain, rpc_url), supaya connection pool (keep-alive)
+    dipakai ulang antar request, bukan handshake baru tiap call.
+    - LRU: lewat max_size, client paling lama tidak dipakai ditutup
+    - idle: client yang nganggur lebih dari idle_ttl ditutup saat sweep
+    Thread-safe, karena helper sync juga jalan lewat asyncio.to_thread.
+    """
+
+    def __init__(self, max_size: int = RPC_CLIENT_MAX, idle_ttl: float = RPC_CLIENT_IDLE_TTL):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._clients = OrderedDict()  # (chain, rpc_url) -> [client, last_used, closer]
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def get(self, chain: str, rpc_url: str, factory, closer=None):
+        """Ambil client untuk (chain, rpc_url), factory(rpc_url) dipanggil kalau belum ada"""
+        if not rpc_url:
+            raise ValueError("❌ RPC URL harus diberikan!")
+        key = (chain.lower(), rpc_url)
+        now = time.monotonic()
+        with self._lock:
+            expired = self._pop_idle(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                entry[1] = now
+                self._clients.move_to_end(key)
+                self.reused += 1
+            else:
+                entry = self._clients[key] = [factory(rpc_url), now, closer]
+                self.created += 1
+                logger.info(f"🔌 Client RPC baru {key[0]} → {rpc_url}")
+                while len(self._clients) > self.max_size:
+                    expired.append(self._clients.popitem(last=False))
+        for old_key, old_entry in expired:
+            self._close(old_key, old_entry)
+        return entry[0]
+
+    def _pop_idle(self, now: float) -> list:
+        expired = []
+        # OrderedDict urut dari yang paling lama dipakai
+        while self._clients:
+            key, entry = next(iter(self._clients.items()))
+            if now - entry[1] <= self.idle_ttl:
+                break
+            expired.append(self._clients.popitem(last=False))
+        return expired
+
+    def _close(self, key, entry):
+        client, _, closer = entry
+        self.evicted += 1
+        logger.info(f"🔌 Client RPC {key[0]} → {key[1]} ditutup")
+        if closer is None:
+            return
+        try:
+            result = closer(client)
+            if inspect.isawaitable(result):
+                try:
+                    asyncio.get_running_loop().create_task(result)
+                except RuntimeError:
+                    # tidak ada event loop di thread ini, client async dibiarkan ke GC
+                    result.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal tutup client RPC {key[0]} → {key[1]}: {e}")
+
+    def sweep(self):
+        """Tutup client yang sudah nganggur lewat idle_ttl"""
+        with self._lock:
+            expired = self._pop_idle(time.monotonic())
+        for key, entry in expired:
+            self._close(key, entry)
+
+    async def aclose_all(self):
+        """Tutup semua client, dipanggil dari lifespan main.py"""
+        with self._lock:
+            entries = list(self._clients.items())
+            self._clients.clear()
+        for key, (client, _, closer) in entries:
+            if closer is None:
+                continue
+            try:
+                result = closer(client)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"⚠️ Gagal tutup client RPC {key[0]} → {key[1]}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+        }
+
+
+# ================== CLIENT FACTORY ==================
+# chain id tidak pernah berubah per endpoint, tapi web3 validasi tiap eth_call pakai
+# eth_chainId → cache di provider supaya tidak jadi round trip tambahan.
+# threshold None: skip probe threshold web3 (race kalau request pertama datang bersamaan)
+_EVM_PROVIDER_CACHE = {
+    "cache_allowed_requests": True,
+    "cacheable_requests": {"eth_chainId"},
+    "request_cache_validation_threshold": None,
+}
+
+def _close_tron(client: Tron):
+    sess = getattr(client.provider, "sess", None)
+    if sess is not None:
+        sess.close()
+
+
+def _solana(factory):
+    # breaker dipasang di provider HTTP client Solana
+    def build(url):
+        client = factory(url)
+        guard_provider(client._provider, url)
+        return client
+
+    return build
+
+
+# 🔹 Registry global, dipakai balance checker, helper kirim & tx_status
+rpc_clients = RpcClientRegistry()
+
+
+def get_web3(chain: str, rpc_url: str) -> Web3:
+    return rpc_clients.get(
+        chain,
+        rpc_url,
+        lambda url: Web3(guard_provider(Web3.HTTPProvider(url, **_EVM_PROVIDER_CACHE), url)),
+    )
+
+
+def get_async_web3(chain: str, rpc_url: str) -> AsyncWeb3:
+    return rpc_clients.get(
+        f"{chain}:async",
+        rpc_url,
+        lambda url: AsyncWeb3(guard_provider(AsyncHTTPProvider(url, **_EVM_PROVIDER_CACHE), url)),
+        closer=lambda w3: w3.provider.disconnect(),
+    )
+
+
+def get_batch_web3(chain: str, rpc_url: str) -> AsyncWeb3:
+    """AsyncWeb3 yang menggabungkan call di tick yang sama jadi satu JSON-RPC batch"""
+    if not RPC_BATCH_ENABLED:
+        return get_async_web3(chain, rpc_url)
+    # breaker cuma di make_request (per call); batch internal provider tidak dihitung dua kali
+    return rpc_clients.get(
+        f"{chain}:batch",
+        rpc_url,
+        lambda url: AsyncWeb3(
+            guard_provider(
+                BatchingAsyncHTTPProvider(url, **_EVM_PROVIDER_CACHE), url, methods=("make_request",)
+            )
+        ),
+        closer=lambda w3: w3.provider.disconnect(),
+    )
+
+
+def get_solana_client(rpc_url: str) -> SolanaClient:
+    return rpc_clients.get("sol", rpc_url, _solana(SolanaClient))
+
+
+def get_async_solana_client(rpc_url: str) -> AsyncSolanaClient:
+    return rpc_clients.get(
+        "sol:async", rpc_url, _solana(AsyncSolanaClient), closer=lambda client: client.close()
+    )
+
+
+def get_tron(rpc_url: str) -> Tron:
+    return rpc_clients.get(
+        "trx",
+        rpc_url,
+        lambda url: Tron(provider=guard_provider(TronHTTPProvider(url), url)),
+        closer=_close_tron,
+    )
+
+
+def get_async_tron(rpc_url: str) -> AsyncTron:
+    return rpc_clients.get(
+        "trx:async",
+        rpc_url,
+        lambda url: AsyncTron(provider=guard_provider(AsyncTronHTTPProvider(url), url)),
+        closer=lambda client: client.close(),
+    )
+
+
+async def close_rpc_clients():
+    await rpc_clients.aclose_all()
+    logger.info("🛑 Semua client RPC ditutup")
@@ -0,0 +1,295 @@
+# 📍 lib/rpc_router.py
+import os
+import time
+import asyncio
+import logging
+from dotenv import load_dotenv
+from web3.exceptions import ProviderConnectionError
+from solana.exceptions import SolanaRpcException
+from lib.rpc_clients import get_async_web3, get_async_solana_client, get_async_tron
+from lib.circuit_breaker import breakers, CircuitOpenError, redact_url
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Endpoint per chain: env list (dipisah koma) → env URL tunggal lama → default public RPC
+#    (None = tidak ada default, chain tanpa endpoint kalau env kosong)
+RPC_ENV = {
+    "eth": ("ETH_RPC_URLS", "ETH_RPC_URL", None),
+    "bsc": ("BSC_RPC_URLS", "BSC_RPC_URL", "https://bsc-dataseed.binance.org/"),
+    "base": ("BASE_RPC_URLS", "BASE_RPC_URL", None),
+    "polygon": ("POLYGON_RPC_URLS", "POLYGON_RPC_URL", "https://polygon-rpc.com/"),
+    "sol": ("SOLANA_RPC_URLS", "SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"),
+    "trx": ("TRON_FULL_NODES", "TRON_FULL_NODE", "https://api.trongrid.io"),
+}
+
+# nama chain alternatif yang dipakai endpoint (bnb = bsc)
+CHAIN_ALIASES = {"bnb": "bsc"}
+
+# 🔹 Interval probe head & latency (detik), timeout per probe
+RPC_PROBE_INTERVAL = float(os.getenv("RPC_PROBE_INTERVAL", "5"))
+RPC_PROBE_TIMEOUT = float(os.getenv("RPC_PROBE_TIMEOUT", "3"))
+# 🔹 Bobot sampel terbaru di EWMA latency & error rate
+RPC_EWMA_ALPHA = float(os.getenv("RPC_EWMA_ALPHA", "0.3"))
+# 🔹 Endpoint dengan error rate (EWMA) di atas ini dianggap tidak sehat
+RPC_MAX_ERROR_RATE = float(os.getenv("RPC_MAX_ERROR_RATE", "0.5"))
+
+# ketinggalan head maksimal (block / slot) sebelum endpoint dilewati, override: RPC_MAX_HEAD_LAG_ETH, dll
+MAX_HEAD_LAG = {"eth": 3, "bsc": 10, "base": 10, "polygon": 10, "sol": 50, "trx": 5}
+
+EVM_CHAINS = {"eth", "bsc", "base", "polygon"}
+
+
+def _chain(chain: str) -> str:
+    chain = chain.lower()
+    return CHAIN_ALIASES.get(chain, chain)
+
+
+# modul library HTTP yang error-nya berarti endpoint tidak bisa dijangkau / tidak menjawab benar
+TRANSPORT_MODULES = {"aiohttp", "httpx", "httpcore", "requests", "urllib3", "websockets"}
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """
+    True kalau error berasal dari transport (timeout, koneksi, HTTP 5xx), termasuk yang dibungkus.
+    Error JSON-RPC / input (revert, tx tidak ditemukan, alamat salah) bukan salah endpoint.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (TimeoutError, ConnectionError, OSError, ProviderConnectionError, SolanaRpcException)):
+            return True
+        if type(error).__module__.split(".")[0] in TRANSPORT_MODULES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _env_urls(chain: str) -> list:
+    list_env, single_env, default = RPC_ENV[chain]
+    raw = os.getenv(list_env) or os.getenv(single_env) or default or ""
+    return list(dict.fromkeys(url.strip() for url in raw.split(",") if url.strip()))
+
+
+class Endpoint:
+    """Satu RPC endpoint + kesehatannya: EWMA latency, EWMA error rate, head & ketinggalan head"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.name = redact_url(url)
+        # endpoint dari env: breaker-nya di-pin, tidak ikut dibuang saat registry breaker penuh
+        breakers.pin(url)
+        self.latency = None  # detik, None = belum pernah sukses
+        self.error_rate = 0.0
+        self.head = None
+        self.lag = 0
+        self.last_error = None
+        self.checked_at = None
+
+    def record(self, latency: float, ok: bool, error: str = None):
+        if ok:
+            self.latency = latency if self.latency is None else (
+                RPC_EWMA_ALPHA * latency + (1 - RPC_EWMA_ALPHA) * self.latency
+            )
+        else:
+            self.last_error = error
+        self.error_rate = RPC_EWMA_ALPHA * (0.0 if ok else 1.0) + (1 - RPC_EWMA_ALPHA) * self.error_rate
+
+    def healthy(self, max_lag: int) -> bool:
+        return self.error_rate <= RPC_MAX_ERROR_RATE and self.lag <= max_lag
+
+    def score(self) -> float:
+        # makin kecil makin bagus: latency dibobot error rate, endpoint baru dianggap 1 detik
+        latency = 1.0 if self.latency is None else self.latency
+        return latency / max(1.0 - self.error_rate, 0.05)
+
+    def stats(self) -> dict:
+        # URL & pesan error disamarkan, path/query RPC biasanya berisi API key
+        last_error = self.last_error.replace(self.url, self.name) if self.last_error else None
+        return {
+            "url": self.name,
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "head": self.head,
+            "lag": self.lag,
+            "last_error": last_error,
+            "breaker": breakers.get(self.url).stats()["state"],
+        }
+
+
+class ChainRouter:
+    """
+    Routing RPC satu chain ke beberapa endpoint.
+    Call dikirim ke endpoint sehat dengan skor terbaik, kalau gagal pindah ke endpoint berikutnya.
+    Prober di background (cuma kalau endpoint > 1) ukur latency & head tiap RPC_PROBE_INTERVAL,
+    endpoint yang head-nya ketinggalan lebih dari max_lag dilewati sampai menyusul lagi.
+    """
+
+    def __init__(self, chain: str, urls: list):
+        self.chain = chain
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.max_lag = int(os.getenv(f"RPC_MAX_HEAD_LAG_{chain.upper()}", MAX_HEAD_LAG.get(chain, 10)))
+        self.failovers = 0
+        self._best = None
+        self._task = None
+
+    def ordered(self) -> list:
+        """
+        Endpoint sehat urut skor, endpoint tidak sehat di belakang sebagai cadangan,
+        endpoint dengan circuit breaker open paling belakang
+        """
+        return sorted(
+            self.endpoints,
+            key=lambda ep: (breakers.is_open(ep.url), not ep.healthy(self.max_lag), ep.score()),
+        )
+
+    def pick(self) -> str:
+        return self.ordered()[0].url
+
+    async def call(self, fn):
+        """
+        fn(url) → awaitable; dicoba per endpoint sampai ada yang berhasil.
+        Cuma error transport yang dihitung gagal & pindah endpoint, error lain langsung dilempar.
+        """
+        last_error = None
+        for i, endpoint in enumerate(self.ordered()):
+            start = time.monotonic()
+            try:
+                result = await fn(endpoint.url)
+            except CircuitOpenError as e:
+                # ditolak breaker tanpa kena jaringan, bukan sampel latency / error baru
+                last_error = e
+                continue
+            except Exception as e:
+                if not is_transport_error(e):
+                    raise
+                endpoint.record(time.monotonic() - start, False, str(e))
+                last_error = e
+                logger.warning(f"⚠️ RPC {self.chain} → {endpoint.name} gagal: {e}")
+                continue
+            endpoint.record(time.monotonic() - start, True)
+            if i > 0:
+                self.failovers += 1
+                logger.info(f"🔀 RPC {self.chain} failover ke {endpoint.name}")
+            return result
+        raise last_error
+
+    # ================== PROBER ==================
+    async def _head(self, url: str) -> int:
+        if self.chain in EVM_CHAINS:
+            return await get_async_web3(self.chain, url).eth.block_number
+        if self.chain == "sol":
+            return (await get_async_solana_client(url).get_slot()).value
+        if self.chain == "trx":
+            return await get_async_tron(url).get_latest_block_number()
+        raise ValueError(f"Chain {self.chain} tidak bisa di-probe")
+
+    async def _probe_one(self, endpoint: Endpoint):
+        start = time.monotonic()
+        try:
+            endpoint.head = await asyncio.wait_for(self._head(endpoint.url), RPC_PROBE_TIMEOUT)
+            endpoint.record(time.monotonic() - start, True)
+        except CircuitOpenError:
+            # breaker open: probe ditahan sampai half-open, probe berikutnya jadi percobaan
+            pass
+        except Exception as e:
+            endpoint.record(time.monotonic() - start, False, str(e) or type(e).__name__)
+        endpoint.checked_at = time.time()
+
+    async def probe(self):
+        await asyncio.gather(*(self._probe_one(ep) for ep in self.endpoints))
+        heads = [ep.head for ep in self.endpoints if ep.head is not None]
+        top = max(heads) if heads else None
+        for endpoint in self.endpoints:
+            endpoint.lag = 0 if top is None or endpoint.head is None else top - endpoint.head
+        best = self.pick()
+        if best != self._best:
+            logger.info(f"🧭 RPC {self.chain} sekarang lewat {redact_url(best)}")
+            self._best = best
+
+    async def _loop(self):
+        logger.info(f"🩺 Prober RPC {self.chain} jalan tiap {RPC_PROBE_INTERVAL}s ({len(self.endpoints)} endpoint)")
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.warning(f"⚠️ Prober RPC {self.chain} gagal: {e}")
+            await asyncio.sleep(RPC_PROBE_INTERVAL)
+
+    def start(self):
+        if len(self.endpoints) > 1 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "best": redact_url(self.pick()),
+            "failovers": self.failovers,
+            "max_lag": self.max_lag,
+            "endpoints": [ep.stats() for ep in self.endpoints],
+        }
+
+
+class RpcRouter:
+    """Router per chain, dibangun dari env saat import"""
+
+    def __init__(self, urls: dict):
+        self._chains = {chain: ChainRouter(chain, u) for chain, u in urls.items() if u}
+
+    @classmethod
+    def from_env(cls) -> "RpcRouter":
+        load_dotenv()
+        router = cls({chain: _env_urls(chain) for chain in RPC_ENV})
+        for chain, r in router._chains.items():
+            logger.info(f"🧭 RPC {chain}: {len(r.endpoints)} endpoint")
+        return router
+
+    def chain(self, chain: str) -> ChainRouter:
+        router = self._chains.get(_chain(chain))
+        if router is None:
+            raise ValueError(f"RPC untuk chain {chain} belum di-set")
+        return router
+
+    def configured(self, chain: str, url: str) -> bool:
+        """True kalau url adalah endpoint dari env untuk chain itu (bukan URL kiriman user)"""
+        router = self._chains.get(_chain(chain))
+        return router is not None and any(ep.url == url for ep in router.endpoints)
+
+    def pick(self, chain: str) -> str:
+        """URL endpoint terbaik saat ini, untuk call yang tidak boleh diulang ke endpoint lain"""
+        return self.chain(chain).pick()
+
+    async def call(self, chain: str, fn):
+        """Jalankan fn(url) di endpoint terbaik, failover otomatis kalau gagal"""
+        return await self.chain(chain).call(fn)
+
+    def start(self):
+        for router in self._chains.values():
+            router.start()
+
+    async def stop(self):
+        await asyncio.gather(*(router.stop() for router in self._chains.values()))
+
+    def stats(self) -> dict:
+        return {chain: router.stats() for chain, router in self._chains.items()}
+
+
+# 🔹 Router global, prober dijalankan dari lifespan main.py
+rpc_router = RpcRouter.from_env()
+
+
+async def start_rpc_router():
+    rpc_router.start()
+
+
+async def stop_rpc_router():
+    await rpc_router.stop()
+    logger.info("🛑 Prober RPC dihentikan")
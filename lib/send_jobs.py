@@ -0,0 +1,448 @@
+# 📍 lib/send_jobs.py
+import os
+import math
+import time
+import uuid
+import base64
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from cryptography.fernet import Fernet, InvalidToken
+from web3.exceptions import TransactionNotFound
+from tronpy.exceptions import TransactionNotFound as TronTransactionNotFound
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+from lib.native_sender import send_native, NATIVE_CHAINS
+from lib.usdt_helper import broadcast_usdt
+from lib.usdc_helper import broadcast_usdc
+from lib.nonce_manager import BroadcastUnknown, hex_hash
+from lib.rpc_router import rpc_router, EVM_CHAINS
+from lib.rpc_clients import get_async_web3, get_async_solana_client, get_tron
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 🔹 File SQLite antrian job kirim (tahan restart)
+SEND_JOB_DB = os.getenv("SEND_JOB_DB", "send_jobs.db")
+# 🔹 Worker paralel per chain, override per chain: SEND_JOB_CHAIN_LIMIT_ETH, SEND_JOB_CHAIN_LIMIT_SOL, dll
+SEND_JOB_CHAIN_LIMIT = int(os.getenv("SEND_JOB_CHAIN_LIMIT", "4"))
+# 🔹 Interval cek receipt / status signature (detik) & batas tunggu konfirmasi
+SEND_JOB_POLL_INTERVAL = float(os.getenv("SEND_JOB_POLL_INTERVAL", "5"))
+SEND_JOB_CONFIRM_TIMEOUT = float(os.getenv("SEND_JOB_CONFIRM_TIMEOUT", "600"))
+# 🔹 Umur maksimal job sent dilacak (detik, dari job dibuat); lewat batas → unknown, tidak dilacak lagi tiap restart
+SEND_JOB_MAX_TRACK_AGE = float(os.getenv("SEND_JOB_MAX_TRACK_AGE", "86400"))
+# 🔹 Secret untuk enkripsi private key user di database; kosong = private key cuma disimpan di memory
+SEND_JOB_SECRET = os.getenv("SEND_JOB_SECRET", "")
+
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+UNKNOWN = "unknown"  # tx sudah broadcast tapi tidak terkonfirmasi sampai batas umur, cek manual lewat tx_hash
+
+# token non-native yang dikirim dari wallet service (private key dari env), cuma untuk pemanggil
+# internal (submit(..., allow_service=True)); API publik tidak boleh menguras hot wallet
+# broadcaster sync: return tx hash tanpa nunggu konfirmasi, dijalankan lewat asyncio.to_thread
+TOKEN_SENDERS = {"usdt": broadcast_usdt, "usdc": broadcast_usdc}
+TOKEN_CHAINS = {"eth", "bsc", "trx", "base", "sol"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS send_jobs (
+    id TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    chain TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    amount REAL NOT NULL,
+    rpc_url TEXT,
+    private_key TEXT,
+    status TEXT NOT NULL,
+    tx_hash TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS send_jobs_status ON send_jobs (status);
+"""
+
+PUBLIC_FIELDS = ("id", "token", "chain", "destination", "amount", "status", "tx_hash", "error", "attempts", "created_at", "updated_at")
+
+
+def resolve_token(token: str, chain: str = None):
+    """(token, chain) yang valid untuk dikirim, ValueError kalau tidak didukung"""
+    token = token.lower()
+    chain = (chain or "").lower()
+    chain = "bsc" if chain == "bnb" else chain
+    if token in NATIVE_CHAINS:
+        if chain and chain != NATIVE_CHAINS[token]:
+            raise ValueError(f"{token.upper()} native ada di chain {NATIVE_CHAINS[token]}, bukan {chain}")
+        return token, NATIVE_CHAINS[token]
+    if token in TOKEN_SENDERS:
+        if chain not in TOKEN_CHAINS:
+            raise ValueError(f"Chain {chain or '-'} tidak didukung untuk {token.upper()}")
+        return token, chain
+    raise ValueError(f"Token {token} belum didukung!")
+
+
+def _cipher():
+    if not SEND_JOB_SECRET:
+        return None
+    key = base64.urlsafe_b64encode(hashlib.sha256(SEND_JOB_SECRET.encode()).digest())
+    return Fernet(key)
+
+
+class SendJobStore:
+    """Tabel job kirim di SQLite, satu koneksi dipakai bersama (lock) dari event loop & thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def insert(self, job: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO send_jobs (id, token, chain, destination, amount, rpc_url, private_key, "
+                "status, attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (
+                    job["id"], job["token"], job["chain"], job["destination"], job["amount"],
+                    job.get("rpc_url"), job.get("private_key"), QUEUED,
+                    job["created_at"], job["created_at"],
+                ),
+            )
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE send_jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM send_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def by_status(self, *statuses) -> list:
+        marks = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM send_jobs WHERE status IN ({marks}) ORDER BY created_at", statuses
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM send_jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SendJobQueue:
+    """
+    Antrian job kirim token: request cuma simpan job & dapat job_id (202), worker yang kirim.
+    - satu asyncio.Queue + SEND_JOB_CHAIN_LIMIT worker per chain, jadi chain lambat tidak menahan chain lain
+    - tiap perubahan status ditulis ke SQLite: queued → sending → sent → confirmed / failed
+    - restart: job queued diantrikan lagi, job sent dilacak lagi sampai konfirmasi, job yang
+      terputus saat sending ditandai failed (tidak dikirim ulang, bisa jadi sudah masuk chain)
+    - job sent yang melewati SEND_JOB_MAX_TRACK_AGE ditandai unknown dan berhenti dilacak
+    - private key user (native token) disimpan terenkripsi kalau SEND_JOB_SECRET di-set,
+      kalau tidak cuma di memory dan job-nya tidak bisa dilanjutkan setelah restart
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._store = None
+        self._cipher = _cipher()
+        self._keys = {}  # job id → private key (tanpa SEND_JOB_SECRET)
+        self._queues = {}
+        self._workers = []
+        self._trackers = set()
+
+    @property
+    def running(self) -> bool:
+        return self._store is not None
+
+    # ================== SUBMIT ==================
+    async def submit(
+        self,
+        token: str,
+        destination_wallet: str,
+        amount: float,
+        chain: str = None,
+        rpc_url: str = None,
+        private_key: str = None,
+        allow_service: bool = False,
+    ) -> dict:
+        """
+        Simpan job & masukkan ke antrian chain-nya, return job (tanpa private key).
+        Token wallet service (USDT/USDC) ditolak kecuali allow_service=True (pemanggil internal).
+        """
+        if not self.running:
+            raise RuntimeError("Antrian send job belum jalan")
+        token, chain = resolve_token(token, chain)
+        if token in TOKEN_SENDERS and not allow_service:
+            raise PermissionError(f"{token.upper()} dikirim dari wallet service, tidak bisa lewat API publik")
+        if not math.isfinite(amount) or amount <= 0:
+            raise ValueError("Amount harus angka lebih dari 0")
+        if token in NATIVE_CHAINS and not private_key:
+            raise ValueError("Private key harus diberikan untuk native token")
+        job = {
+            "id": uuid.uuid4().hex,
+            "token": token,
+            "chain": chain,
+            "destination": destination_wallet,
+            "amount": amount,
+            "rpc_url": rpc_url,
+            "private_key": None,
+            "status": QUEUED,
+            "tx_hash": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": time.time(),
+        }
+        job["updated_at"] = job["created_at"]
+        if private_key:
+            if self._cipher is not None:
+                job["private_key"] = self._cipher.encrypt(private_key.encode()).decode()
+            else:
+                self._keys[job["id"]] = private_key
+        await asyncio.to_thread(self._store.insert, job)
+        self._queue(chain).put_nowait(job["id"])
+        logger.info(f"📥 Job {job['id']} {token.upper()} {chain} → {destination_wallet} ({amount}) masuk antrian")
+        return self.public(job)
+
+    async def get(self, job_id: str):
+        if not self.running:
+            return None
+        return self.public(await asyncio.to_thread(self._store.get, job_id))
+
+    @staticmethod
+    def public(job: dict):
+        return None if job is None else {field: job[field] for field in PUBLIC_FIELDS}
+
+    # ================== WORKER ==================
+    def _queue(self, chain: str) -> asyncio.Queue:
+        queue = self._queues.get(chain)
+        if queue is None:
+            queue = self._queues[chain] = asyncio.Queue()
+            limit = int(os.getenv(f"SEND_JOB_CHAIN_LIMIT_{chain.upper()}", SEND_JOB_CHAIN_LIMIT))
+            for _ in range(max(limit, 1)):
+                self._workers.append(asyncio.create_task(self._worker(chain, queue)))
+            logger.info(f"👷 Worker send job {chain}: {limit}")
+        return queue
+
+    def _private_key(self, job: dict):
+        if job["id"] in self._keys:
+            return self._keys.pop(job["id"])
+        if job["private_key"] and self._cipher is not None:
+            try:
+                return self._cipher.decrypt(job["private_key"].encode()).decode()
+            except InvalidToken:
+                raise ValueError("Private key job tidak bisa didekripsi (SEND_JOB_SECRET berubah?)")
+        return None
+
+    async def _send(self, job: dict) -> str:
+        """Tanda tangan & broadcast tanpa nunggu konfirmasi, return tx_hash (konfirmasi dilacak _follow)"""
+        if job["token"] in TOKEN_SENDERS:
+            # broadcaster token pakai client sync → jalan di thread
+            broadcaster = TOKEN_SENDERS[job["token"]]
+            return await asyncio.to_thread(broadcaster, job["destination"], job["amount"], job["chain"])
+        private_key = self._private_key(job)
+        if not private_key:
+            raise ValueError("Private key tidak tersedia (hilang saat restart, set SEND_JOB_SECRET untuk menyimpan)")
+        tx_hash = await send_native(
+            job["token"], job["destination"], job["amount"], rpc_url=job["rpc_url"], private_key=private_key
+        )
+        if not tx_hash:
+            raise RuntimeError("Transaksi gagal dijalankan. Periksa saldo atau wallet.")
+        return str(tx_hash)
+
+    async def _run(self, job_id: str):
+        job = await asyncio.to_thread(self._store.get, job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+        await asyncio.to_thread(self._store.update, job_id, status=SENDING, attempts=job["attempts"] + 1)
+        error = None
+        try:
+            tx_hash = await self._send(job)
+        except BroadcastUnknown as e:
+            # tx bisa sudah masuk mempool: simpan hash lokal sebagai sent & lacak, jangan ditandai failed
+            self._keys.pop(job_id, None)
+            tx_hash, error = hex_hash(e.tx_hash), str(e)
+            logger.warning(f"⚠️ Job {job_id} status broadcast tidak jelas, dilacak lewat tx {tx_hash}")
+        except Exception as e:
+            self._keys.pop(job_id, None)
+            logger.error(f"❌ Job {job_id} gagal: {e}", exc_info=True)
+            await asyncio.to_thread(self._store.update, job_id, status=FAILED, error=str(e), private_key=None)
+            return
+        # SENT + tx_hash disimpan sebelum nunggu konfirmasi, supaya tx yang sudah terbayar tidak hilang
+        await asyncio.to_thread(
+            self._store.update, job_id, status=SENT, tx_hash=tx_hash, error=error, private_key=None
+        )
+        logger.info(f"✅ Job {job_id} {SENT}, tx: {tx_hash}")
+        self._track({**job, "tx_hash": tx_hash, "updated_at": time.time()})
+
+    async def _worker(self, chain: str, queue: asyncio.Queue):
+        while True:
+            job_id = await queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"❌ Worker send job {chain} error di job {job_id}: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    # ================== TRACKING ==================
+    async def _evm_status(self, chain: str, rpc_url: str, tx_hash: str):
+        """True = sukses, False = revert, None = belum masuk block"""
+        w3 = get_async_web3(chain, rpc_url)
+        try:
+            receipt = await w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+        return receipt["status"] == 1
+
+    async def _sol_status(self, rpc_url: str, signature: str):
+        client = get_async_solana_client(rpc_url)
+        status = (await client.get_signature_statuses([Signature.from_string(signature)])).value[0]
+        if status is None or status.confirmation_status == TransactionConfirmationStatus.Processed:
+            return None
+        return status.err is None
+
+    def _trx_status(self, rpc_url: str, txid: str):
+        try:
+            info = get_tron(rpc_url).get_transaction_info(txid)
+        except TronTransactionNotFound:
+            return None
+        if not info or "blockNumber" not in info:
+            return None
+        # transfer TRX native tidak punya "receipt.result", cuma kontrak (TRC20) yang punya
+        result = info.get("receipt", {}).get("result")
+        return result in (None, "SUCCESS") and info.get("result") != "FAILED"
+
+    async def _status(self, job: dict):
+        chain = job["chain"]
+        if chain in EVM_CHAINS:
+            fn = lambda url: self._evm_status(chain, url, job["tx_hash"])
+        elif chain == "sol":
+            fn = lambda url: self._sol_status(url, job["tx_hash"])
+        elif chain == "trx":
+            fn = lambda url: asyncio.to_thread(self._trx_status, url, job["tx_hash"])
+        else:
+            raise ValueError(f"Status tx chain {chain} belum didukung")
+        if job["rpc_url"]:
+            return await fn(job["rpc_url"])
+        # cuma baca status, aman failover ke endpoint lain
+        return await rpc_router.call(chain, fn)
+
+    @staticmethod
+    def _expires_at(job: dict) -> float:
+        return job["created_at"] + SEND_JOB_MAX_TRACK_AGE
+
+    async def _expire(self, job: dict):
+        await asyncio.to_thread(
+            self._store.update,
+            job["id"],
+            status=UNKNOWN,
+            error=f"Tidak terkonfirmasi dalam {SEND_JOB_MAX_TRACK_AGE:.0f}s, cek tx {job['tx_hash']} sebelum kirim ulang",
+        )
+        logger.warning(f"⚠️ Job {job['id']} berhenti dilacak (unknown), tx: {job['tx_hash']}")
+
+    async def _follow(self, job: dict):
+        deadline = min(job["updated_at"] + SEND_JOB_CONFIRM_TIMEOUT, self._expires_at(job))
+        while time.time() < deadline:
+            await asyncio.sleep(SEND_JOB_POLL_INTERVAL)
+            try:
+                ok = await self._status(job)
+            except Exception as e:
+                logger.warning(f"⚠️ Gagal cek status job {job['id']} ({job['tx_hash']}): {e}")
+                continue
+            if ok is None:
+                continue
+            if ok:
+                await asyncio.to_thread(self._store.update, job["id"], status=CONFIRMED)
+                logger.info(f"✅ Job {job['id']} terkonfirmasi, tx: {job['tx_hash']}")
+            else:
+                await asyncio.to_thread(self._store.update, job["id"], status=FAILED, error="Transaksi gagal di chain")
+                logger.error(f"❌ Job {job['id']} gagal di chain, tx: {job['tx_hash']}")
+            return
+        if time.time() >= self._expires_at(job):
+            await self._expire(job)
+            return
+        # status tetap sent (dilacak lagi setelah restart sampai batas umur), cek manual lewat /tx_status
+        await asyncio.to_thread(
+            self._store.update, job["id"], error=f"Belum terkonfirmasi setelah {SEND_JOB_CONFIRM_TIMEOUT:.0f}s"
+        )
+        logger.warning(f"⚠️ Job {job['id']} belum terkonfirmasi, tx: {job['tx_hash']}")
+
+    def _track(self, job: dict):
+        task = asyncio.create_task(self._follow(job))
+        self._trackers.add(task)
+        task.add_done_callback(self._trackers.discard)
+
+    # ================== LIFECYCLE ==================
+    async def start(self):
+        if self.running:
+            return
+        self._store = await asyncio.to_thread(SendJobStore, self.path)
+        for job in await asyncio.to_thread(self._store.by_status, SENDING):
+            await asyncio.to_thread(
+                self._store.update,
+                job["id"],
+                status=FAILED,
+                private_key=None,
+                error="Terputus saat broadcast (service restart), cek wallet tujuan sebelum kirim ulang",
+            )
+            logger.warning(f"⚠️ Job {job['id']} terputus saat broadcast, ditandai failed")
+        for job in await asyncio.to_thread(self._store.by_status, SENT):
+            if time.time() >= self._expires_at(job):
+                await self._expire(job)
+            else:
+                self._track(job)
+        queued = await asyncio.to_thread(self._store.by_status, QUEUED)
+        for job in queued:
+            self._queue(job["chain"]).put_nowait(job["id"])
+        logger.info(f"🗂️ Send job queue jalan ({self.path}), {len(queued)} job queued dilanjutkan")
+
+    async def stop(self):
+        if not self.running:
+            return
+        tasks = self._workers + list(self._trackers)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._queues = {}
+        self._trackers = set()
+        await asyncio.to_thread(self._store.close)
+        self._store = None
+
+    def stats(self) -> dict:
+        return {
+            "jobs": self._store.counts() if self.running else {},
+            "queued": {chain: queue.qsize() for chain, queue in self._queues.items()},
+            "tracking": len(self._trackers),
+        }
+
+
+# 🔹 Antrian global, dijalankan dari lifespan main.py
+send_jobs = SendJobQueue(SEND_JOB_DB)
+
+
+async def start_send_jobs():
+    await send_jobs.start()
+
+
+async def stop_send_jobs():
+    await send_jobs.stop()
+    logger.info("🛑 Send job queue dihentikan")
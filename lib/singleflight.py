@@ -0,0 +1,56 @@
+# 📍 lib/singleflight.py
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Semua grup single-flight yang aktif, buat expose counter
+_groups = {}
+
+
+class SingleFlight:
+    """
+    Gabungkan pemanggilan async dengan key yang sama jadi satu in-flight task.
+    Caller yang datang saat task masih jalan cukup nunggu hasil yang sama,
+    jadi burst request tidak jadi N panggilan HTTP identik ke upstream.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.issued = 0  # jumlah panggilan yang benar-benar jalan ke upstream
+        self.coalesced = 0  # jumlah caller yang numpang hasil in-flight
+        self._inflight = {}
+        _groups[name] = self
+
+    def in_flight(self, key) -> bool:
+        return key in self._inflight
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.issued += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        # shield: caller yang di-cancel tidak ikut membatalkan task bersama
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"⚠️ [{self.name}] in-flight {key} gagal: {task.exception()}")
+
+    def stats(self) -> dict:
+        return {
+            "issued": self.issued,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+def get_singleflight_stats() -> dict:
+    """Counter issued/coalesced semua grup"""
+    return {name: group.stats() for name, group in _groups.items()}
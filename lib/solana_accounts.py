@@ -0,0 +1,161 @@
+# 📍 lib/solana_accounts.py
+import os
+import asyncio
+import logging
+from solders.pubkey import Pubkey
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import TokenAccountOpts
+from solders.rpc.responses import GetTokenAccountsByOwnerResp
+from spl.token.constants import (
+    TOKEN_PROGRAM_ID,
+    TOKEN_2022_PROGRAM_ID,
+    ASSOCIATED_TOKEN_PROGRAM_ID,
+)
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Batas node Solana: maksimal 100 akun per getMultipleAccounts
+SOL_MULTIPLE_ACCOUNTS_MAX = int(os.getenv("SOL_MULTIPLE_ACCOUNTS_MAX", "100"))
+
+LAMPORTS_PER_SOL = 1_000_000_000
+TOKEN_PROGRAMS = (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID)
+
+# mint tidak pernah ganti program / decimals → cache selamanya per (rpc_url, mint)
+_mint_cache = {}  # (rpc_url, mint) -> (token program, decimals)
+
+
+def derive_ata(owner: Pubkey, mint: Pubkey, token_program: Pubkey = TOKEN_PROGRAM_ID) -> Pubkey:
+    """Alamat Associated Token Account, dihitung lokal tanpa RPC"""
+    ata, _ = Pubkey.find_program_address(
+        [bytes(owner), bytes(token_program), bytes(mint)], ASSOCIATED_TOKEN_PROGRAM_ID
+    )
+    return ata
+
+
+def decode_token_amount(data: bytes) -> int:
+    """Jumlah raw token account SPL: mint(32) owner(32) amount(u64 LE)"""
+    if len(data) < 72:
+        raise ValueError("data token account tidak valid")
+    return int.from_bytes(data[64:72], "little")
+
+
+def decode_mint_decimals(data: bytes) -> int:
+    """Decimals mint SPL: mint_authority(36) supply(8) decimals(u8)"""
+    if len(data) < 45:
+        raise ValueError("data mint tidak valid")
+    return data[44]
+
+
+async def get_multiple_accounts(client: AsyncClient, pubkeys: list) -> list:
+    """getMultipleAccounts untuk list panjang, dipecah per 100 akun & dikirim paralel"""
+    chunks = [
+        pubkeys[i : i + SOL_MULTIPLE_ACCOUNTS_MAX]
+        for i in range(0, len(pubkeys), SOL_MULTIPLE_ACCOUNTS_MAX)
+    ]
+    responses = await asyncio.gather(
+        *(client.get_multiple_accounts(chunk, encoding="base64") for chunk in chunks)
+    )
+    return [account for resp in responses for account in resp.value]
+
+
+async def _fetch(client: AsyncClient, pubkeys) -> dict:
+    pubkeys = list(dict.fromkeys(pubkeys))
+    if not pubkeys:
+        return {}
+    return dict(zip(pubkeys, await get_multiple_accounts(client, pubkeys)))
+
+
+async def get_token_accounts(client: AsyncClient, owners_mints: list) -> list:
+    """
+    getTokenAccountsByOwner (filter mint, encoding base64) untuk banyak (owner, mint) sekaligus:
+    dikirim sebagai JSON-RPC batch per SOL_MULTIPLE_ACCOUNTS_MAX call, chunk paralel.
+    Return list (daftar data akun, error) urut sesuai input.
+    """
+    if not owners_mints:
+        return []
+    reqs = [
+        client._get_token_accounts_by_owner_body(owner, TokenAccountOpts(mint=mint, encoding="base64"), None)
+        for owner, mint in owners_mints
+    ]
+    chunks = [
+        reqs[i : i + SOL_MULTIPLE_ACCOUNTS_MAX] for i in range(0, len(reqs), SOL_MULTIPLE_ACCOUNTS_MAX)
+    ]
+    # AsyncClient tidak punya API batch publik, pakai provider-nya langsung
+    responses = await asyncio.gather(
+        *(
+            client._provider.make_batch_request(tuple(chunk), (GetTokenAccountsByOwnerResp,) * len(chunk))
+            for chunk in chunks
+        )
+    )
+    results = []
+    for resp in (r for chunk in responses for r in chunk):
+        if isinstance(resp, GetTokenAccountsByOwnerResp):
+            results.append(([bytes(keyed.account.data) for keyed in resp.value], None))
+        else:
+            results.append((None, str(getattr(resp, "message", resp))))
+    return results
+
+
+async def read_sol_balances(client: AsyncClient, rpc_url: str, queries: list) -> list:
+    """
+    Baca banyak saldo SOL / SPL sekaligus.
+    queries: list (wallet, mint) dengan mint=None untuk SOL native.
+    SOL native & mint yang belum di-cache lewat getMultipleAccounts; saldo SPL dijumlah dari semua
+    token account wallet untuk mint itu (getTokenAccountsByOwner dalam satu JSON-RPC batch),
+    sama dengan /balance per wallet, jadi token di luar ATA ikut terhitung. Decode lokal dari data akun.
+    Return list (balance, error) urut sesuai queries.
+    """
+    results = [None] * len(queries)
+    parsed = []  # (index, owner, mint)
+    for i, (wallet, mint) in enumerate(queries):
+        try:
+            owner = Pubkey.from_string(wallet)
+            mint_pub = Pubkey.from_string(mint) if mint else None
+        except Exception as e:
+            results[i] = (None, str(e))
+            continue
+        parsed.append((i, owner, mint_pub))
+
+    # akun native & mint yang belum di-cache, paralel dengan token account tiap (wallet, mint)
+    unknown_mints = {
+        mint for _, _, mint in parsed if mint and (rpc_url, mint) not in _mint_cache
+    }
+    spl = [(owner, mint) for _, owner, mint in parsed if mint is not None]
+    accounts, token_accounts = await asyncio.gather(
+        _fetch(client, [owner for _, owner, mint in parsed if mint is None] + list(unknown_mints)),
+        get_token_accounts(client, list(dict.fromkeys(spl))),
+    )
+    token_accounts = dict(zip(dict.fromkeys(spl), token_accounts))
+
+    for mint in unknown_mints:
+        account = accounts.get(mint)
+        if account is None or account.owner not in TOKEN_PROGRAMS:
+            continue
+        try:
+            _mint_cache[(rpc_url, mint)] = (account.owner, decode_mint_decimals(bytes(account.data)))
+        except ValueError:
+            continue
+
+    for i, owner, mint in parsed:
+        if mint is None:
+            account = accounts.get(owner)
+            # akun yang belum pernah dapat SOL tidak ada di chain → saldo 0
+            results[i] = ((account.lamports if account else 0) / LAMPORTS_PER_SOL, None)
+            continue
+        cached = _mint_cache.get((rpc_url, mint))
+        if cached is None:
+            results[i] = (None, "mint SPL tidak ditemukan")
+            continue
+        _, decimals = cached
+        datas, error = token_accounts[(owner, mint)]
+        if error is not None:
+            results[i] = (None, error)
+            continue
+        # belum punya token account → saldo 0
+        try:
+            results[i] = (sum(decode_token_amount(data) for data in datas) / 10**decimals, None)
+        except ValueError as e:
+            results[i] = (None, str(e))
+
+    logger.info(f"🧮 getMultipleAccounts + getTokenAccountsByOwner batch: {len(queries)} saldo Solana")
+    return results
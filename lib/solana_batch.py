@@ -0,0 +1,225 @@
+# 📍 lib/solana_batch.py
+import os
+import asyncio
+import logging
+from solders.pubkey import Pubkey
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.signature import Signature
+from solders.transaction import Transaction
+from solders.system_program import transfer, TransferParams
+from solana.rpc.types import TxOpts
+from spl.token.instructions import (
+    transfer_checked,
+    TransferCheckedParams,
+    create_idempotent_associated_token_account,
+)
+from lib.rpc_clients import get_async_solana_client
+from lib.solana_accounts import (
+    derive_ata,
+    decode_token_amount,
+    decode_mint_decimals,
+    get_multiple_accounts,
+    LAMPORTS_PER_SOL,
+    TOKEN_PROGRAMS,
+)
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Batas ukuran tx Solana (byte, PACKET_DATA_SIZE)
+SOL_TX_MAX_BYTES = int(os.getenv("SOL_TX_MAX_BYTES", "1232"))
+# 🔹 Tx batch yang dikirim paralel ke RPC
+SOL_BATCH_CONCURRENCY = int(os.getenv("SOL_BATCH_CONCURRENCY", "8"))
+
+# fee dasar per signature & rent-exempt token account (165 byte), buat cek saldo sebelum kirim
+LAMPORTS_PER_SIGNATURE = 5000
+TOKEN_ACCOUNT_RENT = 2_039_280
+# maksimal signature per getSignatureStatuses
+SIGNATURE_STATUS_LIMIT = 256
+
+
+def _tx_size(payer: Pubkey, instructions: list, blockhash) -> int:
+    message = Message.new_with_blockhash(instructions, payer, blockhash)
+    return len(bytes(Transaction.new_unsigned(message)))
+
+
+def _pack(payer: Pubkey, items: list, blockhash) -> tuple:
+    """
+    Kelompokkan instruksi ke tx sesedikit mungkin (greedy, urut input) tanpa lewat SOL_TX_MAX_BYTES.
+    items: [(index, [instruksi])], instruksi satu payout tidak pernah dipecah ke dua tx.
+    Return (list tx [(indexes, instruksi)], {index: error} untuk payout yang kebesaran sendirian).
+    """
+    packed, oversized = [], {}
+    indexes, instructions = [], []
+    for index, item in items:
+        if instructions and _tx_size(payer, instructions + item, blockhash) <= SOL_TX_MAX_BYTES:
+            indexes.append(index)
+            instructions += item
+            continue
+        if _tx_size(payer, item, blockhash) > SOL_TX_MAX_BYTES:
+            oversized[index] = "Instruksi payout melebihi batas ukuran tx Solana"
+            continue
+        if instructions:
+            packed.append((indexes, instructions))
+        indexes, instructions = [index], list(item)
+    if instructions:
+        packed.append((indexes, instructions))
+    return packed, oversized
+
+
+async def _landed(client, signatures: list) -> set:
+    """Signature yang sudah tercatat sukses di chain (getSignatureStatuses), kosong kalau cek gagal"""
+    landed = set()
+    try:
+        for start in range(0, len(signatures), SIGNATURE_STATUS_LIMIT):
+            chunk = signatures[start:start + SIGNATURE_STATUS_LIMIT]
+            statuses = (await client.get_signature_statuses([Signature.from_string(sig) for sig in chunk])).value
+            landed.update(sig for sig, status in zip(chunk, statuses) if status is not None and status.err is None)
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal cek status signature Solana: {e}")
+    return landed
+
+
+async def _send_packed(client, payer: Keypair, packed: list, oversized: dict, results: list, blockhash):
+    """
+    Tanda tangan semua tx dengan satu blockhash lalu kirim paralel, hasil ditulis per payout.
+    Kirim error → (signature lokal, error): status tidak jelas, tx bisa saja sudah masuk.
+    Signature itu dicek sekali lewat getSignatureStatuses; yang belum terlihat tetap dilaporkan
+    dengan signature-nya supaya pemanggil cek status dulu sebelum kirim ulang.
+    """
+    for index, error in oversized.items():
+        results[index] = (None, error)
+    semaphore = asyncio.Semaphore(SOL_BATCH_CONCURRENCY)
+    unknown = {}
+
+    async def send(indexes: list, instructions: list):
+        tx = Transaction.new_signed_with_payer(instructions, payer.pubkey(), [payer], blockhash)
+        async with semaphore:
+            try:
+                resp = await client.send_raw_transaction(
+                    bytes(tx), opts=TxOpts(skip_preflight=False, preflight_commitment="confirmed")
+                )
+                result = (str(resp.value), None)
+            except Exception as e:
+                signature = str(tx.signatures[0])
+                logger.error(f"❌ Tx batch Solana ({len(indexes)} payout) status tidak jelas, sig={signature}: {e}")
+                result = (signature, f"Status tx tidak jelas, cek signature sebelum kirim ulang: {e}")
+                unknown[signature] = indexes
+        for index in indexes:
+            results[index] = result
+
+    await asyncio.gather(*(send(indexes, instructions) for indexes, instructions in packed))
+    if unknown:
+        for signature in await _landed(client, list(unknown)):
+            for index in unknown[signature]:
+                results[index] = (signature, None)
+    logger.info(f"📦 {len(results)} payout Solana dikirim dalam {len(packed)} tx")
+
+
+async def send_sol_batch(rpc_url: str, payer: Keypair, payouts: list) -> list:
+    """
+    Kirim SOL ke banyak wallet: transfer dipadatkan ke tx sesedikit mungkin, satu blockhash.
+    payouts: [(destination_wallet, amount_sol)]. Return [(signature, error)] urut sesuai payouts,
+    signature + error sekaligus = status broadcast tidak jelas.
+    """
+    client = get_async_solana_client(rpc_url)
+    results = [(None, "Belum dikirim")] * len(payouts)
+    items = []
+    total = 0
+    for index, (destination, amount) in enumerate(payouts):
+        lamports = int(amount * LAMPORTS_PER_SOL)
+        total += lamports
+        items.append(
+            (
+                index,
+                [transfer(TransferParams(
+                    from_pubkey=payer.pubkey(),
+                    to_pubkey=Pubkey.from_string(destination),
+                    lamports=lamports,
+                ))],
+            )
+        )
+
+    balance_resp, blockhash_resp = await asyncio.gather(
+        client.get_balance(payer.pubkey()),
+        client.get_latest_blockhash(),
+    )
+    blockhash = blockhash_resp.value.blockhash
+    packed, oversized = _pack(payer.pubkey(), items, blockhash)
+    needed = total + LAMPORTS_PER_SIGNATURE * len(packed)
+    if balance_resp.value < needed:
+        error = f"Saldo SOL tidak cukup: butuh {needed / LAMPORTS_PER_SOL}, saldo {balance_resp.value / LAMPORTS_PER_SOL}"
+        return [(None, error)] * len(payouts)
+
+    await _send_packed(client, payer, packed, oversized, results, blockhash)
+    return results
+
+
+async def send_spl_batch(rpc_url: str, payer: Keypair, mint: str, payouts: list, decimals: int = None) -> list:
+    """
+    Kirim token SPL (USDT/USDC) ke banyak wallet dengan transfer_checked yang dipadatkan per tx.
+    ATA tujuan yang belum ada dibuat (idempotent) di tx yang sama dengan transfer-nya.
+    Mint, ATA pengirim & semua ATA tujuan dibaca sekali lewat getMultipleAccounts.
+    """
+    client = get_async_solana_client(rpc_url)
+    mint_pub = Pubkey.from_string(mint)
+    owner = payer.pubkey()
+    mint_info = (await get_multiple_accounts(client, [mint_pub]))[0]
+    if mint_info is None or mint_info.owner not in TOKEN_PROGRAMS:
+        return [(None, f"Mint SPL {mint} tidak ditemukan")] * len(payouts)
+    program = mint_info.owner
+    decimals = decode_mint_decimals(bytes(mint_info.data)) if decimals is None else decimals
+
+    destinations = [Pubkey.from_string(destination) for destination, _ in payouts]
+    source_ata = derive_ata(owner, mint_pub, program)
+    dest_atas = [derive_ata(destination, mint_pub, program) for destination in destinations]
+    unique_atas = list(dict.fromkeys(dest_atas))
+    accounts, blockhash_resp = await asyncio.gather(
+        get_multiple_accounts(client, [source_ata] + unique_atas),
+        client.get_latest_blockhash(),
+    )
+    source_info, existing = accounts[0], {ata for ata, info in zip(unique_atas, accounts[1:]) if info is not None}
+
+    amounts = [int(amount * (10 ** decimals)) for _, amount in payouts]
+    balance = decode_token_amount(bytes(source_info.data)) if source_info is not None else 0
+    if balance < sum(amounts):
+        error = f"Saldo token tidak cukup: butuh {sum(amounts) / 10 ** decimals}, saldo {balance / 10 ** decimals}"
+        return [(None, error)] * len(payouts)
+    missing = len(set(dest_atas) - existing)
+    if missing:
+        logger.info(f"🆕 {missing} ATA tujuan belum ada, dibuat di tx transfer-nya")
+
+    items = []
+    for index, (destination, dest_ata, amount) in enumerate(zip(destinations, dest_atas, amounts)):
+        instructions = []
+        if dest_ata not in existing:
+            instructions.append(
+                create_idempotent_associated_token_account(
+                    payer=owner, owner=destination, mint=mint_pub, token_program_id=program
+                )
+            )
+        instructions.append(
+            transfer_checked(TransferCheckedParams(
+                program_id=program,
+                source=source_ata,
+                mint=mint_pub,
+                dest=dest_ata,
+                owner=owner,
+                amount=amount,
+                decimals=decimals,
+            ))
+        )
+        items.append((index, instructions))
+
+    blockhash = blockhash_resp.value.blockhash
+    packed, oversized = _pack(owner, items, blockhash)
+    # payer juga bayar fee & rent ATA baru dalam SOL
+    lamports_needed = LAMPORTS_PER_SIGNATURE * len(packed) + TOKEN_ACCOUNT_RENT * missing
+    lamports = (await client.get_balance(owner)).value
+    if lamports < lamports_needed:
+        error = f"Saldo SOL untuk fee & rent ATA tidak cukup: butuh {lamports_needed / LAMPORTS_PER_SOL}, saldo {lamports / LAMPORTS_PER_SOL}"
+        return [(None, error)] * len(payouts)
+
+    results = [(None, "Belum dikirim")] * len(payouts)
+    await _send_packed(client, payer, packed, oversized, results, blockhash)
+    return results
@@ -5,8 +5,8 @@ from solders.pubkey import Pubkey
 from solders.keypair import Keypair
 from solders.transaction import Transaction
 from solders.system_program import transfer, TransferParams
-from solana.rpc.api import Client
 from solana.rpc.types import TxOpts  # ✅ perbaikan
+from lib.rpc_clients import get_solana_client
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +37,7 @@ def send_sol(
         if not private_key:
             raise ValueError("❌ Private key harus diberikan!")
 
-        client = Client(rpc_url)
+        client = get_solana_client(rpc_url)
         admin_keypair = create_admin_keypair(private_key)
 
         if destination_wallet == str(admin_keypair.pubkey()):
@@ -92,7 +92,7 @@ def get_balance(address: str, rpc_url: str):
         if not address:
             raise ValueError("❌ Address harus diberikan!")
 
-        client = Client(rpc_url)
+        client = get_solana_client(rpc_url)
         resp = client.get_balance(Pubkey.from_string(address))
         lamports = (
             getattr(resp.value, "value", None)
@@ -0,0 +1,127 @@
+# 📍 lib/token_metadata_cache.py
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import closing
+from lib.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Lokasi file SQLite, TTL (detik) & ukuran LRU, bisa diatur dari env
+TOKEN_METADATA_DB = os.getenv("TOKEN_METADATA_DB", "token_metadata.db")
+TOKEN_METADATA_TTL = float(os.getenv("TOKEN_METADATA_TTL", str(24 * 3600)))
+TOKEN_METADATA_LRU_SIZE = int(os.getenv("TOKEN_METADATA_LRU_SIZE", "512"))
+
+
+class TokenMetadataCache:
+    """
+    Cache metadata token 2 tingkat:
+    1. LRU in-memory (paling cepat)
+    2. SQLite di disk (tetap ada walau service restart)
+    Entry lewat TTL tetap disajikan, refresh jalan di background.
+    """
+
+    def __init__(
+        self,
+        db_path: str = TOKEN_METADATA_DB,
+        ttl: float = TOKEN_METADATA_TTL,
+        max_size: int = TOKEN_METADATA_LRU_SIZE,
+    ):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_size = max_size
+        self._memory = OrderedDict()  # token_id -> (metadata, fetched_at)
+        self._flight = SingleFlight("token_metadata")
+        self._background = set()
+        self._db_ready = False
+
+    # ================== SQLITE ==================
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        if not self._db_ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_metadata ("
+                "token_id TEXT PRIMARY KEY, metadata TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._db_ready = True
+        return conn
+
+    def _load_from_disk(self, token_id: str):
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT metadata, fetched_at FROM token_metadata WHERE token_id = ?",
+                    (token_id,),
+                ).fetchone()
+            if row:
+                return json.loads(row[0]), row[1]
+        except Exception as e:
+            logger.error(f"❌ Gagal baca cache metadata {token_id} dari disk: {e}")
+        return None
+
+    def _save_to_disk(self, token_id: str, metadata: dict, fetched_at: float):
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO token_metadata (token_id, metadata, fetched_at) VALUES (?, ?, ?)",
+                    (token_id, json.dumps(metadata), fetched_at),
+                )
+        except Exception as e:
+            logger.error(f"❌ Gagal simpan cache metadata {token_id} ke disk: {e}")
+
+    # ================== LRU ==================
+    def _remember(self, token_id: str, metadata: dict, fetched_at: float):
+        self._memory[token_id] = (metadata, fetched_at)
+        self._memory.move_to_end(token_id)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    # ================== FETCH ==================
+    async def _fetch_and_store(self, token_id: str, fetch_fn):
+        metadata = await fetch_fn(token_id)
+        fetched_at = time.time()
+        self._remember(token_id, metadata, fetched_at)
+        await asyncio.to_thread(self._save_to_disk, token_id, metadata, fetched_at)
+        logger.info(f"🗂️ Metadata {token_id} disimpan ke cache")
+        return metadata
+
+    async def _refresh(self, token_id: str, fetch_fn):
+        try:
+            await self._flight.do(token_id, self._fetch_and_store, token_id, fetch_fn)
+        except Exception as e:
+            logger.warning(f"⚠️ Refresh metadata {token_id} di background gagal: {e}")
+
+    def _refresh_in_background(self, token_id: str, fetch_fn):
+        if self._flight.in_flight(token_id):
+            return
+        task = asyncio.create_task(self._refresh(token_id, fetch_fn))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def get(self, token_id: str, fetch_fn):
+        """
+        Ambil metadata token_id. fetch_fn(token_id) dipanggil kalau belum ada di cache.
+        Return (metadata, source) dengan source: memory / disk / coingecko.
+        """
+        entry = self._memory.get(token_id)
+        source = "memory"
+        if entry is not None:
+            self._memory.move_to_end(token_id)
+        else:
+            entry = await asyncio.to_thread(self._load_from_disk, token_id)
+            source = "disk"
+            if entry is not None:
+                self._remember(token_id, *entry)
+
+        if entry is None:
+            metadata = await self._flight.do(token_id, self._fetch_and_store, token_id, fetch_fn)
+            return metadata, "coingecko"
+
+        metadata, fetched_at = entry
+        if time.time() - fetched_at > self.ttl:
+            self._refresh_in_background(token_id, fetch_fn)
+        return metadata, source
@@ -0,0 +1,272 @@
+# 📍 lib/token_registry.py
+import os
+import asyncio
+import inspect
+import logging
+import threading
+from dataclasses import dataclass
+from dotenv import load_dotenv
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Token yang harganya ikut snapshot (simbol → id CoinGecko), dipakai /price, /swap, price_mapper
+PRICE_IDS = {
+    "sol": "solana",
+    "eth": "ethereum",
+    "usdt": "tether",
+    "usdc": "usd-coin",
+    "bnb": "binancecoin",
+    "trx": "tron",
+    "ton": "the-open-network",
+    "base": "base-protocol",
+}
+
+# 🔹 Alias tambahan yang cuma dipakai /token_info (metadata CoinGecko, tidak ada di snapshot)
+METADATA_ALIASES = {
+    "weth": "ethereum",
+    "busd": "binance-usd",
+    "ada": "cardano",
+    "dot": "polkadot",
+    "matic": "matic-network",
+    "avax": "avalanche-2",
+    "doge": "dogecoin",
+    "shib": "shiba-inu",
+    "ltc": "litecoin",
+    "btc": "bitcoin",
+    "atom": "cosmos",
+    "dai": "dai",
+    "ftm": "fantom",
+    "cake": "pancakeswap-token",
+}
+
+EVM_CHAINS = {"eth", "bsc", "base"}
+
+# 🔹 Token per chain: (chain, simbol) → (env alamat contract / mint, decimals default)
+#    Decimals default dipakai langsung (tanpa RPC), dicek lazy sekali ke chain.
+DEPLOYMENTS = {
+    ("eth", "usdt"): ("ETH_USDT_ADDRESS", 6),
+    ("eth", "usdc"): ("ETH_USDC_ADDRESS", 6),
+    ("bsc", "usdt"): ("BSC_USDT_ADDRESS", 18),
+    ("bsc", "usdc"): ("BSC_USDC_ADDRESS", 18),
+    ("base", "usdt"): ("BASE_USDT_ADDRESS", 6),
+    ("base", "usdc"): ("BASE_USDC_ADDRESS", 6),
+    ("trx", "usdt"): ("TRC20_USDT_ADDRESS", 6),
+    ("trx", "usdc"): ("TRC20_USDC_ADDRESS", 6),
+    ("sol", "usdt"): ("SOL_USDT_ADDRESS", 6),
+    ("sol", "usdc"): ("SOL_USDC_ADDRESS", 6),
+}
+
+# nama chain alternatif yang dipakai endpoint (bnb = bsc)
+CHAIN_ALIASES = {"bnb": "bsc"}
+
+
+def _is_async(fn) -> bool:
+    """Fungsi async, termasuk objek dengan `async def __call__` (mis. AsyncContractMethod tronpy)"""
+    return inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, "__call__", None))
+
+
+@dataclass
+class TokenDeployment:
+    """Satu token di satu chain: alamat contract / mint, decimals & id harga"""
+
+    chain: str
+    symbol: str
+    address: str
+    decimals: int
+    price_id: str = None
+    verified: bool = False
+
+
+class TokenRegistry:
+    """
+    Satu tabel lookup token: simbol → id harga, (chain, simbol) → contract/mint + decimals.
+    Dibangun sekali saat import dari env. Decimals dicek ke chain sekali per token per proses:
+    sinkron di jalur send (resolve_decimals, send ditolak kalau belum bisa dicek),
+    di background untuk cek saldo (ensure_verified).
+    """
+
+    def __init__(self, price_ids: dict, aliases: dict, deployments: list):
+        self._price_ids = dict(price_ids)
+        self._aliases = dict(aliases)
+        self._deployments = {(d.chain, d.symbol): d for d in deployments}
+        self._by_address = {(d.chain, self._address_key(d.chain, d.address)): d for d in deployments}
+        self._verifying = set()
+        self._lock = threading.Lock()
+        self._verify_locks = {}  # (chain, simbol) -> Lock, verifikasi sinkron satu per token
+        self._tasks = set()
+
+    @classmethod
+    def from_env(cls) -> "TokenRegistry":
+        load_dotenv()
+        deployments = []
+        for (chain, symbol), (env_name, decimals) in DEPLOYMENTS.items():
+            address = (os.getenv(env_name) or "").strip()
+            if not address:
+                continue
+            if chain in EVM_CHAINS:
+                address = Web3.to_checksum_address(address)
+            deployments.append(
+                TokenDeployment(chain, symbol, address, decimals, PRICE_IDS.get(symbol))
+            )
+        logger.info(f"🪙 Token registry: {len(PRICE_IDS)} harga, {len(deployments)} contract/mint")
+        return cls(PRICE_IDS, METADATA_ALIASES, deployments)
+
+    @staticmethod
+    def _chain(chain: str) -> str:
+        chain = chain.lower()
+        return CHAIN_ALIASES.get(chain, chain)
+
+    @staticmethod
+    def _address_key(chain: str, address: str) -> str:
+        # alamat EVM case-insensitive, mint Solana / alamat Tron case-sensitive
+        return address.lower() if chain in EVM_CHAINS else address
+
+    # ================== HARGA ==================
+    def price_ids(self) -> dict:
+        """Simbol → id CoinGecko untuk semua token yang ikut snapshot harga"""
+        return dict(self._price_ids)
+
+    def price_id(self, token: str):
+        """Terima simbol (sol, eth, ...) atau id CoinGecko, None kalau tidak ikut snapshot"""
+        token = token.lower()
+        if token in self._price_ids:
+            return self._price_ids[token]
+        if token in self._price_ids.values():
+            return token
+        return None
+
+    def metadata_id(self, token: str) -> str:
+        """Id CoinGecko untuk /token_info: simbol, alias, atau token apa adanya"""
+        token = token.lower()
+        return self.price_id(token) or self._aliases.get(token, token)
+
+    # ================== CONTRACT / MINT ==================
+    def get(self, chain: str, symbol: str) -> TokenDeployment:
+        """Deployment token di chain, None kalau env alamatnya tidak di-set"""
+        return self._deployments.get((self._chain(chain), symbol.lower()))
+
+    def find(self, chain: str, address: str) -> TokenDeployment:
+        """Cari token dari alamat contract / mint"""
+        chain = self._chain(chain)
+        return self._by_address.get((chain, self._address_key(chain, address)))
+
+    def decimals(self, chain: str, symbol: str, default: int = None) -> int:
+        deployment = self.get(chain, symbol)
+        if deployment is None:
+            if default is None:
+                raise KeyError(f"Token {symbol} di {chain} tidak ada di registry")
+            return default
+        return deployment.decimals
+
+    def resolve_decimals(self, chain: str, symbol: str, fetch_decimals, default: int = None) -> int:
+        """
+        Decimals token untuk send: token registry dicek sinkron ke chain sekali per proses
+        (fetch_decimals sync), setelah itu tanpa RPC. Kalau belum pernah berhasil dicek → error,
+        jumlah tidak pernah di-scale pakai decimals env yang belum terverifikasi.
+        Token di luar registry baca ke chain lewat fetch_decimals, default kalau gagal.
+        """
+        deployment = self.get(chain, symbol)
+        if deployment is not None:
+            self.verify_sync(deployment, fetch_decimals)
+            return deployment.decimals
+        try:
+            return int(fetch_decimals())
+        except Exception:
+            if default is None:
+                raise
+            logger.warning(f"⚠️ Gagal baca decimals {symbol} {chain}, pakai default {default}")
+            return default
+
+    def confirm(self, deployment: TokenDeployment, onchain) -> int:
+        """Catat decimals on-chain token registry, kalau beda registry ikut nilai on-chain"""
+        onchain = int(onchain)
+        if onchain != deployment.decimals:
+            logger.error(
+                f"❌ Decimals {deployment.symbol.upper()} {deployment.chain} di registry "
+                f"{deployment.decimals}, on-chain {onchain} → pakai on-chain"
+            )
+            deployment.decimals = onchain
+        deployment.verified = True
+        return onchain
+
+    def verify_sync(self, deployment: TokenDeployment, fetch_decimals):
+        """Cek decimals ke chain sekarang (blocking) kalau belum pernah terverifikasi di proses ini"""
+        if deployment.verified:
+            return
+        key = (deployment.chain, deployment.symbol)
+        with self._lock:
+            lock = self._verify_locks.setdefault(key, threading.Lock())
+        with lock:
+            if deployment.verified:
+                return
+            try:
+                self.confirm(deployment, fetch_decimals())
+            except Exception as e:
+                raise RuntimeError(
+                    f"Decimals {deployment.symbol.upper()} {deployment.chain} belum bisa dicek ke chain, "
+                    f"send ditolak: {e}"
+                ) from e
+            logger.info(f"🪙 Decimals {deployment.symbol.upper()} {deployment.chain} terverifikasi: {deployment.decimals}")
+
+    def ensure_verified(self, deployment: TokenDeployment, fetch_decimals):
+        """
+        Cocokkan decimals registry dengan chain, sekali per token, di background.
+        fetch_decimals: callable tanpa argumen (sync atau async) yang baca decimals on-chain.
+        Kalau beda, registry ikut nilai on-chain; kalau gagal, dicoba lagi di pemakaian berikutnya.
+        """
+        if deployment is None or deployment.verified:
+            return
+        key = (deployment.chain, deployment.symbol)
+        with self._lock:
+            if key in self._verifying:
+                return
+            self._verifying.add(key)
+
+        def apply(onchain):
+            self.confirm(deployment, onchain)
+
+        def failed(e):
+            logger.warning(f"⚠️ Gagal verifikasi decimals {deployment.symbol} {deployment.chain}: {e}")
+
+        def done():
+            with self._lock:
+                self._verifying.discard(key)
+
+        def run_sync():
+            try:
+                onchain = fetch_decimals()
+                if inspect.isawaitable(onchain):
+                    if inspect.iscoroutine(onchain):
+                        onchain.close()
+                    raise TypeError("fetch_decimals async dipanggil dari thread, pakai versi sync / async def")
+                apply(onchain)
+            except Exception as e:
+                failed(e)
+            finally:
+                done()
+
+        async def run_async():
+            try:
+                apply(await fetch_decimals())
+            except Exception as e:
+                failed(e)
+            finally:
+                done()
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if _is_async(fetch_decimals) and loop is not None:
+            task = loop.create_task(run_async())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif not _is_async(fetch_decimals):
+            threading.Thread(target=run_sync, daemon=True).start()
+        else:
+            done()
+
+
+# 🔹 Registry global, dimuat sekali saat startup
+token_registry = TokenRegistry.from_env()
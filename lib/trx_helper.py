@@ -1,8 +1,7 @@
 # 📍 lib/trx_helper.py
 import logging
-from tronpy import Tron
 from tronpy.keys import PrivateKey
-from tronpy.providers import HTTPProvider
+from lib.rpc_clients import get_tron
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +26,7 @@ async def send_trx(
         raise ValueError("❌ private key harus diberikan!")
 
     try:
-        client = Tron(HTTPProvider(rpc_url))
+        client = get_tron(rpc_url)
 
         # Load admin key
         admin_key = PrivateKey(bytes.fromhex(private_key.replace("0x", "")))
@@ -85,7 +84,7 @@ def get_balance(address: str, rpc_url: str) -> float:
     if not rpc_url:
         raise ValueError("❌ RPC URL harus diberikan!")
     try:
-        client = Tron(HTTPProvider(rpc_url))
+        client = get_tron(rpc_url)
         balance = client.get_account_balance(address)
         logger.info(f"💰 Saldo {address}: {balance} TRX")
         return balance
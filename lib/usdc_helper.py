@@ -1,14 +1,23 @@
 # lib/usdc_helper.py
 import logging
-from lib.helpers.usdc.eth import send_usdc_eth
-from lib.helpers.usdc.bsc import send_usdc_bsc
-from lib.helpers.usdc.trx import send_usdc_trx
-from lib.helpers.usdc.base import send_usdc_base
-from lib.helpers.usdc.sol import send_usdc_solana
+from lib.nonce_manager import hex_hash
+from lib.helpers.usdc.eth import send_usdc_eth, broadcast_usdc_eth
+from lib.helpers.usdc.bsc import send_usdc_bsc, broadcast_usdc_bsc
+from lib.helpers.usdc.trx import send_usdc_trx, broadcast_usdc_trx
+from lib.helpers.usdc.base import send_usdc_base, broadcast_usdc_base
+from lib.helpers.usdc.sol import send_usdc_solana, broadcast_usdc_solana
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
+BROADCASTERS = {
+    "eth": broadcast_usdc_eth,
+    "bsc": broadcast_usdc_bsc,
+    "trx": broadcast_usdc_trx,
+    "base": broadcast_usdc_base,
+    "sol": broadcast_usdc_solana,
+}
+
 # router
 async def send_usdc(destination_wallet: str, amount: float, chain: str):
     chain = chain.lower()
@@ -27,3 +36,14 @@ async def send_usdc(destination_wallet: str, amount: float, chain: str):
         return await loop.run_in_executor(None, send_usdc_solana, destination_wallet, amount)
     else:
         raise ValueError(f"Chain {chain} tidak didukung untuk USDC!")
+
+
+def broadcast_usdc(destination_wallet: str, amount: float, chain: str) -> str:
+    """
+    Kirim USDC dari wallet service tanpa nunggu konfirmasi (sync, panggil lewat asyncio.to_thread).
+    Return tx hash / signature; gagal dilempar, BroadcastUnknown kalau status broadcast tidak jelas.
+    """
+    broadcaster = BROADCASTERS.get(chain.lower())
+    if broadcaster is None:
+        raise ValueError(f"Chain {chain} tidak didukung untuk USDC!")
+    return hex_hash(broadcaster(destination_wallet, amount))
@@ -1,14 +1,23 @@
 # lib/usdt_helper.py
 import logging
-from lib.helpers.usdt.eth import send_usdt_eth
-from lib.helpers.usdt.bsc import send_usdt_bsc
-from lib.helpers.usdt.trx import send_usdt_trx
-from lib.helpers.usdt.base import send_usdt_base
-from lib.helpers.usdt.sol import send_usdt_solana
+from lib.nonce_manager import hex_hash
+from lib.helpers.usdt.eth import send_usdt_eth, broadcast_usdt_eth
+from lib.helpers.usdt.bsc import send_usdt_bsc, broadcast_usdt_bsc
+from lib.helpers.usdt.trx import send_usdt_trx, broadcast_usdt_trx
+from lib.helpers.usdt.base import send_usdt_base, broadcast_usdt_base
+from lib.helpers.usdt.sol import send_usdt_solana, broadcast_usdt_solana
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
+BROADCASTERS = {
+    "eth": broadcast_usdt_eth,
+    "bsc": broadcast_usdt_bsc,
+    "trx": broadcast_usdt_trx,
+    "base": broadcast_usdt_base,
+    "sol": broadcast_usdt_solana,
+}
+
 # router
 async def send_usdt(destination_wallet: str, amount: float, chain: str):
     chain = chain.lower()
@@ -27,3 +36,14 @@ async def send_usdt(destination_wallet: str, amount: float, chain: str):
         return await loop.run_in_executor(None, send_usdt_solana, destination_wallet, amount)
     else:
         raise ValueError(f"Chain {chain} tidak didukung untuk USDT!")
+
+
+def broadcast_usdt(destination_wallet: str, amount: float, chain: str) -> str:
+    """
+    Kirim USDT dari wallet service tanpa nunggu konfirmasi (sync, panggil lewat asyncio.to_thread).
+    Return tx hash / signature; gagal dilempar, BroadcastUnknown kalau status broadcast tidak jelas.
+    """
+    broadcaster = BROADCASTERS.get(chain.lower())
+    if broadcaster is None:
+        raise ValueError(f"Chain {chain} tidak didukung untuk USDT!")
+    return hex_hash(broadcaster(destination_wallet, amount))
@@ -1,4 +1,5 @@
 # 📍 main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 
@@ -14,12 +15,47 @@ from routers.crypto.swap import swap_router
 from routers.crypto.token_info import token_info_router
 from routers.crypto.tx_status import tx_status_router
 from routers.crypto.wallet_monitor import monitor_router
+from routers.crypto.rpc_health import rpc_health_router
+
+from lib.http_client import start_http_client, close_http_client
+from lib.coingecko import start_price_refresher, stop_price_refresher
+from lib.rpc_clients import close_rpc_clients
+from lib.balance_cache import close_balance_cache
+from lib.rpc_router import start_rpc_router, stop_rpc_router
+from lib.send_jobs import start_send_jobs, stop_send_jobs
+from lib.batch_sender import stop_batch_sender
+
+
+# ====================== LIFESPAN ======================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 🔹 Client HTTP upstream bersama (keep-alive pool) untuk CoinGecko, dll
+    await start_http_client()
+    # 🔹 Background task: refresh snapshot harga, request cukup baca dari memory
+    await start_price_refresher()
+    # 🔹 Background task: probe latency & head semua RPC endpoint (chain dengan > 1 endpoint)
+    await start_rpc_router()
+    # 🔹 Worker antrian job kirim (SQLite), lanjutkan job yang tertunda sebelum restart
+    await start_send_jobs()
+    try:
+        yield
+    finally:
+        # 🔹 Shutdown tetap jalan walau app keluar karena error / cancel
+        await stop_send_jobs()
+        stop_batch_sender()
+        await stop_price_refresher()
+        await stop_rpc_router()
+        await close_balance_cache()
+        await close_rpc_clients()
+        await close_http_client()
+
 
 # ====================== APP ======================
 app = FastAPI(
     title="Crypto API Service",
     description="API untuk kirim token crypto (ETH, USDT, BNB, SOL, dll)",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ====================== REGISTER CRYPTO ROUTERS ======================
@@ -35,6 +71,7 @@ crypto_routers = [
     token_info_router,
     tx_status_router,
     monitor_router,
+    rpc_health_router,
 ]
 
 for r in crypto_routers:
@@ -1,30 +1,114 @@
 # 📍 routers/crypto/balance.py
 import logging
+from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Query
-from lib.balance_checker import check_balance
+from pydantic import BaseModel
+from lib.balance_checker import check_balance, check_balances, fetch_balance
+from lib.rpc_router import rpc_router
 
 balance_router = APIRouter()
 logger = logging.getLogger(__name__)
 
+MAX_BULK_BALANCES = 1000
+
+
+class BalanceItem(BaseModel):
+    chain: str
+    wallet: str
+    token: Optional[str] = None  # alamat contract / mint, kosong = native
+    rpc_url: Optional[str] = None  # override rpc_urls[chain], kosong = endpoint terbaik rpc_router
+
+
+class BulkBalanceRequest(BaseModel):
+    rpc_urls: Dict[str, str] = {}  # chain -> RPC URL
+    items: List[BalanceItem]
+
+
+def _default_rpc(chain: str) -> Optional[str]:
+    """Endpoint terbaik dari env untuk item tanpa RPC URL, None kalau chain belum di-set"""
+    try:
+        return rpc_router.pick(chain)
+    except ValueError:
+        return None
+
 
 @balance_router.get("/balance")
 async def get_wallet_balance(
     chain: str = Query(..., description="eth, bsc, bnb, sol, trx"),
     wallet: str = Query(..., description="Alamat wallet"),
-    rpc_url: str = Query(..., description="RPC URL mainnet/testnet"),
+    rpc_url: Optional[str] = Query(None, description="RPC URL mainnet/testnet (opsional)"),
+    token: Optional[str] = Query(None, description="Alamat contract / mint token (opsional)"),
 ):
     """
     Cek saldo wallet per chain.
-    User harus input RPC URL sendiri (bisa mainnet atau testnet)
+    User bisa input RPC URL sendiri (mainnet atau testnet), kalau kosong pakai
+    endpoint dari env lewat rpc_router (pilih yang tercepat, failover kalau gagal).
     """
     try:
-        bal = await check_balance(chain, wallet, rpc_url)
+        if rpc_url:
+            bal = await check_balance(chain, wallet, rpc_url, token)
+        else:
+            # fetch_balance melempar error (check_balance balas 0.0), supaya failover tahu endpoint gagal
+            bal = await rpc_router.call(
+                chain, lambda url: fetch_balance(chain, wallet, url, token)
+            )
         return {
             "status": "success",
             "chain": chain.upper(),
             "wallet": wallet,
+            "token": token,
             "balance": bal,
         }
     except Exception as e:
         logger.error(f"❌ Gagal cek saldo: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@balance_router.post("/balances")
+async def get_wallet_balances(body: BulkBalanceRequest):
+    """
+    Cek saldo banyak wallet (multi chain) sekaligus, paralel dengan batas per chain.
+    Item yang gagal tetap dibalas dengan status error, item lain tidak ikut gagal.
+    """
+    if not body.items:
+        raise HTTPException(status_code=400, detail="List wallet kosong")
+    if len(body.items) > MAX_BULK_BALANCES:
+        raise HTTPException(
+            status_code=400, detail=f"Maksimal {MAX_BULK_BALANCES} wallet per request"
+        )
+
+    rpc_urls = {chain.lower(): url for chain, url in body.rpc_urls.items()}
+    items = [
+        {
+            "chain": item.chain.lower(),
+            "wallet": item.wallet,
+            "token": item.token,
+            "rpc_url": item.rpc_url or rpc_urls.get(item.chain.lower()) or _default_rpc(item.chain),
+        }
+        for item in body.items
+    ]
+
+    try:
+        fetched = await check_balances(items)
+    except Exception as e:
+        logger.error(f"❌ Gagal cek saldo bulk: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = []
+    failed = 0
+    for item, (balance, error) in zip(items, fetched):
+        result = {"chain": item["chain"].upper(), "wallet": item["wallet"], "token": item["token"]}
+        if error:
+            failed += 1
+            result.update(status="error", detail=error)
+        else:
+            result.update(status="success", balance=balance)
+        results.append(result)
+
+    logger.info(f"📊 Bulk saldo {len(items)} wallet, {failed} gagal")
+    return {
+        "status": "success",
+        "count": len(results),
+        "failed": failed,
+        "results": results,
+    }
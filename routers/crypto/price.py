@@ -1,22 +1,199 @@
 # 📍 routers/crypto/price.py
+import json
+import time
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException
-from lib.coingecko import get_current_price  # ✅ import yang diperlukan
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from lib.coingecko import (  # ✅ import yang diperlukan
+    get_price_snapshot,
+    get_price_age,
+    resolve_coin_id,
+    is_refresher_running,
+    StalePriceError,
+    VS_CURRENCIES,
+    price_aggregator,
+)
+from lib.singleflight import get_singleflight_stats
+from lib.price_broadcaster import price_broadcaster
+from lib.price_history import price_history, ohlc, window_stats
 
 price_router = APIRouter()  # 🔹 router khusus untuk price
 logger = logging.getLogger(__name__)
 
+STREAM_KEEPALIVE = 15  # detik, kirim komentar ping biar koneksi tidak diputus proxy
+MAX_CANDLES = 1000
+
 
 @price_router.get("/price")
 async def get_token_price(token: str):
     """Dapatkan harga real-time token dalam IDR"""
     try:
-        price = await get_current_price(token)
+        coin_id = resolve_coin_id(token)
+        snapshot = await get_price_snapshot()
+        price = snapshot.get(coin_id, "idr") if coin_id else 0
         if price == 0:
             raise HTTPException(
                 status_code=404, detail=f"Harga {token.upper()} tidak tersedia"
             )
-        return {"status": "success", "token": token.upper(), "price_idr": price}
+        return {
+            "status": "success",
+            "token": token.upper(),
+            "price_idr": price,
+            "age_seconds": round(snapshot.age, 3),
+        }
+    except StalePriceError as e:
+        logger.warning(f"⚠️ Harga {token.upper()} basi: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Gagal ambil harga token: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@price_router.get("/prices")
+async def get_token_prices(tokens: str, vs: str = VS_CURRENCIES):
+    """
+    Harga banyak token & mata uang sekaligus dari satu snapshot.
+    Contoh: /prices?tokens=sol,eth,usdt&vs=idr,usd
+    """
+    token_list = [t.strip().lower() for t in tokens.split(",") if t.strip()]
+    vs_list = [v.strip().lower() for v in vs.split(",") if v.strip()]
+    if not token_list:
+        raise HTTPException(status_code=400, detail="Parameter tokens harus diisi")
+
+    supported_vs = VS_CURRENCIES.split(",")
+    invalid_vs = [v for v in vs_list if v not in supported_vs]
+    if not vs_list or invalid_vs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"vs tidak didukung: {','.join(invalid_vs) or vs}, pilih dari {VS_CURRENCIES}",
+        )
+
+    try:
+        snapshot = await get_price_snapshot()
+    except StalePriceError as e:
+        logger.warning(f"⚠️ Harga basi: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+    prices = {}
+    unsupported = []
+    for token in token_list:
+        coin_id = resolve_coin_id(token)
+        if not coin_id or coin_id not in snapshot.prices:
+            unsupported.append(token.upper())
+            continue
+        prices[token.upper()] = {v: snapshot.get(coin_id, v) for v in vs_list}
+
+    if not prices:
+        raise HTTPException(
+            status_code=404, detail=f"Harga {', '.join(unsupported)} tidak tersedia"
+        )
+
+    return {
+        "status": "success",
+        "prices": prices,
+        "unsupported": unsupported,
+        "age_seconds": round(snapshot.age, 3),
+    }
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@price_router.get("/price/stream")
+async def stream_token_prices(request: Request, tokens: str):
+    """
+    Stream harga real-time via Server-Sent Events.
+    Contoh: /price/stream?tokens=sol,eth → event `price` tiap ada harga yang berubah.
+    """
+    wanted = {}
+    for token in tokens.split(","):
+        coin_id = resolve_coin_id(token.strip()) if token.strip() else None
+        if coin_id:
+            wanted[coin_id] = token.strip().upper()
+    if not wanted:
+        raise HTTPException(status_code=400, detail=f"Token {tokens} tidak didukung")
+
+    async def event_stream():
+        # subscribe di dalam generator: kalau client putus sebelum iterasi pertama, tidak ada langganan yang bocor
+        sub = price_broadcaster.subscribe(wanted)
+        try:
+            # 🔹 Kirim harga saat ini dulu, setelah itu cuma delta
+            snapshot = price_broadcaster.last_snapshot
+            if snapshot is not None:
+                initial = {
+                    symbol: dict(snapshot.prices[coin_id])
+                    for coin_id, symbol in wanted.items()
+                    if coin_id in snapshot.prices
+                }
+                yield _sse("price", {"prices": initial, "timestamp": snapshot.timestamp})
+
+            while not await request.is_disconnected():
+                try:
+                    changes = await asyncio.wait_for(sub.next(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                snapshot = price_broadcaster.last_snapshot
+                yield _sse("price", {"prices": changes, "timestamp": snapshot.timestamp})
+        finally:
+            price_broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@price_router.get("/price/ohlc")
+async def get_token_ohlc(
+    token: str, window: int = 3600, interval: int = 300, vs: str = "idr"
+):
+    """
+    Candle OHLC + statistik (min/max, rata-rata, TWAP, volatilitas) dari history
+    harga in-memory. window & interval dalam detik.
+    Contoh: /price/ohlc?token=sol&window=3600&interval=300&vs=usd
+    """
+    vs = vs.lower()
+    if vs not in VS_CURRENCIES.split(","):
+        raise HTTPException(status_code=400, detail=f"vs tidak didukung, pilih dari {VS_CURRENCIES}")
+    if window <= 0 or interval <= 0:
+        raise HTTPException(status_code=400, detail="window & interval harus > 0")
+    if window / interval > MAX_CANDLES:
+        raise HTTPException(status_code=400, detail=f"Maksimal {MAX_CANDLES} candle per request")
+
+    coin_id = resolve_coin_id(token)
+    buffer = price_history.get(coin_id) if coin_id else None
+    if buffer is None:
+        raise HTTPException(status_code=404, detail=f"History {token.upper()} belum tersedia")
+
+    now = time.time()
+    start = now - window
+    timestamps, prices = buffer.window(start, vs)
+    return {
+        "status": "success",
+        "token": token.upper(),
+        "vs": vs,
+        "window": window,
+        "interval": interval,
+        "candles": ohlc(timestamps, prices, start, interval),
+        "stats": window_stats(timestamps, prices, now),
+    }
+
+
+@price_router.get("/price/stats")
+async def get_price_stats():
+    """Statistik snapshot harga & counter request upstream (issued vs coalesced)"""
+    age = get_price_age()
+    return {
+        "status": "success",
+        "refresher_running": is_refresher_running(),
+        "snapshot_age_seconds": round(age, 3) if age is not None else None,
+        "stream_subscribers": price_broadcaster.subscriber_count,
+        "upstream": get_singleflight_stats(),
+        "providers": price_aggregator.stats(),
+    }
@@ -0,0 +1,21 @@
+# 📍 routers/crypto/rpc_health.py
+import logging
+from fastapi import APIRouter
+from lib.circuit_breaker import breakers
+from lib.rpc_router import rpc_router
+
+rpc_health_router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@rpc_health_router.get("/rpc_health")
+async def get_rpc_health():
+    """
+    Status RPC endpoint: circuit breaker per endpoint (closed / open / half_open)
+    dan hasil probe rpc_router per chain (latency, error rate, ketinggalan head)
+    """
+    return {
+        "status": "success",
+        "breakers": breakers.stats(),
+        "chains": rpc_router.stats(),
+    }
@@ -1,7 +1,12 @@
 # 📍 routers/crypto/send.py
 import logging
+from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from lib.native_sender import send_token
+from lib.send_jobs import send_jobs
+from lib.batch_sender import send_batch, BatchValidationError
 
 send_router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -18,8 +23,12 @@ async def send_native_token(
     amount: float,
     rpc_url: str = None,  # 🔹 user input RPC
     private_key: str = None,  # 🔹 user input private key untuk native token
+    wait: bool = True,  # 🔹 false → masuk antrian job, langsung balas 202 + job_id
 ):
     """Kirim native token ke wallet tujuan"""
+    if not wait:
+        return await _enqueue(token, destination_wallet, amount, None, rpc_url, private_key)
+
     try:
         logger.info(
             f"🚀 Permintaan kirim {token.upper()} ke {destination_wallet} sejumlah {amount}"
@@ -54,3 +63,112 @@ async def send_native_token(
     except Exception as e:
         logger.error(f"❌ Gagal kirim token: {e}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
+
+
+class SendJobRequest(BaseModel):
+    token: str  # sol, eth, bnb, base (native); usdt / usdc wallet service tidak dibuka di API publik
+    destination_wallet: str
+    amount: float = Field(gt=0, allow_inf_nan=False)
+    chain: Optional[str] = None  # opsional, harus cocok dengan chain native token
+    rpc_url: Optional[str] = None
+    private_key: Optional[str] = None  # wajib, wallet pengirim milik pemanggil
+
+
+async def _enqueue(token, destination_wallet, amount, chain, rpc_url, private_key):
+    try:
+        job = await send_jobs.submit(
+            token,
+            destination_wallet,
+            amount,
+            chain=chain,
+            rpc_url=rpc_url,
+            private_key=private_key,
+        )
+    except PermissionError as pe:
+        raise HTTPException(status_code=403, detail=str(pe))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return JSONResponse(
+        status_code=202,
+        content={"status": "accepted", "job_id": job["id"], "job": job},
+    )
+
+
+@send_router.post(
+    "/send/jobs",
+    status_code=202,
+    summary="Antrikan Kirim Token",
+    description="Masukkan kiriman native token (SOL, ETH, BNB, BASE) ke antrian, langsung balas job_id. Status dipantau lewat GET /send/jobs/{job_id}",
+)
+async def create_send_job(req: SendJobRequest):
+    """Kirim token lewat antrian job (202 Accepted)"""
+    logger.info(
+        f"📥 Job kirim {req.token.upper()} ke {req.destination_wallet} sejumlah {req.amount}"
+    )
+    return await _enqueue(
+        req.token, req.destination_wallet, req.amount, req.chain, req.rpc_url, req.private_key
+    )
+
+
+@send_router.get(
+    "/send/jobs/{job_id}",
+    summary="Status Job Kirim",
+    description="Status job kirim: queued, sending, sent, confirmed, failed, atau unknown",
+)
+async def get_send_job(job_id: str):
+    job = await send_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} tidak ditemukan")
+    return {"status": "success", "job": job}
+
+
+class BatchSendRow(BaseModel):
+    token: str
+    destination_wallet: str
+    amount: float
+    chain: Optional[str] = None  # opsional untuk native; usdt / usdc wallet service ditolak di API publik
+
+
+class BatchSendRequest(BaseModel):
+    rows: List[BatchSendRow]
+    private_key: Optional[str] = None  # native token, dipakai semua chain
+    private_keys: Optional[Dict[str, str]] = None  # native token per chain: {"eth": ..., "sol": ...}
+    rpc_urls: Optional[Dict[str, str]] = None  # per chain, kosong → rpc_router
+    disperse: Optional[bool] = None  # USDT/USDC EVM (pemanggil internal) lewat kontrak disperse, kosong → DISPERSE_ENABLED
+
+
+@send_router.post(
+    "/send/batch",
+    summary="Kirim Token Massal",
+    description="Kirim banyak payout sekaligus: divalidasi bareng, dikelompokkan per chain & wallet pengirim, nonce dialokasikan sekali, broadcast paralel. Hasil per baris.",
+)
+async def send_batch_tokens(req: BatchSendRequest):
+    """Batch payout, semua baris divalidasi dulu sebelum ada yang dikirim"""
+    logger.info(f"🚀 Permintaan batch kirim {len(req.rows)} payout")
+    try:
+        results = await send_batch(
+            [row.model_dump() for row in req.rows],
+            private_key=req.private_key,
+            private_keys=req.private_keys,
+            rpc_urls=req.rpc_urls,
+            disperse=req.disperse,
+        )
+    except BatchValidationError as ve:
+        raise HTTPException(status_code=400, detail={"message": str(ve), "errors": ve.errors})
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    sent = sum(1 for row in results if row["status"] == "sent")
+    # unknown: tx mungkin sudah masuk, cek tx_hash dulu sebelum kirim ulang
+    unknown = sum(1 for row in results if row["status"] == "unknown")
+    return {
+        "status": "success" if sent == len(results) else ("partial" if sent or unknown else "failed"),
+        "total": len(results),
+        "sent": sent,
+        "unknown": unknown,
+        "failed": len(results) - sent - unknown,
+        "results": results,
+    }
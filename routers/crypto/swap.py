@@ -1,36 +1,30 @@
 # 📍 routers/crypto/swap.py
+import math
 import logging
-import httpx
+from typing import List
 from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from lib.coingecko import get_price_snapshot, StalePriceError
+from lib.cross_rate import CrossRateBook
+from lib.token_registry import token_registry
 
 swap_router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Mapping token ke CoinGecko ID
-COINGECKO_IDS = {
-    "sol": "solana",
-    "eth": "ethereum",
-    "bnb": "binancecoin",
-    "usdt": "tether",
-    "usdc": "usd-coin",
-    "trx": "tron",
-    "ton": "the-open-network",
-}
-
-
-async def get_token_price_usd(token: str) -> float:
-    """Ambil harga token dalam USD dari CoinGecko"""
-    token_id = COINGECKO_IDS.get(token.lower())
-    if not token_id:
-        raise HTTPException(status_code=400, detail=f"Token {token} tidak didukung")
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={token_id}&vs_currencies=usd"
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, timeout=10)
-        data = resp.json()
-        price = data.get(token_id, {}).get("usd")
-        if price is None:
-            raise HTTPException(status_code=500, detail=f"Gagal ambil harga {token}")
-        return price
+# Mapping token ke CoinGecko ID, dari token registry
+COINGECKO_IDS = token_registry.price_ids()
+
+SWAP_FEE = 0.01  # fee 1%
+MAX_BULK_QUOTES = 1000
+
+# 🔹 Matriks kurs silang, dibangun ulang tiap snapshot harga refresh
+cross_rates = CrossRateBook(COINGECKO_IDS)
+
+
+class SwapQuoteItem(BaseModel):
+    from_token: str
+    to_token: str
+    amount: float = Field(gt=0, allow_inf_nan=False)
 
 
 @swap_router.post("/swap")
@@ -41,14 +35,17 @@ async def swap_tokens(
     Swap token dari satu jenis ke jenis lain berdasarkan harga real-time CoinGecko
     """
     try:
-        price_from = await get_token_price_usd(from_token)
-        price_to = await get_token_price_usd(to_token)
+        for token in (from_token, to_token):
+            if token.lower() not in COINGECKO_IDS:
+                raise HTTPException(status_code=400, detail=f"Token {token} tidak didukung")
 
-        # hitung swapped_amount = jumlah from_token dikali rate to_token
-        swapped_amount = amount * price_from / price_to
+        matrix = cross_rates.get(await get_price_snapshot())
+        rate = matrix.rate(from_token, to_token)
+        if math.isnan(rate):
+            raise HTTPException(status_code=500, detail=f"Gagal ambil harga {from_token}/{to_token}")
 
-        # terapkan fee 1%
-        swapped_amount = swapped_amount * 0.99
+        # hitung swapped_amount = jumlah from_token dikali kurs silang, lalu fee 1%
+        swapped_amount = amount * rate * (1 - SWAP_FEE)
 
         logger.info(
             f"User {user_id} swap {amount} {from_token} → {swapped_amount:.6f} {to_token}"
@@ -59,10 +56,63 @@ async def swap_tokens(
             "from_token": from_token,
             "to_token": to_token,
             "swapped_amount": round(swapped_amount, 6),
-            "price_from_usd": price_from,
-            "price_to_usd": price_to,
+            "price_from_usd": matrix.price_usd(from_token),
+            "price_to_usd": matrix.price_usd(to_token),
         }
 
+    except StalePriceError as e:
+        logger.warning(f"⚠️ Swap ditolak, harga basi: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Swap gagal: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@swap_router.post("/swap/quotes")
+async def swap_quotes(items: List[SwapQuoteItem]):
+    """
+    Quote banyak swap (from_token, to_token, amount) sekaligus dalam satu pass vectorized.
+    Item yang tokennya tidak didukung tetap dibalas dengan status error.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="List quote kosong")
+    if len(items) > MAX_BULK_QUOTES:
+        raise HTTPException(
+            status_code=400, detail=f"Maksimal {MAX_BULK_QUOTES} quote per request"
+        )
+
+    try:
+        matrix = cross_rates.get(await get_price_snapshot())
+    except StalePriceError as e:
+        logger.warning(f"⚠️ Quote ditolak, harga basi: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+    swapped = matrix.quote_many(
+        [i.from_token for i in items],
+        [i.to_token for i in items],
+        [i.amount for i in items],
+        fee=SWAP_FEE,
+    )
+
+    quotes = []
+    for item, value in zip(items, swapped.tolist()):
+        quote = {
+            "from_token": item.from_token,
+            "to_token": item.to_token,
+            "amount": item.amount,
+        }
+        if math.isnan(value):
+            quote.update(status="error", detail="Token tidak didukung / harga kosong")
+        else:
+            quote.update(status="success", swapped_amount=round(value, 6))
+        quotes.append(quote)
+
+    logger.info(f"📊 Bulk quote {len(items)} swap")
+    return {
+        "status": "success",
+        "fee": SWAP_FEE,
+        "age_seconds": round(matrix.snapshot.age, 3),
+        "quotes": quotes,
+    }
@@ -1,37 +1,15 @@
 # 📍 routers/crypto/token_info.py
 import logging
-import httpx
 from fastapi import APIRouter, HTTPException
+from lib.token_metadata_cache import TokenMetadataCache
+from lib.http_client import upstream_get
+from lib.token_registry import token_registry
 
 token_info_router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# 🔹 Mapping alias token populer ke CoinGecko ID
-TOKEN_ALIAS = {
-    "eth": "ethereum",
-    "weth": "ethereum",
-    "sol": "solana",
-    "bnb": "binancecoin",
-    "busd": "binance-usd",
-    "usdt": "tether",
-    "usdc": "usd-coin",
-    "trx": "tron",
-    "ton": "the-open-network",
-    "ada": "cardano",
-    "dot": "polkadot",
-    "matic": "matic-network",
-    "avax": "avalanche-2",
-    "doge": "dogecoin",
-    "shib": "shiba-inu",
-    "ltc": "litecoin",
-    "btc": "bitcoin",
-    "atom": "cosmos",
-    "dai": "dai",
-    "ftm": "fantom",
-    "cake": "pancakeswap-token",
-    "matic": "matic-network",
-    # 🔹 bisa tambah lagi sesuai kebutuhan
-}
+# 🔹 Metadata jarang berubah: cache LRU + SQLite, CoinGecko cuma dipanggil kalau belum ada / lewat TTL
+metadata_cache = TokenMetadataCache()
 
 
 async def fetch_token_metadata_coingecko(token_id: str) -> dict:
@@ -39,47 +17,53 @@ async def fetch_token_metadata_coingecko(token_id: str) -> dict:
     Ambil metadata token dari CoinGecko API
     """
     url = f"https://api.coingecko.com/api/v3/coins/{token_id.lower()}"
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(url)
-        if resp.status_code != 200:
-            raise HTTPException(
-                status_code=404, detail=f"Token {token_id} tidak ditemukan di CoinGecko"
-            )
-        data = resp.json()
-        metadata = {
-            "name": data.get("name"),
-            "symbol": data.get("symbol").upper() if data.get("symbol") else None,
-            "decimals": (
-                data.get("detail_platforms", {})
-                .get("ethereum", {})
-                .get("decimal_place")
-                if "detail_platforms" in data
-                else None
-            ),
-            "contract_address": (
-                data.get("detail_platforms", {})
-                .get("ethereum", {})
-                .get("contract_address")
-                if "detail_platforms" in data
-                else None
-            ),
-            "coingecko_id": data.get("id"),
-        }
-        return metadata
+    resp = await upstream_get(url)
+    if resp.status_code != 200:
+        raise HTTPException(
+            status_code=404, detail=f"Token {token_id} tidak ditemukan di CoinGecko"
+        )
+    data = resp.json()
+    metadata = {
+        "name": data.get("name"),
+        "symbol": data.get("symbol").upper() if data.get("symbol") else None,
+        "decimals": (
+            data.get("detail_platforms", {})
+            .get("ethereum", {})
+            .get("decimal_place")
+            if "detail_platforms" in data
+            else None
+        ),
+        "contract_address": (
+            data.get("detail_platforms", {})
+            .get("ethereum", {})
+            .get("contract_address")
+            if "detail_platforms" in data
+            else None
+        ),
+        "coingecko_id": data.get("id"),
+    }
+    return metadata
 
 
 @token_info_router.get("/token_info")
 async def get_token_info(token: str):
     """
-    Ambil metadata token dari CoinGecko secara real-time.
+    Ambil metadata token (cache lokal, fallback ke CoinGecko).
     User bisa pakai alias populer: sol -> solana, eth -> ethereum, dll.
     """
     try:
         # 🔹 Gunakan alias jika ada
-        token_id = TOKEN_ALIAS.get(token.lower(), token.lower())
-        metadata = await fetch_token_metadata_coingecko(token_id)
-        logger.info(f"Token info diambil dari CoinGecko: {token} -> {token_id}")
-        return {"status": "success", "token": token.lower(), "metadata": metadata}
+        token_id = token_registry.metadata_id(token)
+        metadata, source = await metadata_cache.get(
+            token_id, fetch_token_metadata_coingecko
+        )
+        logger.info(f"Token info diambil dari {source}: {token} -> {token_id}")
+        return {
+            "status": "success",
+            "token": token.lower(),
+            "metadata": metadata,
+            "source": source,
+        }
     except HTTPException as he:
         logger.warning(f"Token {token} tidak ditemukan: {he.detail}")
         raise he
@@ -1,25 +1,48 @@
 # 📍 routers/crypto/tx_status.py
-import os
 import logging
 from fastapi import APIRouter, HTTPException
-from solana.rpc.async_api import AsyncClient as SolanaClient
-from web3 import AsyncWeb3, AsyncHTTPProvider
+from web3.exceptions import TransactionNotFound
+from lib.rpc_clients import get_async_web3, get_async_solana_client
+from lib.rpc_router import rpc_router
 
 tx_status_router = APIRouter()
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# 🔹 Ambil RPC dari environment variables, fallback ke default public RPC
-RPC_ENDPOINTS = {
-    "eth": os.getenv(
-        "ETH_RPC_URL", "https://mainnet.infura.io/v3/YOUR_INFURA_PROJECT_ID"
-    ),
-    "bnb": os.getenv("BSC_RPC_URL", "https://bsc-dataseed.binance.org/"),
-    "polygon": os.getenv("POLYGON_RPC_URL", "https://polygon-rpc.com/"),
-    "sol": os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"),
-    "trx": os.getenv("TRON_FULL_NODE", "https://api.trongrid.io"),
-    "base": os.getenv("BASE_RPC_URL"),
-}
+
+async def _sol_status(rpc_url: str, tx_hash: str) -> dict:
+    client = get_async_solana_client(rpc_url)
+    resp = await client.get_confirmed_transaction(tx_hash)
+    if resp["result"] is None:
+        return {"status": "pending", "tx_hash": tx_hash}
+    meta = resp["result"]["meta"]
+    success = meta["err"] is None
+    return {
+        "status": "success" if success else "failed",
+        "tx_hash": tx_hash,
+        "fee": meta.get("fee"),
+        "pre_balances": meta.get("preBalances"),
+        "post_balances": meta.get("postBalances"),
+    }
+
+
+async def _evm_status(chain: str, rpc_url: str, tx_hash: str) -> dict:
+    w3 = get_async_web3(chain, rpc_url)
+    try:
+        receipt = await w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        # web3 v7 melempar error (bukan None) untuk tx yang belum masuk block
+        receipt = None
+    if receipt is None:
+        return {"status": "pending", "tx_hash": tx_hash}
+    success = receipt.status == 1
+    return {
+        "status": "success" if success else "failed",
+        "tx_hash": tx_hash,
+        "blockNumber": receipt.blockNumber,
+        "gasUsed": receipt.gasUsed,
+        "logs": [dict(log) for log in receipt.logs],
+    }
 
 
 @tx_status_router.get("/tx_status")
@@ -32,34 +55,12 @@ async def get_tx_status(chain: str, tx_hash: str):
     try:
         if chain == "sol":
             logger.info(f"🔹 Mengecek status tx Solana: {tx_hash}")
-            async with SolanaClient(RPC_ENDPOINTS["sol"]) as client:
-                resp = await client.get_confirmed_transaction(tx_hash)
-                if resp["result"] is None:
-                    return {"status": "pending", "tx_hash": tx_hash}
-                meta = resp["result"]["meta"]
-                success = meta["err"] is None
-                return {
-                    "status": "success" if success else "failed",
-                    "tx_hash": tx_hash,
-                    "fee": meta.get("fee"),
-                    "pre_balances": meta.get("preBalances"),
-                    "post_balances": meta.get("postBalances"),
-                }
+            # endpoint dipilih rpc_router (latency & head), failover kalau gagal
+            return await rpc_router.call("sol", lambda url: _sol_status(url, tx_hash))
 
         elif chain in ["eth", "bnb", "polygon"]:
             logger.info(f"🔹 Mengecek status tx {chain.upper()}: {tx_hash}")
-            w3 = AsyncWeb3(AsyncHTTPProvider(RPC_ENDPOINTS[chain]))
-            receipt = await w3.eth.get_transaction_receipt(tx_hash)
-            if receipt is None:
-                return {"status": "pending", "tx_hash": tx_hash}
-            success = receipt.status == 1
-            return {
-                "status": "success" if success else "failed",
-                "tx_hash": tx_hash,
-                "blockNumber": receipt.blockNumber,
-                "gasUsed": receipt.gasUsed,
-                "logs": [dict(log) for log in receipt.logs],
-            }
+            return await rpc_router.call(chain, lambda url: _evm_status(chain, url, tx_hash))
 
         elif chain == "trx":
             # 🔹 Placeholder TRX (TRON) support, nanti bisa pakai tronpy async
@@ -0,0 +1,68 @@
+# 📍 tests/test_token_registry.py
+import asyncio
+
+import pytest
+from tronpy.async_contract import AsyncContract
+
+from lib.token_registry import TokenDeployment, TokenRegistry
+
+USDT_TRC20 = "TR7NHqjeKQxGTCi8q8ZY4pxR8otSzgjLj6t"
+DECIMALS_ABI = [{
+    "type": "function",
+    "name": "decimals",
+    "inputs": [],
+    "outputs": [{"name": "", "type": "uint8"}],
+    "stateMutability": "view",
+}]
+
+
+class FakeTronClient:
+    """Pengganti AsyncTron: jawab constant call decimals() tanpa jaringan"""
+
+    def __init__(self, decimals: int):
+        self.decimals = decimals
+        self.calls = 0
+
+    async def trigger_const_smart_contract_function(self, owner, contract_address, function_signature, parameter):
+        self.calls += 1
+        return "%064x" % self.decimals
+
+
+async def _settle(registry: TokenRegistry):
+    while registry._tasks:
+        await asyncio.gather(*list(registry._tasks))
+
+
+@pytest.mark.parametrize("wrap", [False, True], ids=["method", "async-def"])
+def test_ensure_verified_awaits_async_tronpy_method(wrap):
+    client = FakeTronClient(decimals=6)
+    contract = AsyncContract(addr=USDT_TRC20, abi=DECIMALS_ABI, client=client)
+    deployment = TokenDeployment("trx", "usdt", USDT_TRC20, 18)
+    registry = TokenRegistry({}, {}, [deployment])
+
+    async def fetch_decimals():
+        return await contract.functions.decimals()
+
+    async def main():
+        registry.ensure_verified(deployment, fetch_decimals if wrap else contract.functions.decimals)
+        await _settle(registry)
+
+    asyncio.run(main())
+
+    assert client.calls == 1
+    assert deployment.verified
+    assert deployment.decimals == 6
+
+
+def test_ensure_verified_sync_callable_runs_in_thread():
+    deployment = TokenDeployment("eth", "usdt", "0xdAC17F958D2ee523a2206206994597C13D831ec7", 18)
+    registry = TokenRegistry({}, {}, [deployment])
+
+    registry.ensure_verified(deployment, lambda: 6)
+
+    for _ in range(100):
+        if deployment.verified:
+            break
+        asyncio.run(asyncio.sleep(0.01))
+    assert deployment.verified
+    assert deployment.decimals == 6